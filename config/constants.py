@@ -13,4 +13,123 @@ SPAM_WARNING_COOLDOWN = 9
 AUTO_KICK_THRESHOLD = 3
 
 # Maximum number of messages to keep in history per chat
-MAX_HISTORY_LENGTH = 12
\ No newline at end of file
+MAX_HISTORY_LENGTH = 12
+
+# Maximum number of OpenAI completions allowed in flight at once
+LLM_MAX_CONCURRENCY = 4
+
+# Timeout in seconds for a single OpenAI completion
+LLM_REQUEST_TIMEOUT = 30
+
+# Queue depth above which low-priority LLM requests (random replies) are dropped
+LLM_QUEUE_MAX_DEPTH = 20
+
+# Estimated queue wait in seconds above which low-priority LLM requests are dropped
+LLM_QUEUE_MAX_LATENCY = 15
+
+# Interval in seconds between write-behind flushes of changed data
+PERSIST_FLUSH_INTERVAL = 60
+
+# Number of dirty entities that triggers a flush before the interval is up
+PERSIST_MAX_DIRTY = 200
+
+# Seconds without messages after which a sender's spam state is evicted
+SPAM_STATE_TTL = 3600
+
+# Interval in seconds between sweeps of idle spam state
+SPAM_SWEEP_INTERVAL = 600
+
+# Seconds a chat's administrator list is cached (chat member updates invalidate it sooner)
+ADMIN_CACHE_TTL = 600
+
+# Copies of the same (or nearly the same) text in a chat that count as a flood
+DUPLICATE_THRESHOLD = 3
+
+# Seconds within which repeated copies are counted
+DUPLICATE_WINDOW = 600
+
+# Max differing SimHash bits for two messages to count as the same text
+DUPLICATE_MAX_DISTANCE = 3
+
+# Messages shorter than this (after normalization) are never treated as duplicates
+DUPLICATE_MIN_LENGTH = 20
+
+# Recent fingerprints remembered per chat
+DUPLICATE_LRU_SIZE = 256
+
+# Half-life in seconds of the chat-wide raid rate counters
+RAID_HALF_LIFE = 30
+
+# Decayed count of messages from new users that starts a lockdown
+RAID_MESSAGE_RATE_THRESHOLD = 15
+
+# Decayed count of joins that starts a lockdown
+RAID_JOIN_RATE_THRESHOLD = 8
+
+# Lockdown ends once both rates fall below this fraction of their thresholds
+RAID_RELEASE_RATIO = 0.3
+
+# Minimum lockdown duration in seconds
+RAID_MIN_LOCKDOWN = 120
+
+# Members who joined within this many seconds count as new users
+RAID_NEW_USER_AGE = 900
+
+# Kicks per batch during a lockdown, and seconds between batches
+RAID_KICK_BATCH = 5
+RAID_KICK_INTERVAL = 2
+
+# Interval in seconds between checks for lockdowns that can be lifted
+RAID_CHECK_INTERVAL = 30
+
+# Half-life in seconds of a user's spam warning count
+SPAM_WARNING_HALF_LIFE = 86400
+
+# Default timeout in seconds for outbound HTTP requests
+HTTP_TIMEOUT = 10
+
+# Pooled connections kept across all hosts, and concurrent requests allowed per host
+HTTP_MAX_CONNECTIONS = 20
+HTTP_PER_HOST_LIMIT = 4
+
+# Retries for failed idempotent requests, and the base of their jittered backoff in seconds
+HTTP_MAX_RETRIES = 2
+HTTP_RETRY_BASE_DELAY = 0.5
+
+# Longest Retry-After in seconds worth waiting for; a longer one fails the request instead
+HTTP_MAX_RETRY_AFTER = 10
+
+# Seconds a fetched weather report is reused for the same city
+WEATHER_CACHE_TTL = 600
+
+# Seconds a geocoded city is remembered, and how long an unknown city stays unknown
+GEOCODE_CACHE_TTL = 604800
+GEOCODE_NEGATIVE_TTL = 3600
+
+# Cities kept in the weather and geocoding caches
+WEATHER_CACHE_SIZE = 256
+
+# Forecast days fetched per pollen lookup (the API maximum), and locations kept in the pollen cache
+POLLEN_FORECAST_DAYS = 5
+POLLEN_CACHE_SIZE = 128
+
+# Minutes past local midnight at which the day's pollen forecasts are prefetched
+POLLEN_PREFETCH_MINUTE = 5
+
+# Most recently requested places that are prefetched alongside the preset locations
+POLLEN_PREFETCH_RECENT = 10
+
+# Seconds a Google search result page is reused, and queries kept in the search cache
+SEARCH_CACHE_TTL = 3600
+SEARCH_CACHE_SIZE = 256
+
+# Results shown per /google reply, and the furthest result Custom Search can page to
+SEARCH_RESULTS_PER_PAGE = 3
+SEARCH_MAX_RESULTS = 100
+
+# Custom Search API calls allowed per day (the free tier; resets at midnight Pacific time)
+SEARCH_DAILY_QUOTA = 100
+
+# Tracked SoundCloud artists polled at once, and requests per second sent to each SoundCloud API host
+SOUNDCLOUD_POLL_CONCURRENCY = 8
+SOUNDCLOUD_RATE_LIMIT = 10
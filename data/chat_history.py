@@ -0,0 +1,140 @@
+import sys
+import time
+from collections import deque
+from typing import Dict, List, Any, Iterator, Optional, Set
+
+from config.constants import MAX_HISTORY_LENGTH
+
+# Number of recent messages kept pre-formatted for the OpenAI API
+CONTEXT_LENGTH = 5
+
+class HistoryRecord:
+    """A single chat message. Slotted to keep per-message memory small."""
+    __slots__ = ('role', 'content', 'user_id', 'timestamp')
+
+    def __init__(self, role: str, content: str, user_id: str, timestamp: float):
+        self.role = sys.intern(role)
+        self.content = content
+        self.user_id = sys.intern(user_id)
+        self.timestamp = timestamp
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to the JSON format used on disk"""
+        return {
+            "role": self.role,
+            "content": self.content,
+            "user_id": self.user_id,
+            "timestamp": self.timestamp
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'HistoryRecord':
+        return cls(data["role"], data["content"], str(data.get("user_id", "unknown")), data.get("timestamp", 0.0))
+
+class ChatHistoryBuffer:
+    """
+    Fixed-capacity ring buffer of messages for a single chat.
+
+    Old messages are overwritten in place instead of re-slicing a list, and the
+    last CONTEXT_LENGTH messages are kept formatted for the OpenAI API so
+    building a prompt doesn't have to walk the history.
+    """
+    __slots__ = ('capacity', '_slots', '_head', '_size', '_context')
+
+    def __init__(self, capacity: int = MAX_HISTORY_LENGTH):
+        self.capacity = capacity
+        self._slots: List[Optional[HistoryRecord]] = [None] * capacity
+        self._head = 0  # Index of the oldest record
+        self._size = 0
+        self._context = deque(maxlen=min(CONTEXT_LENGTH, capacity))
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[HistoryRecord]:
+        """Iterate records from oldest to newest"""
+        for i in range(self._size):
+            yield self._slots[(self._head + i) % self.capacity]
+
+    def append(self, record: HistoryRecord) -> None:
+        """Add a record, overwriting the oldest one when full"""
+        if self._size < self.capacity:
+            self._slots[(self._head + self._size) % self.capacity] = record
+            self._size += 1
+        else:
+            self._slots[self._head] = record
+            self._head = (self._head + 1) % self.capacity
+
+        self._context.append({
+            "role": "assistant" if record.role == "bot" else "user",
+            "content": record.content
+        })
+
+    def get_context(self, limit: int = CONTEXT_LENGTH) -> List[Dict[str, str]]:
+        """Get the most recent messages formatted for the OpenAI API"""
+        if limit <= 0:
+            return []
+        if limit <= len(self._context):
+            return list(self._context)[-limit:]
+        return [
+            {"role": "assistant" if record.role == "bot" else "user", "content": record.content}
+            for record in list(self)[-limit:]
+        ]
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        """Convert to the JSON format used on disk"""
+        return [record.to_dict() for record in self]
+
+class ChatHistoryStore:
+    """Holds a ring buffer of recent messages per chat"""
+
+    def __init__(self, capacity: int = MAX_HISTORY_LENGTH):
+        self.capacity = capacity
+        self.buffers: Dict[str, ChatHistoryBuffer] = {}
+        self.dirty: Set[str] = set()  # Chats with messages that haven't been persisted yet
+
+    def __contains__(self, chat_id: str) -> bool:
+        return chat_id in self.buffers
+
+    def _get_buffer(self, chat_id: str) -> ChatHistoryBuffer:
+        buffer = self.buffers.get(chat_id)
+        if buffer is None:
+            buffer = self.buffers[sys.intern(chat_id)] = ChatHistoryBuffer(self.capacity)
+        return buffer
+
+    def append(self, chat_id: str, user_id: str, role: str, content: str, timestamp: float = None) -> None:
+        """Add a message to a chat's history"""
+        record = HistoryRecord(role, content, user_id, timestamp if timestamp is not None else time.time())
+        self._get_buffer(chat_id).append(record)
+        self.dirty.add(chat_id)
+
+    def get_context(self, chat_id: str, limit: int = CONTEXT_LENGTH) -> List[Dict[str, str]]:
+        """Get recent messages for a chat formatted for the OpenAI API"""
+        buffer = self.buffers.get(chat_id)
+        return buffer.get_context(limit) if buffer else []
+
+    def to_dict(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Convert all histories to the JSON format used on disk"""
+        return {chat_id: buffer.to_list() for chat_id, buffer in self.buffers.items()}
+
+    def snapshot_dirty(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Convert chats changed since the last snapshot to the on-disk format and clear their dirty flag"""
+        snapshot = {chat_id: self.buffers[chat_id].to_list() for chat_id in self.dirty if chat_id in self.buffers}
+        self.dirty.clear()
+        return snapshot
+
+    def load_chat(self, chat_id: str, messages: List[Dict[str, Any]]) -> None:
+        """Replace one chat's history with data in the on-disk format"""
+        buffer = self.buffers[sys.intern(chat_id)] = ChatHistoryBuffer(self.capacity)
+        for message in messages[-self.capacity:]:
+            buffer.append(HistoryRecord.from_dict(message))
+
+    def load_dict(self, data: Dict[str, List[Dict[str, Any]]]) -> None:
+        """Replace all histories with data in the JSON format used on disk"""
+        self.buffers = {}
+        self.dirty.clear()
+        for chat_id, messages in data.items():
+            self.load_chat(chat_id, messages)
+
+# Singleton instance
+chat_history_store = ChatHistoryStore()
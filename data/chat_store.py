@@ -1,6 +1,7 @@
 import os
-import json
 from typing import Dict, List, Any
+from data.storage import get_storage
+from data.persistence import persistence_manager
 
 class ChatStore:
     """
@@ -8,27 +9,17 @@ class ChatStore:
     """
     def __init__(self):
         self.data_path = os.path.join(os.path.dirname(__file__), 'chat_histories.json')
-        self.list_data_path = os.path.join(os.path.dirname(__file__), 'chat_lists.json')
+        self.storage = get_storage()
         self.chat_lists = self._load_chat_lists()
+        persistence_manager.register('chat_lists', self.chat_lists.get)
     
     def _load_chat_lists(self) -> Dict[str, List[str]]:
-        """Load chat lists from file or initialize empty dict"""
-        if os.path.exists(self.list_data_path):
-            try:
-                with open(self.list_data_path, 'r') as f:
-                    return json.load(f)
-            except Exception as e:
-                print(f"Error loading chat lists: {e}")
-                return {}
-        return {}
-    
-    def save_chat_lists(self, chat_lists: Dict[str, List[str]]) -> None:
-        """Save chat lists to file"""
+        """Load chat lists from storage or initialize empty dict"""
         try:
-            with open(self.list_data_path, 'w') as f:
-                json.dump(chat_lists, f, indent=2)
+            return self.storage.load('chat_lists')
         except Exception as e:
-            print(f"Error saving chat lists: {e}")
+            print(f"Error loading chat lists: {e}")
+            return {}
     
     def get_chat_list(self, chat_id: str) -> List[str]:
         """Get the list for a specific chat"""
@@ -42,7 +33,7 @@ class ChatStore:
             self.chat_lists[chat_id] = []
         
         self.chat_lists[chat_id].append(item)
-        self.save_chat_lists(self.chat_lists)
+        persistence_manager.mark_dirty('chat_lists', chat_id)
     
     def remove_item_from_list(self, chat_id: str, item: str) -> bool:
         """Remove an item from a chat's list. Returns True if item was found and removed."""
@@ -51,7 +42,7 @@ class ChatStore:
         
         if item in self.chat_lists[chat_id]:
             self.chat_lists[chat_id].remove(item)
-            self.save_chat_lists(self.chat_lists)
+            persistence_manager.mark_dirty('chat_lists', chat_id)
             return True
         
         return False
@@ -60,7 +51,7 @@ class ChatStore:
         """Clear a chat's list"""
         if chat_id in self.chat_lists:
             self.chat_lists[chat_id] = []
-            self.save_chat_lists(self.chat_lists)
+            persistence_manager.mark_dirty('chat_lists', chat_id)
 
 # Singleton instance
 chat_store = ChatStore()
\ No newline at end of file
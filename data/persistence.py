@@ -0,0 +1,123 @@
+import asyncio
+import copy
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+from data.storage import StorageBackend, get_storage
+from config.constants import PERSIST_MAX_DIRTY
+
+class PersistenceManager:
+    """
+    Write-behind persistence. Services register a getter per storage namespace
+    and mark entities dirty as they change; dirty rows are coalesced and written
+    in one batch per namespace by a periodic flush, an early flush once too many
+    entities are dirty, and a final flush on shutdown.
+    """
+    
+    def __init__(self, storage: StorageBackend = None, max_dirty: int = PERSIST_MAX_DIRTY):
+        self._storage = storage
+        self.max_dirty = max_dirty
+        self.getters: Dict[str, Callable[[str], Any]] = {}
+        self.dirty: Dict[str, Set[str]] = {}
+        self.flush_hooks: List[Callable[[], Awaitable[None]]] = []
+        self.stats = {'flushes': 0, 'rows_written': 0, 'errors': 0}
+        self._dirty_count = 0
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._pending_flush: Optional[asyncio.Task] = None
+    
+    @property
+    def storage(self) -> StorageBackend:
+        if self._storage is None:
+            self._storage = get_storage()
+        return self._storage
+    
+    def register(self, namespace: str, getter: Callable[[str], Any]) -> None:
+        """
+        Register how to read an entity for writing
+        
+        Args:
+            namespace: Storage namespace, e.g. 'users'
+            getter: Returns the value to store for a key, or None if it was deleted
+        """
+        self.getters[namespace] = getter
+        self.dirty.setdefault(namespace, set())
+    
+    def add_flush_hook(self, hook: Callable[[], Awaitable[None]]) -> None:
+        """Run an extra coroutine (e.g. chat history shards) on every flush"""
+        self.flush_hooks.append(hook)
+    
+    def mark_dirty(self, namespace: str, key: str) -> None:
+        """Mark an entity as changed so the next flush writes it"""
+        keys = self.dirty.setdefault(namespace, set())
+        if key in keys:
+            return
+        keys.add(key)
+        self._dirty_count += 1
+        
+        if self._dirty_count >= self.max_dirty:
+            self._schedule_flush()
+    
+    def _schedule_flush(self) -> None:
+        """Start an early flush if we're on the event loop and none is running"""
+        if self._pending_flush and not self._pending_flush.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._pending_flush = loop.create_task(self.flush())
+    
+    def _take_snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Copy out dirty rows on the event loop so writes can run in a thread"""
+        batch = {}
+        for namespace, keys in self.dirty.items():
+            if not keys:
+                continue
+            getter = self.getters.get(namespace)
+            if getter is None:
+                continue
+            batch[namespace] = {key: copy.deepcopy(getter(key)) for key in keys}
+            self.dirty[namespace] = set()
+        self._dirty_count = 0
+        return batch
+    
+    def _write(self, batch: Dict[str, Dict[str, Any]]) -> int:
+        """Write a snapshot, re-marking rows whose namespace failed"""
+        written = 0
+        for namespace, rows in batch.items():
+            upserts = {key: value for key, value in rows.items() if value is not None}
+            deletes = [key for key, value in rows.items() if value is None]
+            try:
+                self.storage.upsert_many(namespace, upserts)
+                self.storage.delete_many(namespace, deletes)
+                written += len(rows)
+            except Exception as e:
+                print(f"Error saving {namespace} data: {e}")
+                self.stats['errors'] += 1
+                self.dirty.setdefault(namespace, set()).update(rows.keys())
+                self._dirty_count += len(rows)
+        return written
+    
+    async def flush(self) -> None:
+        """Write every dirty entity, with the storage I/O running off the event loop"""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        
+        async with self._flush_lock:
+            batch = self._take_snapshot()
+            if batch:
+                self.stats['rows_written'] += await asyncio.to_thread(self._write, batch)
+            
+            for hook in self.flush_hooks:
+                try:
+                    await hook()
+                except Exception as e:
+                    print(f"Error in flush hook: {e}")
+                    self.stats['errors'] += 1
+            
+            self.stats['flushes'] += 1
+    
+    def pending_count(self) -> int:
+        """Number of entities waiting to be written"""
+        return self._dirty_count
+
+# Singleton instance
+persistence_manager = PersistenceManager()
@@ -1,9 +1,15 @@
 import json
 import os
+import re
 import time
 import random
+import threading
 from collections import Counter
-from typing import Dict, List, Any, Tuple
+from typing import Dict, List, Any, Tuple, Callable
+
+GREETING_WORDS = {'hello', 'hi', 'hey', 'hej', 'tjena', 'tja', 'hallå', 'goddag'}
+
+EMOJI_PATTERN = re.compile(r'[\U0001F600-\U0001F64F\U0001F300-\U0001F5FF\U0001F680-\U0001F6FF\U0001F700-\U0001F77F\U0001F780-\U0001F7FF\U0001F800-\U0001F8FF\U0001F900-\U0001F9FF\U0001FA00-\U0001FA6F\U0001FA70-\U0001FAFF\U00002702-\U000027B0\U000024C2-\U0001F251]+')
 
 class PersonalityTrainer:
     """
@@ -28,6 +34,19 @@ class PersonalityTrainer:
         self.linguistic_patterns = self.personality_data.get('linguistic_patterns', {})
         self.frequent_users = self.personality_data.get('frequent_users', {})
         
+        # Cumulative counts behind the top greeting/emoji lists, so new messages can be folded in
+        self.greeting_counts = Counter(self.personality_data.get('greeting_counts', {}))
+        self.emoji_counts = Counter(self.personality_data.get('emoji_counts', {}))
+        
+        # Timestamp of the newest message already analyzed, per chat
+        self.watermarks: Dict[str, float] = self.personality_data.get('watermarks', {})
+        
+        # Callbacks notified after the character config has been rewritten
+        self._config_listeners: List[Callable[[], None]] = []
+        
+        # Saves can come from a flush thread and from the event loop at the same time
+        self._save_lock = threading.Lock()
+        
     def _load_personality_data(self) -> Dict[str, Any]:
         """Load personality data from file or initialize if not exists"""
         if os.path.exists(self.data_path):
@@ -64,80 +83,91 @@ class PersonalityTrainer:
             print(f"Error loading character config: {e}")
             return {}
     
-    def analyze_chat_history(self, chat_histories: Dict[str, List[Dict[str, Any]]]) -> None:
+    def analyze_chat_history(self, chat_histories: Dict[str, List[Dict[str, Any]]], save: bool = True) -> bool:
         """
-        Analyze chat history to extract patterns
+        Analyze chat history to extract patterns. Only messages newer than each
+        chat's watermark are processed, so repeated calls with the same history
+        don't count anything twice.
         
         Args:
             chat_histories: Dictionary of chat histories by chat_id
+            save: Write the personality data right away; pass False to save it elsewhere
+        
+        Returns:
+            bool: True if there were new messages to analyze
         """
-        all_messages = []
+        new_messages = []
         
-        # Collect all messages from all chats
+        # Collect messages we haven't seen yet from all chats
         for chat_id, messages in chat_histories.items():
+            watermark = self.watermarks.get(chat_id, 0.0)
+            newest = watermark
+            
             for message in messages:
+                timestamp = message.get('timestamp', 0.0)
+                if timestamp <= watermark:
+                    continue
+                newest = max(newest, timestamp)
+                
                 # Skip bot's own messages
                 if message['role'] == 'bot':
                     continue
                 
-                all_messages.append(message)
+                new_messages.append(message)
                 
                 # Track frequent users
                 user_id = message.get('user_id', 'unknown')
                 if user_id not in self.frequent_users:
                     self.frequent_users[user_id] = 0
                 self.frequent_users[user_id] += 1
+            
+            self.watermarks[chat_id] = newest
         
-        # Analyze messages for patterns if we have enough data
-        if len(all_messages) >= 10:
-            self._analyze_linguistic_patterns(all_messages)
-            self._analyze_topic_interests(all_messages)
+        if not new_messages:
+            return False
+        
+        self._analyze_linguistic_patterns(new_messages)
+        self._analyze_topic_interests(new_messages)
         
         # Update last updated timestamp
+        self.personality_data['frequent_users'] = self.frequent_users
+        self.personality_data['watermarks'] = self.watermarks
         self.personality_data['last_updated'] = int(time.time())
         
         # Save updated data
-        self.save_personality_data()
+        if save:
+            self.save_personality_data()
+        return True
     
     def _analyze_linguistic_patterns(self, messages: List[Dict[str, Any]]) -> None:
         """
-        Analyze messages for linguistic patterns
+        Fold new messages into the greeting and emoji counts
         
         Args:
             messages: List of message objects
         """
-        # Extract all message content
-        all_text = [msg['content'] for msg in messages]
-        
-        # Analyze greeting patterns
-        greeting_words = ['hello', 'hi', 'hey', 'hej', 'tjena', 'tja', 'hallå', 'goddag']
-        greeting_patterns = []
-        
-        for text in all_text:
+        for message in messages:
+            text = message['content']
+            
+            # Analyze greeting patterns
             words = text.lower().split()
-            if words and words[0] in greeting_words:
-                greeting_patterns.append(words[0])
-        
-        # Count emoji usage
-        emoji_pattern = r'[\U0001F600-\U0001F64F\U0001F300-\U0001F5FF\U0001F680-\U0001F6FF\U0001F700-\U0001F77F\U0001F780-\U0001F7FF\U0001F800-\U0001F8FF\U0001F900-\U0001F9FF\U0001FA00-\U0001FA6F\U0001FA70-\U0001FAFF\U00002702-\U000027B0\U000024C2-\U0001F251]+'
-        import re
-        
-        all_emojis = []
-        for text in all_text:
-            emojis = re.findall(emoji_pattern, text)
-            all_emojis.extend(emojis)
+            if words and words[0] in GREETING_WORDS:
+                self.greeting_counts[words[0]] += 1
+            
+            # Count emoji usage
+            self.emoji_counts.update(EMOJI_PATTERN.findall(text))
         
         # Update linguistic patterns
-        if greeting_patterns:
-            counter = Counter(greeting_patterns)
-            self.linguistic_patterns['greeting_styles'] = [item[0] for item in counter.most_common(5)]
+        if self.greeting_counts:
+            self.linguistic_patterns['greeting_styles'] = [item[0] for item in self.greeting_counts.most_common(5)]
         
-        if all_emojis:
-            counter = Counter(all_emojis)
-            self.linguistic_patterns['emoji_patterns'] = [item[0] for item in counter.most_common(10)]
+        if self.emoji_counts:
+            self.linguistic_patterns['emoji_patterns'] = [item[0] for item in self.emoji_counts.most_common(10)]
         
         # Update personality data
         self.personality_data['linguistic_patterns'] = self.linguistic_patterns
+        self.personality_data['greeting_counts'] = dict(self.greeting_counts)
+        self.personality_data['emoji_counts'] = dict(self.emoji_counts)
     
     def _analyze_topic_interests(self, messages: List[Dict[str, Any]]) -> None:
         """
@@ -197,14 +227,18 @@ class PersonalityTrainer:
         self.personality_data['reaction_counters'] = self.reaction_counters
         self.save_personality_data()
     
-    def save_personality_data(self) -> None:
-        """Save personality data to file"""
+    def save_personality_data(self, data: Dict[str, Any] = None) -> None:
+        """Save personality data (or a snapshot of it, when saving from another thread) to file"""
         try:
-            with open(self.data_path, 'w') as f:
-                json.dump(self.personality_data, f, indent=2)
+            with self._save_lock, open(self.data_path, 'w') as f:
+                json.dump(self.personality_data if data is None else data, f, indent=2)
         except Exception as e:
             print(f"Error saving personality data: {e}")
     
+    def add_config_listener(self, callback: Callable[[], None]) -> None:
+        """Register a callback to run whenever the character config is rewritten"""
+        self._config_listeners.append(callback)
+    
     def update_character_config(self) -> bool:
         """
         Update character config based on personality data
@@ -261,6 +295,8 @@ class PersonalityTrainer:
             try:
                 with open(self.config_path, 'w') as f:
                     json.dump(self.character_config, f, indent=2)
+                for callback in self._config_listeners:
+                    callback()
                 return True
             except Exception as e:
                 print(f"Error saving character config: {e}")
@@ -0,0 +1,178 @@
+import copy
+import json
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, Optional
+
+DATA_DIR = os.path.dirname(__file__)
+
+# Namespaces that used to be stored as data/<namespace>.json documents
+JSON_NAMESPACES = ['users', 'reputation', 'chat_lists', 'soundcloud_tracking']
+
+class StorageBackend(ABC):
+    """
+    Persists each service's data as rows of JSON values keyed by
+    (namespace, key), e.g. ('users', user_id).
+    """
+
+    @abstractmethod
+    def load(self, namespace: str) -> Dict[str, Any]:
+        """Load every row in a namespace as a dict"""
+
+    @abstractmethod
+    def upsert_many(self, namespace: str, items: Dict[str, Any]) -> None:
+        """Insert or replace several rows in one write"""
+
+    @abstractmethod
+    def delete_many(self, namespace: str, keys: Iterable[str]) -> None:
+        """Delete several rows in one write"""
+
+    def upsert(self, namespace: str, key: str, value: Any) -> None:
+        """Insert or replace a single row"""
+        self.upsert_many(namespace, {key: value})
+
+    def delete(self, namespace: str, key: str) -> None:
+        """Delete a single row"""
+        self.delete_many(namespace, [key])
+
+    def close(self) -> None:
+        pass
+
+class JsonFileBackend(StorageBackend):
+    """
+    The original format: one data/<namespace>.json document per namespace,
+    rewritten in full on every write.
+    """
+
+    def __init__(self, directory: str = DATA_DIR):
+        self.directory = directory
+        self._documents: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, namespace: str) -> str:
+        return os.path.join(self.directory, f'{namespace}.json')
+
+    def load(self, namespace: str) -> Dict[str, Any]:
+        document = {}
+        path = self._path(namespace)
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    document = json.load(f)
+            except Exception as e:
+                print(f"Error loading {namespace} data: {e}")
+        # Callers keep the loaded dict as live state, while writes may dump the
+        # document from a worker thread, so they never share objects
+        self._documents[namespace] = document
+        return copy.deepcopy(document)
+
+    def _write(self, namespace: str) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._path(namespace), 'w', encoding='utf-8') as f:
+            json.dump(self._documents[namespace], f, indent=2, ensure_ascii=False)
+
+    def upsert_many(self, namespace: str, items: Dict[str, Any]) -> None:
+        with self._lock:
+            document = self._documents.setdefault(namespace, {})
+            document.update(items)
+            self._write(namespace)
+
+    def delete_many(self, namespace: str, keys: Iterable[str]) -> None:
+        with self._lock:
+            document = self._documents.setdefault(namespace, {})
+            for key in keys:
+                document.pop(key, None)
+            self._write(namespace)
+
+class SQLiteBackend(StorageBackend):
+    """
+    Single SQLite database in WAL mode. Writes touch only the given rows and
+    each batch is committed in one transaction.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS documents ('
+            ' namespace TEXT NOT NULL,'
+            ' key TEXT NOT NULL,'
+            ' value TEXT NOT NULL,'
+            ' PRIMARY KEY (namespace, key)'
+            ') WITHOUT ROWID'
+        )
+        self._conn.commit()
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            return self._conn.execute('SELECT 1 FROM documents LIMIT 1').fetchone() is None
+
+    def load(self, namespace: str) -> Dict[str, Any]:
+        with self._lock:
+            rows = self._conn.execute('SELECT key, value FROM documents WHERE namespace = ?', (namespace,)).fetchall()
+        return {key: json.loads(value) for key, value in rows}
+
+    def upsert_many(self, namespace: str, items: Dict[str, Any]) -> None:
+        if not items:
+            return
+        rows = [(namespace, str(key), json.dumps(value, ensure_ascii=False)) for key, value in items.items()]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'INSERT INTO documents (namespace, key, value) VALUES (?, ?, ?) '
+                'ON CONFLICT (namespace, key) DO UPDATE SET value = excluded.value',
+                rows
+            )
+
+    def delete_many(self, namespace: str, keys: Iterable[str]) -> None:
+        rows = [(namespace, str(key)) for key in keys]
+        if not rows:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany('DELETE FROM documents WHERE namespace = ? AND key = ?', rows)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+def migrate_json_to_sqlite(target: SQLiteBackend, directory: str = DATA_DIR) -> Dict[str, int]:
+    """
+    Copy the legacy data/<namespace>.json documents into a SQLite backend
+
+    Returns:
+        Dict[str, int]: Number of rows migrated per namespace
+    """
+    source = JsonFileBackend(directory)
+    migrated = {}
+    for namespace in JSON_NAMESPACES:
+        document = source.load(namespace)
+        if document:
+            target.upsert_many(namespace, document)
+        migrated[namespace] = len(document)
+    return migrated
+
+_storage: Optional[StorageBackend] = None
+
+def get_storage() -> StorageBackend:
+    """
+    Get the configured storage backend (STORAGE_BACKEND=sqlite|json).
+    A fresh SQLite database is seeded from the legacy JSON files.
+    """
+    global _storage
+    if _storage is None:
+        backend = os.getenv('STORAGE_BACKEND', 'sqlite').lower()
+        if backend == 'json':
+            _storage = JsonFileBackend()
+        else:
+            path = os.getenv('STORAGE_PATH', os.path.join(DATA_DIR, 'anna.db'))
+            _storage = SQLiteBackend(path)
+            if _storage.is_empty():
+                migrated = migrate_json_to_sqlite(_storage)
+                if any(migrated.values()):
+                    print(f"Migrated JSON data into {path}: {migrated}")
+    return _storage
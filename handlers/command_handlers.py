@@ -1,18 +1,21 @@
 import numpy as np
 import random
 import threading
-import requests
 import time
 import json
 import os
 from telegram import Update
 from telegram.ext import ApplicationBuilder, CommandHandler, ContextTypes
 
-from utils.misc_utils import welcome_message, google_search
+from utils.misc_utils import welcome_message
 from utils.time_utils import convert_to_gmt
 from services.weather_service import get_weather
 from services.pollen_service import get_pollen_for_location
-from services.nlp_service import generate_response, save_chat_histories
+from services.search_service import search_service
+from services.nlp_service import reload_character_config, get_prompt_cache_stats
+from services.llm_scheduler import llm_scheduler, Priority
+from services.admin_cache import admin_cache
+from services.raid_detector import raid_detector
 from services.lyrics_service import lyrics_service
 from services.user_service import user_service
 from data.chat_store import chat_store
@@ -51,7 +54,7 @@ async def who_is(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         return
     
     query = " ".join(context.args)
-    matches = user_service.search_users(query)
+    matches = user_service.find_users(query)
     
     if not matches:
         await update.message.reply_text(f"Ingen användare hittad för '{query}'")
@@ -68,7 +71,8 @@ async def who_is(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
             info.append(f"Efternamn: {user['last_name']}")
         
         info.append(f"Meddelanden: {user.get('message_count', 0)}")
-        info.append(f"Senast sedd: {user.get('last_seen', 'Okänt')}")
+        last_seen = user.get('last_seen')
+        info.append(f"Senast sedd: {time.strftime('%Y-%m-%d %H:%M', time.localtime(last_seen)) if last_seen else 'Okänt'}")
         
         await update.message.reply_text("\n".join(info))
     else:
@@ -78,16 +82,13 @@ async def who_is(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
 
 async def user_stats(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Show user statistics"""
-    users = user_service.get_all_users()
-    active_users = user_service.get_active_users(7)  # Last 7 days
-    
-    total_messages = sum(user.get('message_count', 0) for user in users.values())
-    top_users = sorted(users.items(), key=lambda x: x[1].get('message_count', 0), reverse=True)[:5]
+    active_count = user_service.count_active_users(7)  # Last 7 days
+    top_users = user_service.get_top_users(5)
     
     stats = [
-        f"👥 Användare: {len(users)}",
-        f"🟢 Aktiva (7 dagar): {len(active_users)}",
-        f"💬 Totala meddelanden: {total_messages}",
+        f"👥 Användare: {user_service.get_user_count()}",
+        f"🟢 Aktiva (7 dagar): {active_count}",
+        f"💬 Totala meddelanden: {user_service.total_messages}",
         f"",
         f"🏆 **Mest aktiva:**"
     ]
@@ -106,7 +107,7 @@ async def reputation_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
     if context.args:
         # Look up another user
         query = " ".join(context.args)
-        matches = user_service.search_users(query)
+        matches = user_service.find_users(query)
         if matches:
             user_id = matches[0]['user_id']
         else:
@@ -127,9 +128,16 @@ async def reputation_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
         f"",
         f"Status: {rep['relationship_status'].title()} {relationship_emojis.get(rep['relationship_status'], '🤖')}",
         f"Totalpoäng: {rep['total_score']}",
+    ]
+    
+    rank = reputation_service.get_rank(user_id)
+    if rank:
+        report.append(f"Placering: #{rank[0]} av {rank[1]}")
+    
+    report.extend([
         f"",
         f"**Traits:**"
-    ]
+    ])
     
     for trait, value in rep['traits'].items():
         emoji = "📈" if value > 5 else "📉" if value < -2 else "➡️"
@@ -194,7 +202,7 @@ async def weather_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     print(f'{update.effective_user.first_name} requested /weather.')
     city = ' '.join(context.args)
     
-    weather_info = get_weather(city)
+    weather_info = await get_weather(city)
     await update.message.reply_text(weather_info)
 
 async def googlar(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -207,7 +215,14 @@ async def googlar(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         await update.message.reply_text("Please provide a search query.")
         return
 
-    search_results = google_search(query, verbose=True)
+    search_results = await search_service.search(query, chat_id=str(update.effective_chat.id))
+    await update.message.reply_text(search_results)
+
+async def googlar_more(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Show the next page of the chat's last Google search"""
+    print(f'{update.effective_user.first_name} requested /googlemore.')
+    
+    search_results = await search_service.more(str(update.effective_chat.id))
     await update.message.reply_text(search_results)
 
 async def start_timer(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -312,7 +327,7 @@ async def pollenrapport(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
     
     print(f'{update.effective_user.first_name} requested /pollen for {location}.')
     
-    message = get_pollen_for_location(location, days)
+    message = await get_pollen_for_location(location, days)
     await update.message.reply_text(message)
     print(f'Pollen information for {location} provided.')
 
@@ -337,8 +352,13 @@ async def chat_with_anna(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     chat_id = str(update.effective_chat.id)
     user_name = update.effective_user.first_name
     
+    # Lockdown skips LLM replies entirely, commands included
+    if raid_detector.in_lockdown(chat_id):
+        await update.message.reply_text("Chatten är låst just nu, försök igen senare.")
+        return
+    
     # Generate and send response
-    response = generate_response(chat_id, user_id, message, user_name)
+    response = await llm_scheduler.submit(Priority.MENTION, chat_id, user_id, message, user_name)
     await update.message.reply_text(response)
     print(f'Chat response provided for message: {message[:30]}...')
 
@@ -361,6 +381,8 @@ async def bot_status(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None
     
     # Get personality data summary
     personality_summary = personality_trainer.get_personality_summary()
+    prompt_stats = get_prompt_cache_stats()
+    search_stats = search_service.get_stats()
     
     # Create status message
     status_message = (
@@ -370,6 +392,9 @@ async def bot_status(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None
         f"Location: {location}\n"
         f"Common phrases: {phrase_text}\n\n"
         f"{personality_summary}\n\n"
+        f"Prompt cache: {prompt_stats['hits']} hits, {prompt_stats['misses']} misses (config {prompt_stats['config_hash']})\n"
+        f"Search: {search_stats['calls_today']}/{search_stats['quota']} API calls today, "
+        f"{search_stats['cache_hits']} cache hits, {search_stats['coalesced']} coalesced\n\n"
         f"I've been learning from our conversations to better suit your chat's needs!"
     )
     
@@ -460,9 +485,10 @@ async def toggle_personality(update: Update, context: ContextTypes.DEFAULT_TYPE)
         )
         return
     
-    # Save updated config
+    # Save updated config and recompile the system prompt
     with open(config_path, 'w') as f:
         json.dump(config, f, indent=2)
+    reload_character_config()
     
     print(f'Personality trait {trait} updated.')
 
@@ -473,48 +499,51 @@ async def kick_user(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         await update.message.reply_text("This command can only be used in group chats.")
         return
 
-    chat_admins = await context.bot.get_chat_administrators(update.effective_chat.id)
-    admin_ids = [admin.user.id for admin in chat_admins]
+    admin_ids = await admin_cache.get_admin_ids(context.bot, update.effective_chat.id)
     
     if update.effective_user.id not in admin_ids:
         await update.message.reply_text("Only chat administrators can use this command.")
         return
     
     # Check if a user was specified (via reply or username)
-    user_to_kick = None
+    kick_user_id = None
+    kick_name = None
     reason = "No reason specified."
     
     if update.message.reply_to_message:
         # If the command is a reply to someone's message
         user_to_kick = update.message.reply_to_message.from_user
+        kick_user_id = user_to_kick.id
+        kick_name = user_to_kick.first_name
         # Get reason if provided
         if context.args:
             reason = " ".join(context.args)
     elif context.args:
-        # If username is provided as an argument
+        # If username is provided as an argument, resolve it from the users we've seen
         username = context.args[0]
-        if username.startswith('@'):
-            username = username[1:]  # Remove @ symbol
+        user_id = user_service.get_user_id_by_username(username)
+        if not user_id:
+            await update.message.reply_text(
+                f"Jag känner inte igen {username}. Svara på ett meddelande från användaren istället."
+            )
+            return
         
-        # There's no direct way to get user ID from username (?) in telegram-python-bot
-        await update.message.reply_text(
-            "Jag kan bara banna användare om du svarar på deras meddelande. "
-            "Kicking by username isn't supported due to Telegram API limitations."
-        )
-        return
+        kick_user_id = int(user_id)
+        kick_name = user_service.get_user_display_name(user_id)
+        if len(context.args) > 1:
+            reason = " ".join(context.args[1:])
     
-    if not user_to_kick:
-        await update.message.reply_text("svara på ett meddelande från användaren du vill banna")
+    if not kick_user_id:
+        await update.message.reply_text("svara på ett meddelande från användaren du vill banna, eller skriv /kick @användarnamn")
         return
     
     # Don't allow kicking admins
-    if user_to_kick.id in admin_ids:
+    if kick_user_id in admin_ids:
         await update.message.reply_text("sorry, jag verkar inte kunna banna en admin")
         return
     
     # Don't allow kicking the bot itself
-    bot_me = await context.bot.get_me()
-    if user_to_kick.id == bot_me.id:
+    if kick_user_id == context.bot.id:
         await update.message.reply_text("jag tänker inte banna mig själv 🤪")
         return
 
@@ -523,25 +552,25 @@ async def kick_user(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         kick_line = lyrics_service.get_kick_line()
         
         kick_messages = [
-            f"{kick_line} {user_to_kick.first_name} lämnar kanalen!",
-            f"Banning {user_to_kick.first_name} so hard! {kick_line}",
-            f"{user_to_kick.first_name}, {kick_line.lower()}",
-            f"{kick_line} - Removing {user_to_kick.first_name} for: {reason}"
+            f"{kick_line} {kick_name} lämnar kanalen!",
+            f"Banning {kick_name} so hard! {kick_line}",
+            f"{kick_name}, {kick_line.lower()}",
+            f"{kick_line} - Removing {kick_name} for: {reason}"
         ]
         kick_message = random.choice(kick_messages)
         
         # Kick the user
-        await context.bot.ban_chat_member(update.effective_chat.id, user_to_kick.id)
+        await context.bot.ban_chat_member(update.effective_chat.id, kick_user_id)
         
         # Immediately unban so they can rejoin
         await context.bot.unban_chat_member(
             update.effective_chat.id, 
-            user_to_kick.id,
+            kick_user_id,
             only_if_banned=True
         )
         
         await update.message.reply_text(kick_message)
-        print(f"User {user_to_kick.first_name} (ID: {user_to_kick.id}) kicked by {update.effective_user.first_name}")
+        print(f"User {kick_name} (ID: {kick_user_id}) kicked by {update.effective_user.first_name}")
         
     except Exception as e:
         await update.message.reply_text(f"Failed to kick user: {str(e)}")
@@ -555,6 +584,7 @@ def register_command_handlers(bot):
         ("weather", weather_command),
         ("roll", roll_command),
         ("google", googlar),
+        ("googlemore", googlar_more),
         ("timer", start_timer),
         ("add", add_to_list),
         ("remove", remove_from_list),
@@ -1,112 +1,115 @@
 import time
-from typing import Dict, List, Tuple
-from telegram import Update
+import asyncio
+from typing import Dict
+from telegram import Bot, ChatMember, Update
 from telegram.ext import ContextTypes
 import traceback
 
 from services.lyrics_service import lyrics_service
 from config.constants import (
-    SPAM_THRESHOLD, SPAM_TIMEFRAME, SPAM_WARNING_COOLDOWN, AUTO_KICK_THRESHOLD
+    SPAM_TIMEFRAME, AUTO_KICK_THRESHOLD,
+    RAID_KICK_BATCH, RAID_KICK_INTERVAL
 )
-from services.nlp_service import generate_response
+from services.llm_scheduler import llm_scheduler, Priority
+from services.spam_detector import spam_detector
+from services.moderation_state import warning_ledger
+from services.admin_cache import admin_cache
+from services.spam_warnings import spam_warning_engine
+from services.raid_detector import raid_detector
 
-# Message counter to track potential spam
-message_counters = {}
-spam_warning_sent = {}  # Track if a warning has been sent to a user
-spam_warning_count = {}  # Track how many warnings a user has received
+# Running kick worker per chat during a lockdown
+raid_kick_workers: Dict[str, asyncio.Task] = {}
 
-def check_for_spam(user_id: str, current_time: int) -> bool:
-    """Check if a user is spamming based on message frequency"""
+def check_for_spam(chat_id: str, user_id: str, current_time: int) -> bool:
+    """Check if a user is spamming in a chat based on message frequency"""
+    return spam_detector.record_message(chat_id, user_id, current_time)
 
-    print(f"DEBUG: Checking spam for {user_id}. Counter before: {message_counters.get(user_id, [])}")
+def get_message_count(chat_id: str, user_id: str) -> int:
+    """Get the number of messages a user sent in a chat within the spam timeframe"""
+    return spam_detector.message_count(chat_id, user_id)
 
-    # Initialize counter for this user if not exists
-    if user_id not in message_counters:
-        message_counters[user_id] = []
-    
-    # Add current message timestamp
-    message_counters[user_id].append(current_time)
-    
-    # Remove old messages outside the timeframe
-    message_counters[user_id] = [t for t in message_counters[user_id] 
-                                if current_time - t <= SPAM_TIMEFRAME]
-
-    print(f"User {user_id} message count: {len(message_counters[user_id])} in last {SPAM_TIMEFRAME} seconds")
-    
-    return len(message_counters[user_id]) >= SPAM_THRESHOLD
-
-def get_spam_warning_count(user_id: str) -> int:
-    """Get the number of warnings a user has received"""
-    return spam_warning_count.get(user_id, 0)
+def get_spam_warning_count(chat_id: str, user_id: str) -> int:
+    """Get the number of warnings a user has received in a chat"""
+    return warning_ledger.get_warning_count(chat_id, user_id)
 
-def record_spam_warning(user_id: str, current_time: int) -> int:
+def record_spam_warning(chat_id: str, user_id: str, current_time: int) -> int:
     """
     Record a spam warning for a user and return the warning count
     
     Args:
+        chat_id (str): Chat ID
         user_id (str): User ID
         current_time (int): Current timestamp
         
     Returns:
         int: Updated warning count
     """
-    # Update warning count
-    if user_id not in spam_warning_count:
-        spam_warning_count[user_id] = 1
-    else:
-        spam_warning_count[user_id] += 1
-    
-    # Record that we've sent a warning
-    spam_warning_sent[user_id] = current_time
-    
-    return spam_warning_count[user_id]
+    return warning_ledger.record_warning(chat_id, user_id, current_time)
 
-def reset_spam_warning_count(user_id: str) -> None:
-    """Reset the spam warning count for a user"""
-    if user_id in spam_warning_count:
-        spam_warning_count[user_id] = 0
+def reset_spam_warning_count(chat_id: str, user_id: str) -> None:
+    """Reset the spam warning count for a user in a chat"""
+    warning_ledger.reset(chat_id, user_id)
 
-def should_send_spam_warning(user_id: str, current_time: int) -> bool:
+def should_send_spam_warning(chat_id: str, user_id: str, current_time: int) -> bool:
     """
     Check if we should send a spam warning to a user
     
     Args:
+        chat_id (str): Chat ID
         user_id (str): User ID
         current_time (int): Current timestamp
         
     Returns:
         bool: True if we should send a warning, False otherwise
     """
-    return (user_id not in spam_warning_sent or 
-            current_time - spam_warning_sent[user_id] > SPAM_WARNING_COOLDOWN)
+    return warning_ledger.should_send_warning(chat_id, user_id, current_time)
 
 async def handle_spam_message(update: Update, context: ContextTypes.DEFAULT_TYPE, 
                               user_id: str, chat_id: str, message_text: str, 
-                              user_name: str, current_time: int) -> None:
-    """Handle a spam message"""
-    print(f"DEBUG: Handling spam message from {user_name}. Warning count: {get_spam_warning_count(user_id)}")
-
+                              user_name: str, current_time: int, duplicate_count: int = 0) -> None:
+    """Handle a spam message (duplicate_count is set when it was flagged as a repeated payload)"""
     # Check if we should send a warning
-    if should_send_spam_warning(user_id, current_time):
-        warning_count = record_spam_warning(user_id, current_time)
+    if should_send_spam_warning(chat_id, user_id, current_time):
+        warning_count = record_spam_warning(chat_id, user_id, current_time)
 
-        warning_context = (f"[This user has sent {len(message_counters[user_id])} messages in the last "
-                          f"{SPAM_TIMEFRAME} seconds. This is warning #{warning_count}] {message_text}")
+        message_count = get_message_count(chat_id, user_id)
         
-        # Generate and send response
-        response = generate_response(chat_id, user_id, warning_context, user_name)
-        await update.message.reply_text(response)
+        # Send a template warning right away, the LLM never sits on the moderation path
+        warning = spam_warning_engine.render(user_name, warning_count, message_count, duplicate=duplicate_count > 0)
+        sent_message = await update.message.reply_text(warning)
         
         print(f"Spam warning #{warning_count} sent to {user_name}")
         
+        # If the LLM is idle, let Anna rewrite the warning in her own words afterwards
+        if llm_scheduler.has_capacity() and not raid_detector.in_lockdown(chat_id):
+            if duplicate_count:
+                warning_context = (f"[This text has been posted {duplicate_count} times in this chat. "
+                                  f"This is warning #{warning_count}] {message_text}")
+            else:
+                warning_context = (f"[This user has sent {message_count} messages in the last "
+                                  f"{SPAM_TIMEFRAME} seconds. This is warning #{warning_count}] {message_text}")
+            context.application.create_task(
+                flavor_spam_warning(sent_message, chat_id, user_id, warning_context, user_name)
+            )
+        
         # Auto-kick ONLY if this is the third or greater warning
         if warning_count >= AUTO_KICK_THRESHOLD:
-            await attempt_auto_kick(update, context, user_id, user_name)
+            await attempt_auto_kick(update, context, chat_id, user_id, user_name)
+
+async def flavor_spam_warning(sent_message, chat_id: str, user_id: str,
+                              warning_context: str, user_name: str) -> None:
+    """Replace a sent template warning with an LLM-written one, if one arrives in time"""
+    try:
+        response = await llm_scheduler.submit(Priority.SPAM_WARNING, chat_id, user_id, warning_context, user_name)
+        if response:
+            await sent_message.edit_text(response)
+    except Exception as e:
+        print(f"Could not flavor spam warning: {e}")
 
 async def attempt_auto_kick(update: Update, context: ContextTypes.DEFAULT_TYPE, 
-                           user_id: str, user_name: str) -> None:
+                           chat_id: str, user_id: str, user_name: str) -> None:
     """Attempt to auto-kick a user who has received too many spam warnings"""
-    warning_count = get_spam_warning_count(user_id)
+    warning_count = get_spam_warning_count(chat_id, user_id)
     
     # STRICT CHECK - only proceed if warning count is at least the threshold
     if warning_count < AUTO_KICK_THRESHOLD:
@@ -116,17 +119,14 @@ async def attempt_auto_kick(update: Update, context: ContextTypes.DEFAULT_TYPE,
     print(f"DEBUG: Proceeding with auto-kick for {user_name} - warning count {warning_count} meets threshold {AUTO_KICK_THRESHOLD}")
 
     # Double-check that user has enough warnings before attempting to kick
-    warning_count = get_spam_warning_count(user_id)
+    warning_count = get_spam_warning_count(chat_id, user_id)
     if warning_count < AUTO_KICK_THRESHOLD:
         print(f"Warning: Attempted to kick {user_name} but warning count is only {warning_count}")
         return
 
     try:
         # Check if bot is admin
-        chat_admins = await context.bot.get_chat_administrators(update.effective_chat.id)
-        bot_me = await context.bot.get_me()
-        
-        bot_is_admin = any(admin.user.id == bot_me.id for admin in chat_admins)
+        bot_is_admin = await admin_cache.bot_is_admin(context.bot, update.effective_chat.id)
         
         if bot_is_admin:
             # Generate kick message using lyrics
@@ -143,7 +143,7 @@ async def attempt_auto_kick(update: Update, context: ContextTypes.DEFAULT_TYPE,
                 only_if_banned=True
             )
             
-            reset_spam_warning_count(user_id)
+            reset_spam_warning_count(chat_id, user_id)
             await update.message.reply_text(kick_message)
             print(f"Auto-kicked user {user_name} for excessive spam")
         else:
@@ -154,4 +154,120 @@ async def attempt_auto_kick(update: Update, context: ContextTypes.DEFAULT_TYPE,
         print(f"Failed to kick user: {str(e)}")
         await update.message.reply_text(
             f"försökte kicka {user_name} men något gick fel: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+async def sweep_spam_state(context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Evict spam state for senders that have gone idle and warnings that have faded"""
+    now = time.time()
+    evicted = spam_detector.sweep(now)
+    if evicted:
+        print(f"Evicted spam state for {evicted} idle senders ({len(spam_detector)} active)")
+    forgotten = warning_ledger.sweep(now)
+    if forgotten:
+        print(f"Forgot faded spam warnings for {forgotten} users ({len(warning_ledger.records)} remaining)")
+
+async def track_chat_member_updates(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Keep the admin cache fresh and feed joins to the raid detector"""
+    member_update = update.chat_member or update.my_chat_member
+    if not member_update:
+        return
+    
+    old_status = member_update.old_chat_member.status
+    new_status = member_update.new_chat_member.status
+    admin_cache.handle_member_change(member_update.chat.id, old_status, new_status)
+    
+    # Someone joined the chat
+    if (update.chat_member and old_status in (ChatMember.LEFT, ChatMember.BANNED) and
+            new_status in (ChatMember.MEMBER, ChatMember.RESTRICTED)):
+        chat_id = str(member_update.chat.id)
+        user_id = str(member_update.new_chat_member.user.id)
+        
+        if raid_detector.record_join(chat_id, user_id, time.time()):
+            await announce_lockdown(context, chat_id)
+        if raid_detector.in_lockdown(chat_id):
+            queue_raid_kick(context, chat_id, user_id)
+
+async def check_for_raid(update: Update, context: ContextTypes.DEFAULT_TYPE,
+                         chat_id: str, user_id: str, current_time: float) -> bool:
+    """
+    Feed a message to the raid detector
+    
+    Returns:
+        bool: True if the chat is in lockdown and the sender was queued for removal
+    """
+    # Only members who joined recently count, so regulars are never swept up in a lockdown
+    is_new = raid_detector.is_new_user(chat_id, user_id, current_time)
+    if raid_detector.record_message(chat_id, is_new, current_time):
+        await announce_lockdown(context, chat_id)
+    
+    if is_new and raid_detector.in_lockdown(chat_id):
+        queue_raid_kick(context, chat_id, user_id)
+        return True
+    return False
+
+async def announce_lockdown(context: ContextTypes.DEFAULT_TYPE, chat_id: str) -> None:
+    print(f"Raid detected in chat {chat_id}, entering lockdown: {raid_detector.rates(chat_id, time.time())}")
+    try:
+        await context.bot.send_message(
+            chat_id,
+            "🚨 raid! jag låser kanalen en stund och kickar nya konton som spammar. inga pratstunder med mig förrän det lugnat sig."
+        )
+    except Exception as e:
+        print(f"Could not announce lockdown: {e}")
+
+def queue_raid_kick(context: ContextTypes.DEFAULT_TYPE, chat_id: str, user_id: str) -> None:
+    """Queue a user for removal and make sure the chat's kick worker is running"""
+    # Without admin rights there is no point queueing (or restarting the worker) until the next lockdown
+    if not raid_detector.can_kick(chat_id):
+        return
+    if not raid_detector.queue_kick(chat_id, user_id):
+        return
+    worker = raid_kick_workers.get(chat_id)
+    if worker is None or worker.done():
+        raid_kick_workers[chat_id] = context.application.create_task(raid_kick_worker(context.bot, chat_id))
+
+async def raid_kick_worker(bot: Bot, chat_id: str) -> None:
+    """Kick queued users in small batches, pausing between batches to stay under rate limits"""
+    kicked = 0
+    try:
+        if not await admin_cache.bot_is_admin(bot, int(chat_id)):
+            if raid_detector.mark_cannot_kick(chat_id):
+                await bot.send_message(chat_id, "jag skulle kicka raiders men jag har inte admin-rättigheter. någon admin får ta det!")
+            return
+        
+        while True:
+            batch = raid_detector.next_kick_batch(chat_id, RAID_KICK_BATCH)
+            if not batch:
+                break
+            
+            admin_ids = await admin_cache.get_admin_ids(bot, int(chat_id))
+            for user_id in batch:
+                if int(user_id) in admin_ids or int(user_id) == bot.id:
+                    continue
+                try:
+                    await bot.ban_chat_member(chat_id, int(user_id))
+                    # Immediately unban so they can rejoin once the raid is over
+                    await bot.unban_chat_member(chat_id, int(user_id), only_if_banned=True)
+                    kicked += 1
+                except Exception as e:
+                    print(f"Failed to kick raider {user_id}: {e}")
+            
+            await asyncio.sleep(RAID_KICK_INTERVAL)
+        
+        if kicked:
+            await bot.send_message(chat_id, f"{lyrics_service.get_kick_line()} {kicked} raid-konton åkte ut 🎵")
+    except Exception as e:
+        print(f"Error in raid kick worker: {e}")
+    finally:
+        print(f"Raid kick worker for chat {chat_id} done, kicked {kicked}")
+
+async def check_raid_lockdowns(context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Lift lockdowns in chats where the raid has died down"""
+    now = time.time()
+    for chat_id in raid_detector.locked_chats():
+        if raid_detector.try_release(chat_id, now):
+            print(f"Lockdown lifted in chat {chat_id}")
+            try:
+                await context.bot.send_message(chat_id, "lugnt igen! lockdown över, nu kan vi prata som vanligt ✨")
+            except Exception as e:
+                print(f"Could not announce end of lockdown: {e}")
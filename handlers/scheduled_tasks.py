@@ -1,14 +1,17 @@
 from telegram.ext import ContextTypes
-from services.nlp_service import save_chat_histories
+from data.persistence import persistence_manager
+from handlers.moderation import sweep_spam_state, check_raid_lockdowns
+from config.constants import PERSIST_FLUSH_INTERVAL, SPAM_SWEEP_INTERVAL, RAID_CHECK_INTERVAL
 
 async def save_data(context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Regularly save chat histories"""
-    save_chat_histories()
-    print("Chat histories saved")
+    """Regularly flush changed data"""
+    await persistence_manager.flush()
 
 def schedule_tasks(bot):
     """Schedule periodic tasks"""
     job_queue = bot.job_queue
-    job_queue.run_repeating(save_data, interval=3600)  # every hour
+    job_queue.run_repeating(save_data, interval=PERSIST_FLUSH_INTERVAL)
+    job_queue.run_repeating(sweep_spam_state, interval=SPAM_SWEEP_INTERVAL)
+    job_queue.run_repeating(check_raid_lockdowns, interval=RAID_CHECK_INTERVAL)
     
-    return bot
\ No newline at end of file
+    return bot
@@ -1,9 +1,10 @@
-import os, requests
+import os
 from telegram import Update
 from telegram.ext import ContextTypes
 
 from services.soundcloud_service import soundcloud_service
 from services.soundcloud_oauth_handler import SoundCloudOAuthHandler
+from utils.http_client import http_client
 
 async def soundcloud_setup(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Setup SoundCloud authentication"""
@@ -11,7 +12,7 @@ async def soundcloud_setup(update: Update, context: ContextTypes.DEFAULT_TYPE) -
     
     # First try client credentials (doesn't need user auth)
     print("Attempting SoundCloud Client Credentials authentication...")
-    token = oauth_handler.get_client_credentials_token()
+    token = await oauth_handler.get_client_credentials_token()
     
     if token:
         await update.message.reply_text(
@@ -50,7 +51,7 @@ async def soundcloud_auth(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     
     await update.message.reply_text("Exchanging authorization code for access token...")
     
-    token = oauth_handler.exchange_code_for_token(auth_code)
+    token = await oauth_handler.exchange_code_for_token(auth_code)
     
     if token:
         await update.message.reply_text(
@@ -83,9 +84,10 @@ async def soundcloud_status(update: Update, context: ContextTypes.DEFAULT_TYPE)
     else:
         status_message += f"Client Secret: Missing\n"
     
+    token_valid = bool(saved_token) and await oauth_handler.test_token(saved_token)
     if saved_token:
         # Test the token
-        if oauth_handler.test_token(saved_token):
+        if token_valid:
             status_message += f"Access Token: Valid\n"
         else:
             status_message += f"Access Token: Invalid/Expired\n"
@@ -98,7 +100,7 @@ async def soundcloud_status(update: Update, context: ContextTypes.DEFAULT_TYPE)
     
     if not client_id or not client_secret:
         status_message += "\nRun /sc_setup to configure authentication"
-    elif not saved_token or not oauth_handler.test_token(saved_token):
+    elif not token_valid:
         status_message += "\nRun /sc_setup to get access token"
     
     await update.message.reply_text(status_message)
@@ -117,7 +119,7 @@ async def soundcloud_track(update: Update, context: ContextTypes.DEFAULT_TYPE) -
     
     await update.message.reply_text(f"Adding {username} to SoundCloud tracking...")
     
-    success = soundcloud_service.add_user_to_track(username, display_name)
+    success = await soundcloud_service.add_user_to_track(username, display_name)
     
     if success:
         display = display_name or username
@@ -168,7 +170,7 @@ async def soundcloud_check(update: Update, context: ContextTypes.DEFAULT_TYPE) -
     """Manually check for new SoundCloud tracks"""
     await update.message.reply_text("Checking for new SoundCloud tracks...")
     
-    new_tracks = soundcloud_service.check_for_new_tracks()
+    new_tracks = await soundcloud_service.check_for_new_tracks()
     
     if not new_tracks:
         await update.message.reply_text("No new tracks found from tracked users.")
@@ -232,7 +234,7 @@ async def soundcloud_track_bulk(update: Update, context: ContextTypes.DEFAULT_TY
                 await update.message.reply_text(progress_msg)
             
             # Try to add the user
-            success = soundcloud_service.add_user_to_track(username)
+            success = await soundcloud_service.add_user_to_track(username)
             
             if success:
                 successful.append(username)
@@ -308,7 +310,7 @@ async def soundcloud_debug(update: Update, context: ContextTypes.DEFAULT_TYPE) -
     
     for endpoint in test_endpoints:
         try:
-            response = requests.get(endpoint, params={'client_id': oauth_handler.client_id} if oauth_handler.client_id else {})
+            response = await http_client.get(endpoint, params={'client_id': oauth_handler.client_id} if oauth_handler.client_id else {})
             status = f"{response.status_code}" if response.status_code == 200 else f"{response.status_code}"
             debug_info.append(f"{endpoint}: {status}")
         except Exception as e:
@@ -355,7 +357,7 @@ async def soundcloud_set_my_account(update: Update, context: ContextTypes.DEFAUL
     username = context.args[0]
     await update.message.reply_text(f"Setting {username} as your account...")
 
-    success = soundcloud_service.set_my_account(username)
+    success = await soundcloud_service.set_my_account(username)
 
     if success:
         await update.message.reply_text(
@@ -379,7 +381,7 @@ async def soundcloud_my_stats(update: Update, context: ContextTypes.DEFAULT_TYPE
 
     await update.message.reply_text(f"Fetching stats for {my_account['display_name']}...")
 
-    changes = soundcloud_service.get_stats_changes()
+    changes = await soundcloud_service.get_stats_changes()
     if changes:
         message = soundcloud_service.format_stats_update(changes)
         await update.message.reply_text(message)
@@ -396,7 +398,7 @@ async def soundcloud_refresh(update: Update, context: ContextTypes.DEFAULT_TYPE)
         oauth_handler = SoundCloudOAuthHandler()
         
         # Try to get a new token
-        new_token = oauth_handler.get_client_credentials_token()
+        new_token = await oauth_handler.get_client_credentials_token()
         
         if new_token:
             # Update the service with the new token
@@ -431,7 +433,7 @@ async def soundcloud_retry_failed(update: Update, context: ContextTypes.DEFAULT_
     try:
         from services.soundcloud_oauth_handler import SoundCloudOAuthHandler
         oauth_handler = SoundCloudOAuthHandler()
-        new_token = oauth_handler.get_client_credentials_token()
+        new_token = await oauth_handler.get_client_credentials_token()
         
         if new_token:
             from services.soundcloud_service import soundcloud_service
@@ -456,7 +458,7 @@ async def soundcloud_retry_failed(update: Update, context: ContextTypes.DEFAULT_
     
     for username in usernames:
         try:
-            success = soundcloud_service.add_user_to_track(username)
+            success = await soundcloud_service.add_user_to_track(username)
             if success:
                 successful.append(username)
             else:
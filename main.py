@@ -1,16 +1,15 @@
 import logging
 import os
-import atexit
 import sys
 from utils.env_utils import validate_required_vars
-from telegram.ext import ApplicationBuilder, CommandHandler, MessageHandler, filters
+from telegram.ext import ApplicationBuilder, ChatMemberHandler, CommandHandler, MessageHandler, filters
 from handlers.command_handlers import register_command_handlers
 from handlers.message_handlers import handle_message
+from handlers.moderation import track_chat_member_updates
 from handlers.scheduled_tasks import schedule_tasks
 from services.scheduler_service import scheduler_service
-from services.nlp_service import save_chat_histories
-from services.reputation_service import reputation_service
-from services.user_service import user_service
+from data.persistence import persistence_manager
+from utils.http_client import http_client
 
 logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
@@ -19,21 +18,16 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
-def cleanup_on_exit():
+async def flush_on_shutdown(application) -> None:
+    """Final flush of all changed data once the bot has stopped"""
     try:
-        save_chat_histories()
-        logger.info("Chat histories saved")
-
-        reputation_service._save_reputation()
-        logger.info("Reputation data saved")
-
-        user_service._save_users()
-        logger.info("User data saved")
-
+        await persistence_manager.flush()
+        logger.info("All data saved")
         print("All data saved successfully!")
     except Exception as e:
         logger.error(f"Error saving data during shutdown: {e}")
         print(f"Error saving data: {e}")
+    await http_client.aclose()
 
 def validate_environment():
     try:
@@ -81,8 +75,6 @@ def check_configuration_files():
     return True
 
 def main():
-    atexit.register(cleanup_on_exit)
-
     if not validate_environment():
         sys.exit(1)
 
@@ -98,13 +90,14 @@ def main():
 
     try:
         logger.info("Building app...")
-        bot = ApplicationBuilder().token(TOKEN).build()
+        bot = ApplicationBuilder().token(TOKEN).concurrent_updates(True).post_shutdown(flush_on_shutdown).build()
 
         logger.info("Registering command handlers...")
         register_command_handlers(bot)
 
         logger.info("Registering message handlers...")
         bot.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
+        bot.add_handler(ChatMemberHandler(track_chat_member_updates, ChatMemberHandler.ANY_CHAT_MEMBER))
 
         logger.info("Setting up scheduled tasks...")
         schedule_tasks(bot)
@@ -116,7 +109,8 @@ def main():
         print("[+] Bot is now active and ready to receive messages!")
 
         bot.run_polling(
-            allowed_updates=['message', 'edited_message', 'channel_post', 'edited_channel_post'],
+            allowed_updates=['message', 'edited_message', 'channel_post', 'edited_channel_post',
+                             'chat_member', 'my_chat_member'],
             drop_pending_updates=True  # Ignore old messages on startup
         )
 
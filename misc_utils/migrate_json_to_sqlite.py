@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""
+One-shot migration of the JSON data files (users, reputation, chat lists,
+SoundCloud tracking) into the SQLite storage backend.
+Run from the project root: python misc_utils/migrate_json_to_sqlite.py [path/to/anna.db]
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.storage import DATA_DIR, SQLiteBackend, migrate_json_to_sqlite
+
+def main():
+    db_path = sys.argv[1] if len(sys.argv) > 1 else os.getenv('STORAGE_PATH', os.path.join(DATA_DIR, 'anna.db'))
+
+    print(f"Migrating JSON files from {DATA_DIR} into {db_path}")
+    backend = SQLiteBackend(db_path)
+    migrated = migrate_json_to_sqlite(backend)
+    backend.close()
+
+    for namespace, count in migrated.items():
+        print(f"  {namespace}: {count} rows")
+    print("Done! Set STORAGE_BACKEND=sqlite (the default) to use the database.")
+
+if __name__ == "__main__":
+    main()
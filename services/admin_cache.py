@@ -0,0 +1,59 @@
+import asyncio
+import time
+from typing import Dict, FrozenSet, Tuple
+from telegram import Bot, ChatMember
+from config.constants import ADMIN_CACHE_TTL
+
+ADMIN_STATUSES = (ChatMember.ADMINISTRATOR, ChatMember.OWNER)
+
+class AdminCache:
+    """
+    Administrator IDs per chat, cached for a TTL. Chat member updates that
+    promote or demote someone invalidate the chat's entry straight away.
+    """
+
+    def __init__(self, ttl: float = ADMIN_CACHE_TTL):
+        self.ttl = ttl
+        self.entries: Dict[int, Tuple[float, FrozenSet[int]]] = {}
+        self._locks: Dict[int, asyncio.Lock] = {}
+        self.stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+    async def get_admin_ids(self, bot: Bot, chat_id: int) -> FrozenSet[int]:
+        """Get the administrator user IDs of a chat, fetching them if the cache is stale"""
+        entry = self.entries.get(chat_id)
+        if entry and time.monotonic() < entry[0]:
+            self.stats['hits'] += 1
+            return entry[1]
+
+        # Concurrent lookups for the same chat share one API call
+        lock = self._locks.setdefault(chat_id, asyncio.Lock())
+        async with lock:
+            entry = self.entries.get(chat_id)
+            if entry and time.monotonic() < entry[0]:
+                self.stats['hits'] += 1
+                return entry[1]
+
+            self.stats['misses'] += 1
+            admins = await bot.get_chat_administrators(chat_id)
+            admin_ids = frozenset(admin.user.id for admin in admins)
+            self.entries[chat_id] = (time.monotonic() + self.ttl, admin_ids)
+            return admin_ids
+
+    async def is_admin(self, bot: Bot, chat_id: int, user_id: int) -> bool:
+        return user_id in await self.get_admin_ids(bot, chat_id)
+
+    async def bot_is_admin(self, bot: Bot, chat_id: int) -> bool:
+        """Check if the bot itself is an admin (bot.id is resolved once at startup)"""
+        return await self.is_admin(bot, chat_id, bot.id)
+
+    def invalidate(self, chat_id: int) -> None:
+        if self.entries.pop(chat_id, None) is not None:
+            self.stats['invalidations'] += 1
+
+    def handle_member_change(self, chat_id: int, old_status: str, new_status: str) -> None:
+        """Invalidate a chat when a member gains or loses admin rights"""
+        if old_status in ADMIN_STATUSES or new_status in ADMIN_STATUSES:
+            self.invalidate(chat_id)
+
+# Singleton instance
+admin_cache = AdminCache()
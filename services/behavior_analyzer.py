@@ -1,6 +1,20 @@
 import re
 from datetime import datetime, timedelta
+from typing import Dict
 from services.reputation_service import reputation_service
+from services.message_features import MessageFeatures, extract_features, register_keywords
+
+class TraitDeltas:
+    """Trait changes gathered for one message, so its reputation update is applied (and counted) once"""
+    __slots__ = ('deltas', 'reasons')
+    
+    def __init__(self):
+        self.deltas: Dict[str, float] = {}
+        self.reasons: Dict[str, str] = {}
+    
+    def add(self, trait: str, change: float, reason: str):
+        self.deltas[trait] = self.deltas.get(trait, 0) + change
+        self.reasons[trait] = f"{self.reasons[trait]}, {reason}" if trait in self.reasons else reason
 
 class BehaviorAnalyzer:
     """Analyzes user messages and updates reputation accordingly"""
@@ -11,65 +25,84 @@ class BehaviorAnalyzer:
         self.rudeness_words = ['stupid', 'dum', 'idiot', 'fan', 'skit', 'bög']
         self.humor_indicators = ['😂', '🤣', 'lol', 'haha', 'lmao', 'rofl']
         self.question_patterns = ['?', 'hur', 'vad', 'när', 'varför', 'how', 'what', 'when', 'why']
+        
+        register_keywords('politeness', self.politeness_words)
+        register_keywords('rudeness', self.rudeness_words)
+        register_keywords('humor', self.humor_indicators)
+        register_keywords('question_pattern', self.question_patterns)
     
-    def analyze_message(self, user_id: str, message: str, context: dict = None):
-        """Analyze a message and update reputation"""
+    def analyze_message(self, message: str, context: dict = None,
+                        features: MessageFeatures = None) -> TraitDeltas:
+        """Analyze a message; the returned changes are applied with apply() once the message is handled"""
         context = context or {}
+        features = features or extract_features(message)
+        deltas = TraitDeltas()
         
         # Basic engagement
-        reputation_service.update_trait(user_id, 'engagement', 0.1, 'Sent message')
+        deltas.add('engagement', 0.1, 'Sent message')
         
         # Analyze politeness
-        polite_words = sum(1 for word in self.politeness_words if word in message.lower())
-        rude_words = sum(1 for word in self.rudeness_words if word in message.lower())
+        polite_words = features.count('politeness')
+        rude_words = features.count('rudeness')
         
         if polite_words > 0:
-            reputation_service.update_trait(user_id, 'politeness', polite_words * 0.5, 'Used polite language')
+            deltas.add('politeness', polite_words * 0.5, 'Used polite language')
         if rude_words > 0:
-            reputation_service.update_trait(user_id, 'politeness', -rude_words * 1.0, 'Used rude language')
-            reputation_service.update_trait(user_id, 'respect', -rude_words * 0.5, 'Disrespectful language')
+            deltas.add('politeness', -rude_words * 1.0, 'Used rude language')
+            deltas.add('respect', -rude_words * 0.5, 'Disrespectful language')
         
         # Analyze humor
-        humor_score = sum(1 for indicator in self.humor_indicators if indicator in message)
+        humor_score = features.count('humor')
         if humor_score > 0:
-            reputation_service.update_trait(user_id, 'humor', humor_score * 0.3, 'Showed humor')
+            deltas.add('humor', humor_score * 0.3, 'Showed humor')
         
         # Check if asking questions (shows engagement)
-        if any(pattern in message.lower() for pattern in self.question_patterns):
-            reputation_service.update_trait(user_id, 'engagement', 0.2, 'Asked question')
+        if features.has('question_pattern'):
+            deltas.add('engagement', 0.2, 'Asked question')
         
         # Check message length (spam detection)
-        if len(message) > 200:
-            reputation_service.update_trait(user_id, 'spam_tendency', 0.3, 'Very long message')
-        elif len(message) < 5:
-            reputation_service.update_trait(user_id, 'spam_tendency', 0.1, 'Very short message')
+        if features.length > 200:
+            deltas.add('spam_tendency', 0.3, 'Very long message')
+        elif features.length < 5:
+            deltas.add('spam_tendency', 0.1, 'Very short message')
         
         # Check for caps (shouting)
-        caps_ratio = sum(1 for c in message if c.isupper()) / max(len(message), 1)
-        if caps_ratio > 0.5 and len(message) > 10:
-            reputation_service.update_trait(user_id, 'chaos_factor', 0.5, 'Excessive caps')
-            reputation_service.update_trait(user_id, 'politeness', -0.3, 'Shouting')
+        if features.caps_ratio > 0.5 and features.length > 10:
+            deltas.add('chaos_factor', 0.5, 'Excessive caps')
+            deltas.add('politeness', -0.3, 'Shouting')
+        
+        return deltas
     
-    def analyze_spam_behavior(self, user_id: str, message_count: int, timeframe_seconds: int):
-        """Analyze spam behavior"""
+    def analyze_spam_behavior(self, deltas: TraitDeltas, message_count: int, timeframe_seconds: int,
+                              duplicate_count: int = 0):
+        """Analyze spam behavior (message rate and repeated payloads)"""
         if message_count >= 5 and timeframe_seconds <= 30:
             spam_score = (message_count - 4) * 0.8
-            reputation_service.update_trait(user_id, 'spam_tendency', spam_score, f'Sent {message_count} messages in {timeframe_seconds}s')
-            reputation_service.update_trait(user_id, 'respect', -spam_score * 0.3, 'Spamming behavior')
+            deltas.add('spam_tendency', spam_score, f'Sent {message_count} messages in {timeframe_seconds}s')
+            deltas.add('respect', -spam_score * 0.3, 'Spamming behavior')
+        
+        if duplicate_count >= 3:
+            spam_score = (duplicate_count - 2) * 0.6
+            deltas.add('spam_tendency', spam_score, f'Posted the same text {duplicate_count} times')
+            deltas.add('respect', -spam_score * 0.3, 'Spamming behavior')
     
-    def analyze_response_to_anna(self, user_id: str, message: str, was_positive: bool):
+    def analyze_response_to_anna(self, deltas: TraitDeltas, message: str, was_positive: bool):
         """Analyze how user responds to Anna"""
         if was_positive:
-            reputation_service.update_trait(user_id, 'respect', 0.5, 'Positive response to Anna')
-            reputation_service.update_trait(user_id, 'engagement', 0.3, 'Engaged positively')
+            deltas.add('respect', 0.5, 'Positive response to Anna')
+            deltas.add('engagement', 0.3, 'Engaged positively')
         else:
-            reputation_service.update_trait(user_id, 'respect', -0.3, 'Negative response to Anna')
+            deltas.add('respect', -0.3, 'Negative response to Anna')
     
-    def analyze_helpfulness(self, user_id: str, helped_someone: bool):
+    def analyze_helpfulness(self, deltas: TraitDeltas, helped_someone: bool):
         """Track when users help others"""
         if helped_someone:
-            reputation_service.update_trait(user_id, 'helpfulness', 1.0, 'Helped another user')
-            reputation_service.update_trait(user_id, 'respect', 0.2, 'Showed community spirit')
+            deltas.add('helpfulness', 1.0, 'Helped another user')
+            deltas.add('respect', 0.2, 'Showed community spirit')
+    
+    def apply(self, user_id: str, deltas: TraitDeltas):
+        """Apply everything gathered for a message as a single reputation update"""
+        reputation_service.apply_trait_deltas(user_id, deltas.deltas, deltas.reasons)
 
 # Singleton instance
 behavior_analyzer = BehaviorAnalyzer()
\ No newline at end of file
@@ -0,0 +1,155 @@
+import hashlib
+import re
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set
+from config.constants import (
+    DUPLICATE_THRESHOLD, DUPLICATE_WINDOW, DUPLICATE_MAX_DISTANCE,
+    DUPLICATE_MIN_LENGTH, DUPLICATE_LRU_SIZE
+)
+
+FINGERPRINT_BITS = 64
+BANDS = 4  # Two fingerprints within 3 bits of each other share at least one 16-bit band
+BAND_BITS = FINGERPRINT_BITS // BANDS
+BAND_MASK = (1 << BAND_BITS) - 1
+
+NON_WORD_PATTERN = re.compile(r'[^\w\s]+')
+
+def normalize(text: str) -> List[str]:
+    """Lowercase, drop punctuation and emoji, and split into words"""
+    return NON_WORD_PATTERN.sub(' ', text.lower()).split()
+
+def _shingles(tokens: List[str]) -> List[str]:
+    # Word pairs for normal text, character trigrams when there are too few words
+    if len(tokens) >= 3:
+        return [f'{a} {b}' for a, b in zip(tokens, tokens[1:])]
+    joined = ' '.join(tokens)
+    return [joined[i:i + 3] for i in range(max(len(joined) - 2, 1))]
+
+def simhash(tokens: List[str]) -> int:
+    """64-bit SimHash of a token list; similar texts get fingerprints a few bits apart"""
+    weights = [0] * FINGERPRINT_BITS
+    for shingle in _shingles(tokens):
+        h = int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'big')
+        for bit in range(FINGERPRINT_BITS):
+            weights[bit] += 1 if (h >> bit) & 1 else -1
+
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+def _bands(fingerprint: int) -> List[int]:
+    return [(fingerprint >> (i * BAND_BITS)) & BAND_MASK for i in range(BANDS)]
+
+class FingerprintEntry:
+    """A recently seen payload and who has posted it"""
+    __slots__ = ('fingerprint', 'count', 'users', 'first_seen')
+
+    def __init__(self, fingerprint: int, now: float):
+        self.fingerprint = fingerprint
+        self.count = 0
+        self.users: Set[str] = set()
+        self.first_seen = now
+
+class ChatFingerprints:
+    """Bounded LRU of recent fingerprints in one chat, indexed by band for near-match lookup"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.entries: 'OrderedDict[int, FingerprintEntry]' = OrderedDict()
+        self.band_index: List[Dict[int, Set[int]]] = [{} for _ in range(BANDS)]
+
+    def find(self, fingerprint: int, max_distance: int) -> Optional[FingerprintEntry]:
+        """Find a stored fingerprint within max_distance bits"""
+        entry = self.entries.get(fingerprint)
+        if entry:
+            return entry
+
+        for i, band in enumerate(_bands(fingerprint)):
+            for candidate in self.band_index[i].get(band, ()):
+                if bin(candidate ^ fingerprint).count('1') <= max_distance:
+                    return self.entries[candidate]
+        return None
+
+    def add(self, fingerprint: int, now: float) -> FingerprintEntry:
+        entry = self.entries[fingerprint] = FingerprintEntry(fingerprint, now)
+        for i, band in enumerate(_bands(fingerprint)):
+            self.band_index[i].setdefault(band, set()).add(fingerprint)
+
+        if len(self.entries) > self.max_size:
+            self._remove(next(iter(self.entries)))
+        return entry
+
+    def touch(self, entry: FingerprintEntry) -> None:
+        self.entries.move_to_end(entry.fingerprint)
+
+    def _remove(self, fingerprint: int) -> None:
+        del self.entries[fingerprint]
+        for i, band in enumerate(_bands(fingerprint)):
+            bucket = self.band_index[i][band]
+            bucket.discard(fingerprint)
+            if not bucket:
+                del self.band_index[i][band]
+
+class DuplicateMatch:
+    """Result of a flagged message: how often the payload was seen and by how many users"""
+    __slots__ = ('count', 'distinct_users')
+
+    def __init__(self, count: int, distinct_users: int):
+        self.count = count
+        self.distinct_users = distinct_users
+
+class DuplicateDetector:
+    """
+    Flags the same or nearly the same text posted repeatedly in a chat, whether
+    by one user pasting it slowly or by several users copy-pasting it.
+    Each message costs one SimHash plus a few band lookups, independent of history size.
+    """
+
+    def __init__(self, threshold: int = DUPLICATE_THRESHOLD, window: float = DUPLICATE_WINDOW,
+                 max_distance: int = DUPLICATE_MAX_DISTANCE, min_length: int = DUPLICATE_MIN_LENGTH,
+                 lru_size: int = DUPLICATE_LRU_SIZE):
+        self.threshold = threshold
+        self.window = window
+        self.max_distance = max_distance
+        self.min_length = min_length
+        self.lru_size = lru_size
+        self.chats: Dict[str, ChatFingerprints] = {}
+
+    def check(self, chat_id: str, user_id: str, text: str, now: float) -> Optional[DuplicateMatch]:
+        """
+        Record a message and check if its payload is being flooded
+
+        Returns:
+            Optional[DuplicateMatch]: The match if the payload reached the threshold, else None
+        """
+        tokens = normalize(text)
+        if sum(len(token) for token in tokens) + len(tokens) - 1 < self.min_length:
+            return None
+
+        fingerprint = simhash(tokens)
+        chat = self.chats.get(chat_id)
+        if chat is None:
+            chat = self.chats[chat_id] = ChatFingerprints(self.lru_size)
+
+        entry = chat.find(fingerprint, self.max_distance)
+        if entry is None:
+            entry = chat.add(fingerprint, now)
+        else:
+            chat.touch(entry)
+            if now - entry.first_seen > self.window:
+                # Old copies don't count anymore, start over
+                entry.count = 0
+                entry.users = set()
+                entry.first_seen = now
+
+        entry.count += 1
+        entry.users.add(user_id)
+
+        if entry.count >= self.threshold:
+            return DuplicateMatch(entry.count, len(entry.users))
+        return None
+
+# Singleton instance
+duplicate_detector = DuplicateDetector()
@@ -0,0 +1,132 @@
+import asyncio
+import itertools
+import time
+from enum import IntEnum
+from typing import Dict, Optional
+
+from config.constants import LLM_MAX_CONCURRENCY, LLM_QUEUE_MAX_DEPTH, LLM_QUEUE_MAX_LATENCY
+from services.nlp_service import generate_response
+from services.message_features import MessageFeatures
+
+class Priority(IntEnum):
+    """Priority of an LLM request, lower values are served first"""
+    MENTION = 0       # Bot mentioned by name or /chat
+    QUESTION = 1      # Direct question without a mention
+    SPAM_WARNING = 2  # Warning text for a spammer
+    RANDOM = 3        # Unsolicited random comment
+
+class LLMScheduler:
+    """
+    Central queue for all LLM requests.
+
+    Requests are served in priority order by a fixed pool of workers. When the
+    queue gets too deep or too slow, random replies are dropped up front and
+    spam warnings that have waited longer than the latency budget are dropped
+    when they reach a worker, so mentions keep a flat latency under load.
+    """
+
+    def __init__(self, workers: int = LLM_MAX_CONCURRENCY,
+                 max_depth: int = LLM_QUEUE_MAX_DEPTH,
+                 max_latency: float = LLM_QUEUE_MAX_LATENCY):
+        self.workers = workers
+        self.max_depth = max_depth
+        self.max_latency = max_latency
+
+        # Created lazily so they bind to the running event loop
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._worker_tasks = []
+        self._sequence = itertools.count()
+        self._busy = 0  # Workers currently waiting on a completion
+
+        # Moving average of how long a completion takes, used to estimate queue wait
+        self.avg_service_time = 2.0
+        self.stats = {'submitted': 0, 'completed': 0, 'shed': 0, 'expired': 0}
+
+    def _ensure_workers(self) -> None:
+        """Start the worker pool on first use"""
+        if self._queue is None:
+            self._queue = asyncio.PriorityQueue()
+        if not self._worker_tasks:
+            self._worker_tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    def queue_depth(self) -> int:
+        """Number of requests waiting for a worker"""
+        return self._queue.qsize() if self._queue else 0
+
+    def estimated_wait(self) -> float:
+        """Estimated seconds a newly queued request waits before a worker picks it up"""
+        return self.queue_depth() * self.avg_service_time / max(self.workers, 1)
+
+    def has_capacity(self) -> bool:
+        """Check if a worker is free right now, i.e. optional work wouldn't delay anything"""
+        return self._busy + self.queue_depth() < self.workers
+
+    def is_overloaded(self) -> bool:
+        """Check if the queue is above the configured depth or latency budget"""
+        return self.queue_depth() >= self.max_depth or self.estimated_wait() >= self.max_latency
+
+    async def submit(self, priority: Priority, chat_id: str, user_id: str,
+                     message_text: str, user_name: str,
+                     features: Optional[MessageFeatures] = None) -> Optional[str]:
+        """
+        Queue a response request and wait for the reply
+
+        Returns:
+            Optional[str]: The generated reply, or None if the request was shed
+        """
+        self._ensure_workers()
+        self.stats['submitted'] += 1
+
+        if priority >= Priority.RANDOM and self.is_overloaded():
+            self.stats['shed'] += 1
+            return None
+
+        future = asyncio.get_running_loop().create_future()
+        request = (chat_id, user_id, message_text, user_name, features)
+        await self._queue.put((priority, next(self._sequence), time.monotonic(), future, request))
+        return await future
+
+    async def _worker(self) -> None:
+        """Serve queued requests in priority order"""
+        while True:
+            priority, _, enqueued_at, future, request = await self._queue.get()
+            try:
+                if future.done():
+                    continue
+
+                # Deferred low-priority work is useless once it is this stale
+                if priority >= Priority.SPAM_WARNING and time.monotonic() - enqueued_at > self.max_latency:
+                    self.stats['expired'] += 1
+                    future.set_result(None)
+                    continue
+
+                started_at = time.monotonic()
+                self._busy += 1
+                try:
+                    reply = await generate_response(*request)
+                finally:
+                    self._busy -= 1
+                elapsed = time.monotonic() - started_at
+                self.avg_service_time = 0.8 * self.avg_service_time + 0.2 * elapsed
+
+                self.stats['completed'] += 1
+                if not future.done():
+                    future.set_result(reply)
+            except Exception as e:
+                print(f"Error in LLM worker: {e}")
+                if not future.done():
+                    future.set_exception(e)
+            finally:
+                self._queue.task_done()
+
+    def get_stats(self) -> Dict[str, float]:
+        """Get scheduler counters and current load"""
+        return {
+            **self.stats,
+            'queue_depth': self.queue_depth(),
+            'busy_workers': self._busy,
+            'estimated_wait': round(self.estimated_wait(), 2),
+        }
+
+# Singleton instance
+llm_scheduler = LLMScheduler()
@@ -0,0 +1,114 @@
+from collections import deque
+from typing import Dict, Iterable, List, Set, Tuple
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton that finds every keyword from many keyword sets in
+    a single pass over the text, including overlapping matches.
+    """
+
+    def __init__(self, keyword_sets: Dict[str, Iterable[str]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple[str, str]]] = [[]]
+
+        for category, keywords in keyword_sets.items():
+            for keyword in keywords:
+                self._add(category, keyword.lower())
+        self._link()
+
+    def _add(self, category: str, keyword: str) -> None:
+        node = 0
+        for char in keyword:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                next_node = len(self._goto) - 1
+                self._goto[node][char] = next_node
+            node = next_node
+        self._output[node].append((category, keyword))
+
+    def _link(self) -> None:
+        """Compute failure links breadth-first"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def find(self, text: str) -> Tuple[Dict[str, Set[str]], Dict[str, Set[str]]]:
+        """
+        Find keywords in already lowercased text
+
+        Returns:
+            Tuple of (keywords found per category, keywords found at the very start per category)
+        """
+        matches: Dict[str, Set[str]] = {}
+        prefix_matches: Dict[str, Set[str]] = {}
+        goto, fail, output = self._goto, self._fail, self._output
+
+        node = 0
+        for index, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for category, keyword in output[node]:
+                matches.setdefault(category, set()).add(keyword)
+                if index + 1 == len(keyword):
+                    prefix_matches.setdefault(category, set()).add(keyword)
+
+        return matches, prefix_matches
+
+# Keyword sets registered by the modules that consume them
+_keyword_sets: Dict[str, List[str]] = {}
+_matcher: KeywordMatcher = None
+
+def register_keywords(category: str, keywords: Iterable[str]) -> None:
+    """Register (or replace) a keyword set. The matcher is recompiled on next use."""
+    global _matcher
+    _keyword_sets[category] = list(keywords)
+    _matcher = None
+
+def _get_matcher() -> KeywordMatcher:
+    global _matcher
+    if _matcher is None:
+        _matcher = KeywordMatcher(_keyword_sets)
+    return _matcher
+
+class MessageFeatures:
+    """Everything the analyzers need to know about a message, computed in one pass"""
+    __slots__ = ('text', 'lower', 'tokens', 'length', 'caps_ratio', 'has_question_mark',
+                 'matches', 'prefix_matches')
+
+    def __init__(self, text: str):
+        self.text = text
+        self.lower = text.lower()
+        self.tokens = self.lower.split()
+        self.length = len(text)
+        self.caps_ratio = sum(1 for c in text if c.isupper()) / max(self.length, 1)
+        self.has_question_mark = '?' in text
+        self.matches, self.prefix_matches = _get_matcher().find(self.lower)
+
+    def has(self, category: str) -> bool:
+        """Check if any keyword from a set occurs in the message"""
+        return category in self.matches
+
+    def count(self, category: str) -> int:
+        """Number of distinct keywords from a set that occur in the message"""
+        return len(self.matches.get(category, ()))
+
+    def starts_with(self, category: str) -> bool:
+        """Check if the message starts with a keyword from a set"""
+        return category in self.prefix_matches
+
+def extract_features(text: str) -> MessageFeatures:
+    """Tokenize and keyword-match a message once for all consumers"""
+    return MessageFeatures(text)
@@ -0,0 +1,137 @@
+import heapq
+import math
+import time
+from typing import Dict, List, Optional, Tuple
+from data.storage import get_storage
+from data.persistence import persistence_manager
+from config.constants import SPAM_WARNING_COOLDOWN, SPAM_WARNING_HALF_LIFE
+
+# Decayed warning counts below this are dropped
+FORGOTTEN_BELOW = 0.05
+
+class WarningRecord:
+    """A user's warning count in one chat, as of updated_at"""
+    __slots__ = ('value', 'updated_at', 'last_warning')
+
+    def __init__(self, value: float = 0.0, updated_at: float = 0.0, last_warning: float = None):
+        self.value = value
+        self.updated_at = updated_at
+        self.last_warning = last_warning
+
+    def to_dict(self) -> Dict:
+        return {'value': self.value, 'updated_at': self.updated_at, 'last_warning': self.last_warning}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'WarningRecord':
+        return cls(data.get('value', 0.0), data.get('updated_at', 0.0), data.get('last_warning'))
+
+def whole_warnings(value: float) -> int:
+    """Round a decayed count half up, so it only ever steps down one at a time as it fades"""
+    return math.floor(value + 0.5)
+
+class WarningLedger:
+    """
+    Persisted spam warnings per (chat_id, user_id). Counts halve every
+    half_life seconds; the decay is applied when a count is read, and faded
+    records are dropped when next touched. sweep() evicts idle users from a
+    heap ordered by when their warnings fade, without scanning every record.
+    """
+
+    def __init__(self, half_life: float = SPAM_WARNING_HALF_LIFE,
+                 cooldown: float = SPAM_WARNING_COOLDOWN):
+        self.half_life = half_life
+        self.cooldown = cooldown
+        self.storage = get_storage()
+        self.records: Dict[str, WarningRecord] = self._load_records()
+        # (forget_at, key), earliest first; entries for updated or removed records are skipped when popped
+        self._expiry: List[Tuple[float, str]] = [(self._forget_at(record), key) for key, record in self.records.items()]
+        heapq.heapify(self._expiry)
+        persistence_manager.register('moderation', self._serialize)
+
+    def _load_records(self) -> Dict[str, WarningRecord]:
+        """Load warning records from storage"""
+        try:
+            return {key: WarningRecord.from_dict(data) for key, data in self.storage.load('moderation').items()}
+        except Exception as e:
+            print(f"Error loading moderation data: {e}")
+            return {}
+
+    def _serialize(self, key: str) -> Optional[Dict]:
+        record = self.records.get(key)
+        return record.to_dict() if record else None
+
+    @staticmethod
+    def _key(chat_id: str, user_id: str) -> str:
+        return f'{chat_id}:{user_id}'
+
+    def _decayed(self, record: WarningRecord, now: float) -> float:
+        elapsed = max(now - record.updated_at, 0)
+        return record.value * 0.5 ** (elapsed / self.half_life)
+
+    def _is_forgotten(self, record: WarningRecord, now: float) -> bool:
+        """Fully faded and no cooldown running"""
+        return (self._decayed(record, now) < FORGOTTEN_BELOW and
+                (record.last_warning is None or now - record.last_warning > self.cooldown))
+
+    def _forget_at(self, record: WarningRecord) -> float:
+        """When a record stops mattering: faded below FORGOTTEN_BELOW and past its cooldown"""
+        faded_at = record.updated_at
+        if record.value > FORGOTTEN_BELOW:
+            faded_at += self.half_life * math.log2(record.value / FORGOTTEN_BELOW)
+        if record.last_warning is None:
+            return faded_at
+        return max(faded_at, record.last_warning + self.cooldown)
+
+    def _current_value(self, chat_id: str, user_id: str, now: float) -> float:
+        key = self._key(chat_id, user_id)
+        record = self.records.get(key)
+        if record is None:
+            return 0.0
+
+        if self._is_forgotten(record, now):
+            del self.records[key]
+            persistence_manager.mark_dirty('moderation', key)
+            return 0.0
+        return self._decayed(record, now)
+
+    def get_warning_count(self, chat_id: str, user_id: str, now: float = None) -> int:
+        """Current (decayed) number of warnings, rounded to whole warnings"""
+        now = time.time() if now is None else now
+        return whole_warnings(self._current_value(chat_id, user_id, now))
+
+    def record_warning(self, chat_id: str, user_id: str, now: float) -> int:
+        """Add a warning and return the updated count"""
+        value = self._current_value(chat_id, user_id, now) + 1
+        key = self._key(chat_id, user_id)
+        record = self.records[key] = WarningRecord(value, now, now)
+        heapq.heappush(self._expiry, (self._forget_at(record), key))
+        persistence_manager.mark_dirty('moderation', key)
+        return whole_warnings(value)
+
+    def should_send_warning(self, chat_id: str, user_id: str, now: float) -> bool:
+        """Check that the warning cooldown has passed for this user"""
+        record = self.records.get(self._key(chat_id, user_id))
+        return record is None or record.last_warning is None or now - record.last_warning > self.cooldown
+
+    def sweep(self, now: float) -> int:
+        """Drop records of users whose warnings have faded; returns how many were dropped"""
+        forgotten = 0
+        while self._expiry and self._expiry[0][0] < now:
+            forget_at, key = heapq.heappop(self._expiry)
+            record = self.records.get(key)
+            # Stale entry: the record was reset, already forgotten on read, or warned again since
+            if record is None or self._forget_at(record) != forget_at:
+                continue
+            del self.records[key]
+            persistence_manager.mark_dirty('moderation', key)
+            forgotten += 1
+        return forgotten
+
+    def reset(self, chat_id: str, user_id: str) -> None:
+        """Forget a user's warnings (e.g. after a kick)"""
+        key = self._key(chat_id, user_id)
+        if self.records.pop(key, None) is not None:
+            persistence_manager.mark_dirty('moderation', key)
+
+# Singleton instance
+warning_ledger = WarningLedger()
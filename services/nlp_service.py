@@ -1,10 +1,13 @@
-import os, json, time, random
+import os, json, copy, random, asyncio, hashlib
 from typing import List, Dict, Any, Optional
-from openai import OpenAI
-from config.constants import MAX_HISTORY_LENGTH
+from openai import AsyncOpenAI
+from config.constants import LLM_MAX_CONCURRENCY, LLM_REQUEST_TIMEOUT
 from data.personality_trainer import personality_trainer
+from data.chat_history import chat_history_store
+from data.persistence import persistence_manager
 from services.lyrics_service import lyrics_service
 from services.user_service import user_service
+from services.message_features import MessageFeatures, extract_features, register_keywords
 
 def load_character_config():
     """Load the character configuration from file"""
@@ -12,164 +15,176 @@ def load_character_config():
     with open(config_path, 'r') as f:
         return json.load(f)
 
+def hash_character_config(config: Dict[str, Any]) -> str:
+    """Stable hash of the character configuration contents"""
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode('utf-8')).hexdigest()
+
 CHARACTER_CONFIG = load_character_config()
+CHARACTER_CONFIG_HASH = hash_character_config(CHARACTER_CONFIG)
+
+# Compiled system prompts keyed by config hash
+_system_prompt_cache: Dict[str, str] = {}
+prompt_cache_stats = {'hits': 0, 'misses': 0}
+
+def reload_character_config() -> None:
+    """Reload the character configuration after it has been rewritten on disk"""
+    global CHARACTER_CONFIG, CHARACTER_CONFIG_HASH
+    try:
+        CHARACTER_CONFIG = load_character_config()
+        CHARACTER_CONFIG_HASH = hash_character_config(CHARACTER_CONFIG)
+        register_keywords('mention', CHARACTER_CONFIG["demographics"]["name_variations"])
+    except Exception as e:
+        print(f"Error reloading character config: {e}")
+
+personality_trainer.add_config_listener(reload_character_config)
+
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-client = OpenAI(api_key=OPENAI_API_KEY)
+client = AsyncOpenAI(api_key=OPENAI_API_KEY, timeout=LLM_REQUEST_TIMEOUT)
 
-# Initialize chat history storage
-chat_histories = {} # This stores conversations by chat_id and user_id
+# Bounds how many completions run at once so a burst of chats can't exhaust the API quota
+llm_semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
 
 def should_respond_randomly() -> bool:
     """Determine if bot should make a random unsolicited reply"""
     random_chance = CHARACTER_CONFIG["linguistic_profile"]["pragmatics"].get("random_reply_chance", 0.0)
     return random.random() < random_chance
 
-def is_bot_mentioned(message_text: str) -> bool:
+QUESTION_STARTERS = [
+    'vad', 'hur', 'varför', 'när', 'vem', 'vilken', 'var', 'kan du', 
+    'har du', 'what', 'how', 'why', 'when', 'who', 'which', 'where', 
+    'can you', 'do you', 'could you', 'would you', 'will you'
+]
+
+DIRECT_REQUESTS = [
+    'berätta', 'tell me', 'say', 'säg', 'visa', 'show', 'ge mig', 'svara', 'give me',
+    'help', 'hjälp', 'explain', 'förklara', 'hälsa', 'greet'
+]
+
+IDENTITY_PHRASES = ["vem är du", "who are you", "berätta om dig", "tell me about yourself", "vad är du"]
+
+register_keywords('question_starter', QUESTION_STARTERS)
+register_keywords('direct_request', DIRECT_REQUESTS)
+register_keywords('identity', IDENTITY_PHRASES)
+register_keywords('mention', CHARACTER_CONFIG["demographics"]["name_variations"])
+
+def is_bot_mentioned(features: MessageFeatures) -> bool:
     """Check if the bot's name is mentioned in the message"""
-    name_variations = CHARACTER_CONFIG["demographics"]["name_variations"]
-    message_lower = message_text.lower()
-    return any(name in message_lower for name in name_variations)
+    return features.has('mention')
 
-def is_direct_question(message_text: str) -> bool:
+def is_direct_question(features: MessageFeatures) -> bool:
     """Determine if a message is a direct question that should be answered"""
-
-    text_lower = message_text.lower()
-    has_question_mark = '?' in text_lower
-    
-    question_starters = [
-        'vad', 'hur', 'varför', 'när', 'vem', 'vilken', 'var', 'kan du', 
-        'har du', 'what', 'how', 'why', 'when', 'who', 'which', 'where', 
-        'can you', 'do you', 'could you', 'would you', 'will you'
-    ]
-    
-    starts_with_question = any(text_lower.startswith(starter) for starter in question_starters)
-    
-    direct_requests = [
-        'berätta', 'tell me', 'say', 'säg', 'visa', 'show', 'ge mig', 'svara', 'give me',
-        'help', 'hjälp', 'explain', 'förklara', 'hälsa', 'greet'
-    ]
-    
-    is_request = any(request in text_lower for request in direct_requests)
-    
-    return has_question_mark or starts_with_question or is_request
+    return features.has_question_mark or features.starts_with('question_starter') or features.has('direct_request')
 
 def update_chat_history(chat_id: str, user_id: str, role: str, content: str) -> None:
     """Update the chat history with a new message"""
-    if chat_id not in chat_histories:
-        chat_histories[chat_id] = []
-
-    chat_histories[chat_id].append({
-        "role": role,
-        "content": content,
-        "user_id": user_id,
-        "timestamp": time.time()
-    })
-    
-    # Trim history if too long
-    if len(chat_histories[chat_id]) > MAX_HISTORY_LENGTH:
-        chat_histories[chat_id] = chat_histories[chat_id][-MAX_HISTORY_LENGTH:]
+    chat_history_store.append(chat_id, user_id, role, content)
 
 def get_chat_context(chat_id: str, limit: int = 5) -> List[Dict[str, str]]:
     """Get recent chat history formatted for OpenAI API"""
-    if chat_id not in chat_histories:
-        return []
-    
-    # Get recent history and format for NLP API
-    recent_history = chat_histories[chat_id][-limit:]
-    formatted_history = []
-    
-    for msg in recent_history:
-        role = "assistant" if msg["role"] == "bot" else "user"
-        formatted_history.append({
-            "role": role,
-            "content": msg["content"]
-        })
-    
-    return formatted_history
+    return chat_history_store.get_context(chat_id, limit)
 
-def create_system_prompt() -> str:
-    """Create a system prompt based on the character configuration"""
-    config = CHARACTER_CONFIG
-    
-    system_prompt = config["metadata"]["prompt"] + "\n\n"
+# Instructions that don't depend on the character config. They go first in the system
+# prompt so the prefix stays byte-identical across calls and config changes.
+STATIC_SYSTEM_PROMPT = (
+    "You have access to the following commands, but should encourage users to use the command format:\n"
+    "- /roll [number] - Roll a dice with specified number of sides\n"
+    "- /weather [city] - Get weather information\n"
+    "- /google [query] - Search Google\n"
+    "- /timer [seconds] - Set a timer\n"
+    "- /add [item] - Add an item to a list\n"
+    "- /remove [item] - Remove an item from the list\n"
+    "- /clear - Clear the list\n"
+    "- /display - Show the list\n"
+    "- /pollen - Show pollen information for any city or region\n"
+    "- /gmt [timezone] [time] - Convert time to GMT+2\n"
+    "\nRemember that you can ban spammers from the chat. If someone is spamming, you can mention this."
+    "\n\nSPAM HANDLING:"
+    "\nIf you detect a user is spamming (sending many messages quickly), your messages should:"
+    "\n1. For Warning #1: Be stern but polite, mention you can 'ban so hard' (referencing the Basshunter song)"
+    "\n2. For Warning #2: Be more serious and explicitly tell them to stop spamming or face consequences"
+    "\n3. For Warning #3 or higher: Be very direct and mention you will kick them from the chat if they continue"
+    "\nUse Swedish phrases like 'jag röjer upp i kanalen' and 'kan banna så hårt' in your warnings."
+    "\n\nIMPORTANT REMINDERS:"
+    "\n1. Avoid overused standard greetings like 'Hallå' or 'Tjena' - vary your conversation starters."
+    "\n2. When asked to greet someone, do it immediately without waiting for further prompting."
+    "\n3. Respond to direct questions, even without your name being explicitly mentioned."
+    "\n4. Never use these phrases: 'adventure', 'spill the tea' or 'spill the beans'."
+    "\n5. Rarely ask follow up questions."
+)
+
+def _compile_system_prompt(config: Dict[str, Any]) -> str:
+    """Build the full system prompt from the character configuration"""
+    parts = [STATIC_SYSTEM_PROMPT, "\n\n", config["metadata"]["prompt"], "\n\n"]
     
     # Additional styling instructions for lowercase
     if "rarely starts a sentence with uppercase" in config["linguistic_profile"]["chat_style"].get("grammar_style", []):
-        system_prompt += "IMPORTANT: You rarely capitalize the first letter of sentences. Most of your messages should start with lowercase letters.\n\n"
+        parts.append("IMPORTANT: You rarely capitalize the first letter of sentences. Most of your messages should start with lowercase letters.\n\n")
     
     # Add personality traits
-    system_prompt += "Your personality traits:\n"
+    parts.append("Your personality traits:\n")
     
     # Add linguistic profile
     linguistics = config["linguistic_profile"]
-    system_prompt += f"- You speak with {linguistics['dialect']} and use {linguistics['speech_patterns']['sentence_length']} sentences\n"
+    parts.append(f"- You speak with {linguistics['dialect']} and use {linguistics['speech_patterns']['sentence_length']} sentences\n")
     
     # Add greeting variations instruction
     if linguistics['pragmatics'].get('greeting_variation') == "low":
-        system_prompt += "- IMPORTANT: Avoid starting messages with standard greetings like 'Hallå' or 'Tjena'. Vary your conversation starters and never start with a greeting.\n"
+        parts.append("- IMPORTANT: Avoid starting messages with standard greetings like 'Hallå' or 'Tjena'. Vary your conversation starters and never start with a greeting.\n")
     
     if linguistics['speech_patterns']['common_phrases']:
         phrases = ", ".join(f'"{phrase}"' for phrase in linguistics['speech_patterns']['common_phrases'])
-        system_prompt += f"- You occasionally use phrases like {phrases} or similar.\n"
+        parts.append(f"- You occasionally use phrases like {phrases} or similar.\n")
 
     if linguistics['speech_patterns']['filler_words']:
         fillers = ", ".join(f'"{filler}"' for filler in linguistics['speech_patterns']['filler_words'])
-        system_prompt += f"- You occasionally use filler words like {fillers} and similar.\n"
+        parts.append(f"- You occasionally use filler words like {fillers} and similar.\n")
     
     # Add behavioral traits
-    system_prompt += f"- You are {linguistics['pragmatics']['politeness_strategy']} and {linguistics['pragmatics']['humor_style']} in your humor\n"
+    parts.append(f"- You are {linguistics['pragmatics']['politeness_strategy']} and {linguistics['pragmatics']['humor_style']} in your humor\n")
     
     # Add values and motivations
     if config["psychographics"]["values"]:
         values = ", ".join(config["psychographics"]["values"])
-        system_prompt += f"- You value {values}\n"
+        parts.append(f"- You value {values}\n")
     
     if config["psychographics"]["motivations"]:
         motivations = ", ".join(config["psychographics"]["motivations"])
-        system_prompt += f"- You are motivated by {motivations}\n"
+        parts.append(f"- You are motivated by {motivations}\n")
     
     # Remind about emoji usage
-    system_prompt += f"- You use emojis {linguistics['pragmatics']['emojis_usage']}\n"
-    
-    # Add information about command capabilities
-    system_prompt += "\nYou have access to the following commands, but should encourage users to use the command format:\n"
-    system_prompt += "- /roll [number] - Roll a dice with specified number of sides\n"
-    system_prompt += "- /weather [city] - Get weather information\n"
-    system_prompt += "- /google [query] - Search Google\n"
-    system_prompt += "- /timer [seconds] - Set a timer\n"
-    system_prompt += "- /add [item] - Add an item to a list\n"
-    system_prompt += "- /remove [item] - Remove an item from the list\n"
-    system_prompt += "- /clear - Clear the list\n"
-    system_prompt += "- /display - Show the list\n"
-    system_prompt += "- /pollen - Show pollen information for any city or region\n"
-    system_prompt += "- /gmt [timezone] [time] - Convert time to GMT+2\n"
-    
-    # Additional moderation capabilities information
-    system_prompt += "\nRemember that you can ban spammers from the chat. If someone is spamming, you can mention this."
-    
-    # Add specific spam handling instructions
-    system_prompt += "\n\nSPAM HANDLING:"
-    system_prompt += "\nIf you detect a user is spamming (sending many messages quickly), your messages should:"
-    system_prompt += "\n1. For Warning #1: Be stern but polite, mention you can 'ban so hard' (referencing the Basshunter song)"
-    system_prompt += "\n2. For Warning #2: Be more serious and explicitly tell them to stop spamming or face consequences"
-    system_prompt += "\n3. For Warning #3 or higher: Be very direct and mention you will kick them from the chat if they continue"
-    system_prompt += "\nUse Swedish phrases like 'jag röjer upp i kanalen' and 'kan banna så hårt' in your warnings."
-    
-    # Final reminders
-    system_prompt += "\n\nIMPORTANT REMINDERS:"
-    system_prompt += "\n1. Avoid overused standard greetings like 'Hallå' or 'Tjena' - vary your conversation starters."
-    system_prompt += "\n2. When asked to greet someone, do it immediately without waiting for further prompting."
-    system_prompt += "\n3. Respond to direct questions, even without your name being explicitly mentioned."
-    system_prompt += "\n4. Never use these phrases: 'adventure', 'spill the tea' or 'spill the beans'."
-    system_prompt += "\n5. Rarely ask follow up questions."
+    parts.append(f"- You use emojis {linguistics['pragmatics']['emojis_usage']}")
     
+    return "".join(parts)
+
+def create_system_prompt() -> str:
+    """Get the system prompt for the current character configuration, compiling it only on config changes"""
+    cached = _system_prompt_cache.get(CHARACTER_CONFIG_HASH)
+    if cached is not None:
+        prompt_cache_stats['hits'] += 1
+        return cached
+    
+    prompt_cache_stats['misses'] += 1
+    system_prompt = _compile_system_prompt(CHARACTER_CONFIG)
+    _system_prompt_cache.clear()  # Prompts for older configs will never be asked for again
+    _system_prompt_cache[CHARACTER_CONFIG_HASH] = system_prompt
     return system_prompt
 
-def generate_response(chat_id: str, user_id: str, message_text: str, user_name: str) -> str:
+def get_prompt_cache_stats() -> Dict[str, Any]:
+    """Get system prompt cache counters"""
+    return {
+        **prompt_cache_stats,
+        'config_hash': CHARACTER_CONFIG_HASH[:8],
+        'cached_prompts': len(_system_prompt_cache)
+    }
+
+async def generate_response(chat_id: str, user_id: str, message_text: str, user_name: str,
+                            features: Optional[MessageFeatures] = None) -> str:
     """Generate a response using OpenAI API based on chat history and character configuration"""
+    if features is None:
+        features = extract_features(message_text)
 
     # Check if user is asking about the bot's identity
-    if any(phrase in message_text.lower() for phrase in ["vem är du", "who are you", "berätta om dig", "tell me about yourself", "vad är du"]):
+    if features.has('identity'):
         identity_line = lyrics_service.get_identity_line()
         message_text = f"[Respond with a casual introduction that includes this line: {identity_line}] {message_text}"
 
@@ -188,8 +203,10 @@ def generate_response(chat_id: str, user_id: str, message_text: str, user_name:
     
     system_prompt = create_system_prompt()
 
+    # Per-user context goes after the cached prompt so it doesn't break the shared prefix
     messages = [
-        {"role": "system", "content": system_prompt}
+        {"role": "system", "content": system_prompt},
+        {"role": "system", "content": user_context}
     ]
     
     # Add conversation history
@@ -202,15 +219,17 @@ def generate_response(chat_id: str, user_id: str, message_text: str, user_name:
     })
     
     try:
-        response = client.chat.completions.create(
-            model="gpt-5-nano",
-            messages=messages,
-            max_tokens=300,
-            temperature=0.85,
-            top_p=1.0,
-            frequency_penalty=0.5,
-            presence_penalty=0.5
-        )
+        # Await the completion so other chats keep being served while this one is in flight
+        async with llm_semaphore:
+            response = await client.chat.completions.create(
+                model="gpt-5-nano",
+                messages=messages,
+                max_tokens=300,
+                temperature=0.85,
+                top_p=1.0,
+                frequency_penalty=0.5,
+                presence_penalty=0.5
+            )
 
         reply = response.choices[0].message.content.strip()
         
@@ -230,26 +249,71 @@ def generate_response(chat_id: str, user_id: str, message_text: str, user_name:
         print(f"Error generating response: {e}")
         return "Sorry, I'm having trouble performing matrix multiplications right now."
 
-def save_chat_histories() -> None:
-    data_path = os.path.join(os.path.dirname(__file__), '../data/chat_histories.json')
-    with open(data_path, 'w') as f:
-        json.dump(chat_histories, f)
+# Each chat's history is persisted to its own shard so a save only touches changed chats
+HISTORY_SHARD_DIR = os.path.join(os.path.dirname(__file__), '../data/chat_histories')
+LEGACY_HISTORY_PATH = os.path.join(os.path.dirname(__file__), '../data/chat_histories.json')
+
+# Serializes flushes so an older snapshot can never overwrite a newer shard
+_flush_lock = asyncio.Lock()
+
+def _shard_path(chat_id: str) -> str:
+    safe_id = "".join(c for c in chat_id if c.isalnum() or c in "-_")
+    return os.path.join(HISTORY_SHARD_DIR, f"{safe_id}.json")
+
+def write_chat_history_shards(shards: Dict[str, List[Dict[str, Any]]]) -> None:
+    """Write one JSON file per chat, replacing each shard atomically"""
+    os.makedirs(HISTORY_SHARD_DIR, exist_ok=True)
+    for chat_id, messages in shards.items():
+        path = _shard_path(chat_id)
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump({"chat_id": chat_id, "messages": messages}, f)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"Error saving chat history for {chat_id}: {e}")
 
-    personality_trainer.analyze_chat_history(chat_histories)
+async def flush_chat_histories() -> None:
+    """Persist changed chats with the file writes running off the event loop"""
+    async with _flush_lock:
+        shards = chat_history_store.snapshot_dirty()
+        if not shards:
+            return
+
+        await asyncio.to_thread(write_chat_history_shards, shards)
+
+        # Counted on the loop, where /status reads the same counters; only a snapshot is written from the thread
+        if personality_trainer.analyze_chat_history(shards, save=False):
+            snapshot = copy.deepcopy(personality_trainer.personality_data)
+            await asyncio.to_thread(personality_trainer.save_personality_data, snapshot)
 
 def load_chat_histories() -> None:
-    """Load chat histories from a file if it exists"""
-    global chat_histories
+    """Load chat histories from the shard directory, migrating the legacy single file if needed"""
     try:
-        data_path = os.path.join(os.path.dirname(__file__), '../data/chat_histories.json')
-        if os.path.exists(data_path):
-            with open(data_path, 'r') as f:
-                chat_histories = json.load(f)
+        if os.path.isdir(HISTORY_SHARD_DIR):
+            for file_name in os.listdir(HISTORY_SHARD_DIR):
+                if not file_name.endswith('.json'):
+                    continue
+                try:
+                    with open(os.path.join(HISTORY_SHARD_DIR, file_name), 'r') as f:
+                        shard = json.load(f)
+                    chat_history_store.load_chat(shard["chat_id"], shard["messages"])
+                except Exception as e:
+                    print(f"Error loading chat history shard {file_name}: {e}")
 
-            personality_trainer.analyze_chat_history(chat_histories)
+        elif os.path.exists(LEGACY_HISTORY_PATH):
+            with open(LEGACY_HISTORY_PATH, 'r') as f:
+                chat_history_store.load_dict(json.load(f))
+            # Mark everything dirty so the next flush writes the shards
+            chat_history_store.dirty.update(chat_history_store.buffers.keys())
+
+        personality_trainer.analyze_chat_history(chat_history_store.to_dict())
             
     except Exception as e:
         print(f"Error loading chat histories: {e}")
 
 # Init by loading any existing chat histories
-load_chat_histories()
\ No newline at end of file
+load_chat_histories()
+
+# Changed chats are written together with the other dirty data
+persistence_manager.add_flush_hook(flush_chat_histories)
\ No newline at end of file
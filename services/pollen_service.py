@@ -1,10 +1,17 @@
-import requests
+import asyncio
 import json, os
+import pytz
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
+from config.constants import POLLEN_FORECAST_DAYS, POLLEN_CACHE_SIZE, POLLEN_PREFETCH_RECENT
+from services.weather_service import geocode, normalize_city
+from utils.http_client import http_client
+from utils.ttl_cache import TTLCache, MISSING
 
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+TIMEZONE = os.getenv('TIMEZONE', 'Europe/Stockholm')
 
 @dataclass
 class PollenLocation:
@@ -18,7 +25,20 @@ LOCATIONS = {
     "malmo": PollenLocation("Malmö", 55.604981, 13.003822),
 }
 
-def get_pollen_forecast(location: PollenLocation, days: int = 3) -> Dict[str, Any]:
+# Full forecasts keyed by (latitude, longitude, local date); the data only changes daily
+_forecast_cache = TTLCache(ttl=86400, max_size=POLLEN_CACHE_SIZE)
+
+# Places looked up recently, prefetched with the presets after midnight
+_recent_locations: 'OrderedDict[Tuple[float, float], PollenLocation]' = OrderedDict()
+
+def local_date() -> str:
+    """Today's date in the bot's timezone"""
+    return datetime.now(pytz.timezone(TIMEZONE)).date().isoformat()
+
+def _coords(location: PollenLocation) -> Tuple[float, float]:
+    return (round(location.latitude, 3), round(location.longitude, 3))
+
+async def get_pollen_forecast(location: PollenLocation, days: int = 3) -> Dict[str, Any]:
     """
     Fetches pollen forecast data from the Google Pollen API.
     
@@ -42,7 +62,7 @@ def get_pollen_forecast(location: PollenLocation, days: int = 3) -> Dict[str, An
     }
     
     try:
-        response = requests.get(endpoint, params=params)
+        response = await http_client.get(endpoint, params=params)
         if response.status_code == 200:
             return response.json()
         else:
@@ -50,6 +70,51 @@ def get_pollen_forecast(location: PollenLocation, days: int = 3) -> Dict[str, An
     except Exception as e:
         return {"error": f"Request failed: {str(e)}"}
 
+async def get_cached_forecast(location: PollenLocation) -> Dict[str, Any]:
+    """
+    Get today's full forecast for a location, fetching it at most once per day.
+    
+    Errors are returned but not cached, so the next request tries again.
+    """
+    key = _coords(location) + (local_date(),)
+    cached = _forecast_cache.get(key)
+    if cached is not MISSING:
+        return cached
+    
+    data = await get_pollen_forecast(location, POLLEN_FORECAST_DAYS)
+    if "error" not in data:
+        _forecast_cache.set(key, data)
+    return data
+
+async def resolve_location(location_name: str) -> Optional[PollenLocation]:
+    """Find a preset location by name, or geocode any other place"""
+    location_key = normalize_city(location_name)
+    if location_key in LOCATIONS:
+        return LOCATIONS[location_key]
+    
+    geo = await geocode(location_name)
+    if geo is None:
+        return None
+    
+    location = PollenLocation(geo.name, geo.latitude, geo.longitude)
+    coords = _coords(location)
+    _recent_locations[coords] = location
+    _recent_locations.move_to_end(coords)
+    while len(_recent_locations) > POLLEN_PREFETCH_RECENT:
+        _recent_locations.popitem(last=False)
+    return location
+
+async def prefetch_pollen_forecasts() -> int:
+    """
+    Warm the cache with today's forecasts for the preset and recently used locations
+    
+    Returns:
+        int: Number of locations fetched successfully
+    """
+    locations = list(LOCATIONS.values()) + list(_recent_locations.values())
+    results = await asyncio.gather(*(get_cached_forecast(location) for location in locations))
+    return sum(1 for data in results if "error" not in data)
+
 def get_emoji_for_category(category: str) -> str:
     """Get an appropriate emoji for the pollen level category"""
     category_emojis = {
@@ -139,23 +204,22 @@ def format_pollen_forecast(data: Dict[str, Any], location_name: str) -> str:
     
     return formatted_output
 
-def get_pollen_for_location(location_name: str = "gothenburg", days: int = 3) -> str:
+async def get_pollen_for_location(location_name: str = "gothenburg", days: int = 3) -> str:
     """
     Get pollen forecast for a specified location
     
     Args:
-        location_name (str): Name of the location (case insensitive)
+        location_name (str): Preset location or any place the geocoder knows (case insensitive)
         days (int): Number of days to forecast
         
     Returns:
         str: Formatted pollen information
     """
-    location_key = location_name.lower()
-    
-    # Default to Gothenburg if location not found
-    if location_key not in LOCATIONS:
-        return f"Location '{location_name}' not found. Available locations: {', '.join(LOCATIONS.keys())}"
+    location = await resolve_location(location_name)
+    if location is None:
+        return f"Location '{location_name}' not found. Try a city name, e.g. {', '.join(LOCATIONS.keys())}"
     
-    location = LOCATIONS[location_key]
-    forecast_data = get_pollen_forecast(location, days)
+    forecast_data = await get_cached_forecast(location)
+    if "dailyInfo" in forecast_data:
+        forecast_data = {**forecast_data, "dailyInfo": forecast_data["dailyInfo"][:days]}
     return format_pollen_forecast(forecast_data, location.city)
\ No newline at end of file
@@ -0,0 +1,193 @@
+import math
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List
+from config.constants import (
+    RAID_HALF_LIFE, RAID_MESSAGE_RATE_THRESHOLD, RAID_JOIN_RATE_THRESHOLD,
+    RAID_RELEASE_RATIO, RAID_MIN_LOCKDOWN, RAID_NEW_USER_AGE
+)
+
+class DecayedCounter:
+    """Event count where each event's weight halves every half_life seconds"""
+    __slots__ = ('half_life', 'value', 'updated_at')
+
+    def __init__(self, half_life: float):
+        self.half_life = half_life
+        self.value = 0.0
+        self.updated_at = 0.0
+
+    def get(self, now: float) -> float:
+        if now > self.updated_at:
+            self.value *= math.pow(0.5, (now - self.updated_at) / self.half_life)
+            self.updated_at = now
+        return self.value
+
+    def add(self, now: float, amount: float = 1.0) -> float:
+        self.value = self.get(now) + amount
+        return self.value
+
+class ChatRaidState:
+    """Aggregate rates, recent joins and lockdown state for one chat"""
+    __slots__ = ('message_rate', 'join_rate', 'recent_joins', 'locked_since', 'kick_queue', 'queued', 'cannot_kick')
+
+    def __init__(self, half_life: float):
+        self.message_rate = DecayedCounter(half_life)
+        self.join_rate = DecayedCounter(half_life)
+        self.recent_joins: 'OrderedDict[str, float]' = OrderedDict()
+        self.locked_since = None
+        self.kick_queue: Deque[str] = deque()
+        self.queued = set()
+        # Set when kicking failed for lack of admin rights; cleared with each new lockdown
+        self.cannot_kick = False
+
+class RaidDetector:
+    """
+    Chat-wide raid detection. Per-user spam limits miss many fresh accounts
+    each sending a few messages, so this tracks the chat's join rate and the
+    message rate of new users over exponentially decayed windows, and puts
+    the chat in lockdown while either is above its threshold.
+    """
+
+    def __init__(self, half_life: float = RAID_HALF_LIFE,
+                 message_threshold: float = RAID_MESSAGE_RATE_THRESHOLD,
+                 join_threshold: float = RAID_JOIN_RATE_THRESHOLD,
+                 release_ratio: float = RAID_RELEASE_RATIO,
+                 min_lockdown: float = RAID_MIN_LOCKDOWN,
+                 new_user_age: float = RAID_NEW_USER_AGE):
+        self.half_life = half_life
+        self.message_threshold = message_threshold
+        self.join_threshold = join_threshold
+        self.release_ratio = release_ratio
+        self.min_lockdown = min_lockdown
+        self.new_user_age = new_user_age
+        self.chats: Dict[str, ChatRaidState] = {}
+
+    def _get_state(self, chat_id: str) -> ChatRaidState:
+        state = self.chats.get(chat_id)
+        if state is None:
+            state = self.chats[chat_id] = ChatRaidState(self.half_life)
+        return state
+
+    def _forget_old_joins(self, state: ChatRaidState, now: float) -> None:
+        while state.recent_joins:
+            user_id, joined_at = next(iter(state.recent_joins.items()))
+            if now - joined_at <= self.new_user_age:
+                break
+            del state.recent_joins[user_id]
+
+    def _update_lockdown(self, state: ChatRaidState, now: float) -> bool:
+        """Enter lockdown above a threshold; returns True if lockdown just started"""
+        if state.locked_since is None and (
+                state.message_rate.get(now) >= self.message_threshold or
+                state.join_rate.get(now) >= self.join_threshold):
+            state.locked_since = now
+            state.cannot_kick = False
+            return True
+        return False
+
+    def record_join(self, chat_id: str, user_id: str, now: float) -> bool:
+        """
+        Record a member joining the chat
+
+        Returns:
+            bool: True if this join started a lockdown
+        """
+        state = self._get_state(chat_id)
+        self._forget_old_joins(state, now)
+        state.recent_joins[user_id] = now
+        state.recent_joins.move_to_end(user_id)
+        state.join_rate.add(now)
+        return self._update_lockdown(state, now)
+
+    def is_new_user(self, chat_id: str, user_id: str, now: float) -> bool:
+        """Check if a user joined the chat recently"""
+        state = self.chats.get(chat_id)
+        if state is None:
+            return False
+        joined_at = state.recent_joins.get(user_id)
+        return joined_at is not None and now - joined_at <= self.new_user_age
+
+    def record_message(self, chat_id: str, is_new_user: bool, now: float) -> bool:
+        """
+        Record a message; only messages from new users feed the raid rate
+
+        Returns:
+            bool: True if this message started a lockdown
+        """
+        state = self._get_state(chat_id)
+        if is_new_user:
+            state.message_rate.add(now)
+        return self._update_lockdown(state, now)
+
+    def in_lockdown(self, chat_id: str) -> bool:
+        state = self.chats.get(chat_id)
+        return state is not None and state.locked_since is not None
+
+    def try_release(self, chat_id: str, now: float) -> bool:
+        """
+        Lift a lockdown once both rates have fallen well below their thresholds
+
+        Returns:
+            bool: True if the lockdown was lifted
+        """
+        state = self.chats.get(chat_id)
+        if state is None or state.locked_since is None:
+            return False
+        if now - state.locked_since < self.min_lockdown:
+            return False
+        if (state.message_rate.get(now) < self.message_threshold * self.release_ratio and
+                state.join_rate.get(now) < self.join_threshold * self.release_ratio):
+            state.locked_since = None
+            state.cannot_kick = False
+            return True
+        return False
+
+    def locked_chats(self) -> List[str]:
+        return [chat_id for chat_id, state in self.chats.items() if state.locked_since is not None]
+
+    def can_kick(self, chat_id: str) -> bool:
+        """False once kicking has failed for lack of admin rights during this lockdown"""
+        state = self.chats.get(chat_id)
+        return state is None or not state.cannot_kick
+
+    def mark_cannot_kick(self, chat_id: str) -> bool:
+        """
+        Stop queueing kicks for the rest of the lockdown and drop the queue
+
+        Returns:
+            bool: True if this is the first time during this lockdown
+        """
+        state = self._get_state(chat_id)
+        state.kick_queue.clear()
+        state.queued.clear()
+        if state.cannot_kick:
+            return False
+        state.cannot_kick = True
+        return True
+
+    def queue_kick(self, chat_id: str, user_id: str) -> bool:
+        """Queue a user for removal; returns False if they are already queued"""
+        state = self._get_state(chat_id)
+        if user_id in state.queued:
+            return False
+        state.queued.add(user_id)
+        state.kick_queue.append(user_id)
+        return True
+
+    def next_kick_batch(self, chat_id: str, size: int) -> List[str]:
+        """Take up to size queued users to kick"""
+        state = self.chats.get(chat_id)
+        if state is None:
+            return []
+        batch = []
+        while state.kick_queue and len(batch) < size:
+            user_id = state.kick_queue.popleft()
+            state.queued.discard(user_id)
+            batch.append(user_id)
+        return batch
+
+    def rates(self, chat_id: str, now: float) -> Dict[str, float]:
+        state = self._get_state(chat_id)
+        return {'messages': round(state.message_rate.get(now), 2), 'joins': round(state.join_rate.get(now), 2)}
+
+# Singleton instance
+raid_detector = RaidDetector()
@@ -1,16 +1,24 @@
-import json
-import os
 import random
-from typing import Dict, List, Tuple
+from typing import Dict, List, Tuple, Optional
 from datetime import datetime, timedelta
 from services.user_service import user_service
+from utils.sorted_index import SortedIndex
+from data.storage import get_storage
+from data.persistence import persistence_manager
 
 class ReputationService:
     """Service for tracking user behavior and Anna's opinions"""
     
     def __init__(self):
-        self.data_path = os.path.join(os.path.dirname(__file__), '../data/reputation.json')
+        self.storage = get_storage()
         self.reputation_data = self._load_reputation()
+        persistence_manager.register('reputation', self.reputation_data.get)
+        
+        # Users ordered by total score, kept up to date as traits change
+        self.leaderboard_index = SortedIndex()
+        for user_id, data in self.reputation_data.items():
+            if data.get('interaction_count', 0) > 0:
+                self.leaderboard_index.update(user_id, data.get('total_score', 0))
         
         # Define personality traits Anna tracks
         self.traits = {
@@ -24,24 +32,12 @@ class ReputationService:
         }
     
     def _load_reputation(self) -> Dict:
-        """Load reputation data from file"""
-        if os.path.exists(self.data_path):
-            try:
-                with open(self.data_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except Exception as e:
-                print(f"Error loading reputation data: {e}")
-                return {}
-        return {}
-    
-    def _save_reputation(self):
-        """Save reputation data to file"""
+        """Load reputation data from storage"""
         try:
-            os.makedirs(os.path.dirname(self.data_path), exist_ok=True)
-            with open(self.data_path, 'w', encoding='utf-8') as f:
-                json.dump(self.reputation_data, f, indent=2, ensure_ascii=False)
+            return self.storage.load('reputation')
         except Exception as e:
-            print(f"Error saving reputation data: {e}")
+            print(f"Error loading reputation data: {e}")
+            return {}
     
     def get_user_reputation(self, user_id: str) -> Dict:
         """Get user's reputation data"""
@@ -59,39 +55,54 @@ class ReputationService:
     
     def update_trait(self, user_id: str, trait: str, change: float, reason: str = None):
         """Update a specific trait for a user"""
-        if trait not in self.traits:
+        self.apply_trait_deltas(user_id, {trait: change}, {trait: reason} if reason else None)
+    
+    def apply_trait_deltas(self, user_id: str, deltas: Dict[str, float], reasons: Dict[str, str] = None):
+        """
+        Apply changes to several traits at once, scoring the user and counting
+        the interaction a single time
+        
+        Args:
+            user_id (str): User ID
+            deltas (Dict[str, float]): Change per trait
+            reasons (Dict[str, str]): Optional reason per trait, logged as notable events
+        """
+        reasons = reasons or {}
+        deltas = {trait: change for trait, change in deltas.items() if trait in self.traits and change}
+        if not deltas:
             return
         
         rep = self.get_user_reputation(user_id)
-        old_value = rep['traits'][trait]
+        now = datetime.now().isoformat()
         
-        # Apply change with bounds
-        trait_config = self.traits[trait]
-        new_value = max(trait_config['min'], min(trait_config['max'], old_value + change))
-        rep['traits'][trait] = new_value
+        for trait, change in deltas.items():
+            # Apply change with bounds
+            trait_config = self.traits[trait]
+            new_value = max(trait_config['min'], min(trait_config['max'], rep['traits'][trait] + change))
+            rep['traits'][trait] = new_value
+            
+            # Log notable events
+            reason = reasons.get(trait)
+            if abs(change) >= 2 or reason:
+                rep['notable_events'].append({
+                    'timestamp': now,
+                    'trait': trait,
+                    'change': change,
+                    'reason': reason or 'Unknown',
+                    'new_value': new_value
+                })
+        
+        # Keep only last 20 events
+        if len(rep['notable_events']) > 20:
+            rep['notable_events'] = rep['notable_events'][-20:]
         
         # Update total score (weighted average)
         rep['total_score'] = self._calculate_total_score(rep['traits'])
         rep['relationship_status'] = self._determine_relationship(rep['total_score'])
-        rep['last_interaction'] = datetime.now().isoformat()
+        rep['last_interaction'] = now
         rep['interaction_count'] += 1
-        
-        # Log notable events
-        if abs(change) >= 2 or reason:
-            rep['notable_events'].append({
-                'timestamp': datetime.now().isoformat(),
-                'trait': trait,
-                'change': change,
-                'reason': reason or 'Unknown',
-                'new_value': new_value
-            })
-            
-            # Keep only last 20 events
-            rep['notable_events'] = rep['notable_events'][-20:]
-        
-        # Save occasionally
-        if rep['interaction_count'] % 5 == 0:
-            self._save_reputation()
+        self.leaderboard_index.update(user_id, rep['total_score'])
+        persistence_manager.mark_dirty('reputation', user_id)
     
     def _calculate_total_score(self, traits: Dict) -> float:
         """Calculate overall reputation score"""
@@ -218,14 +229,14 @@ class ReputationService:
     
     def get_leaderboard(self, limit: int = 10) -> List[Tuple[str, Dict]]:
         """Get reputation leaderboard"""
-        users_with_scores = [
-            (user_id, data) for user_id, data in self.reputation_data.items()
-            if data.get('interaction_count', 0) > 0
-        ]
-        
-        # Sort by total score
-        sorted_users = sorted(users_with_scores, key=lambda x: x[1]['total_score'], reverse=True)
-        return sorted_users[:limit]
+        return [(user_id, self.reputation_data[user_id]) for user_id, _ in self.leaderboard_index.top(limit)]
+    
+    def get_rank(self, user_id: str) -> Optional[Tuple[int, int]]:
+        """Get a user's leaderboard position as (rank, number of ranked users)"""
+        rank = self.leaderboard_index.rank(user_id)
+        if rank is None:
+            return None
+        return rank, len(self.leaderboard_index)
 
 # Singleton instance
 reputation_service = ReputationService()
\ No newline at end of file
@@ -5,7 +5,9 @@ import pytz
 from telegram import Bot
 from telegram.ext import ContextTypes
 
-from services.weather_service import get_weather
+from config.constants import POLLEN_PREFETCH_MINUTE
+from services.weather_service import get_weather_reports
+from services.pollen_service import prefetch_pollen_forecasts
 from services.lyrics_service import lyrics_service
 from services.user_service import user_service
 from services.soundcloud_service import soundcloud_service
@@ -19,8 +21,10 @@ logger = logging.getLogger(__name__)
 CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
 SEND_MORNING_UPDATES = os.getenv('SEND_MORNING_UPDATES', True)
 DEFAULT_CITY = os.getenv('DEFAULT_CITY', 'gothenburg')
+MORNING_WEATHER_CITIES = [c.strip() for c in os.getenv('MORNING_WEATHER_CITIES', DEFAULT_CITY).split(',') if c.strip()]
 TIMEZONE = os.getenv('TIMEZONE', 'Europe/Stockholm')
 SOUNDCLOUD = True
+POLLEN = bool(os.getenv('GOOGLE_API_KEY'))  # Pollen forecasts need the Google API key
 
 class SchedulerService:
     """Service for scheduling regular updates and messages"""
@@ -35,6 +39,13 @@ class SchedulerService:
             job_queue.run_daily(self.send_morning_update, job_time)
             logger.info(f"Scheduled morning updates daily at 8:00 AM {TIMEZONE}")
         
+        if POLLEN:
+            # Pollen forecasts change daily, so fetch them once just after midnight (and at startup)
+            prefetch_time = datetime.time(hour=0, minute=POLLEN_PREFETCH_MINUTE, tzinfo=self.timezone)
+            job_queue.run_daily(self.prefetch_pollen, prefetch_time)
+            job_queue.run_once(self.prefetch_pollen, 30)
+            logger.info(f"Scheduled pollen prefetch daily at 00:{POLLEN_PREFETCH_MINUTE:02d} {TIMEZONE}")
+        
         if SOUNDCLOUD:
             soundcloud_check_interval = int(os.getenv('SOUNDCLOUD_CHECK_INTERVAL', 1800))  # Default 30 minutes
             job_queue.run_repeating(
@@ -61,23 +72,25 @@ class SchedulerService:
         ]
         greeting = random.choice(morning_greetings)
         
-        # Get weather for default city
+        # Get weather for the digest cities in one batch
         weather_info = "Jag kan inte hämta väderinformation just nu."
         try:
-            weather = get_weather(DEFAULT_CITY)
-            if "Temperature:" in weather:
-                temp = float(weather.split("Temperature: ")[1].split(" °C")[0])
-                desc = weather.split("Description: ")[1].split("\n")[0]
-                weather_info = f"Vädret i {DEFAULT_CITY}: {desc}, {temp:.1f}°C"
+            reports = await get_weather_reports(MORNING_WEATHER_CITIES)
+            weather_lines = [
+                f"Vädret i {report.city}: {report.description}, {report.temperature:.1f}°C"
+                for report in reports.values() if report
+            ]
+            if weather_lines:
+                weather_info = "\n".join(weather_lines)
         except Exception as e:
             logger.error(f"Error getting weather for morning update: {e}")
 
-        active_users = user_service.get_active_users(7)
-        user_count = len(active_users)
+        user_count = user_service.count_active_users(7)
         
         if user_count > 0:
             # Mention some active users occasionally
             if random.random() < 0.3 and user_count <= 7:  # 30% chance, small groups only
+                active_users = user_service.get_active_users(7)
                 user_names = [user_service.get_user_display_name(uid) for uid in list(active_users.keys())[:3]]
                 personal_greeting = f"God morgon {', '.join(user_names)}!"
             else:
@@ -89,7 +102,7 @@ class SchedulerService:
         soundcloud_stats = ""
         try:
             if soundcloud_service.tracking_data.get("my_account"):
-                changes = soundcloud_service.get_stats_changes()
+                changes = await soundcloud_service.get_stats_changes()
                 if changes:
                     soundcloud_stats = "\n\n" + soundcloud_service.format_stats_update(changes)
         except Exception as e:
@@ -103,10 +116,18 @@ class SchedulerService:
         except Exception as e:
             logger.error(f"Failed to send morning update: {e}")
 
+    async def prefetch_pollen(self, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """Fetch today's pollen forecasts into the cache before anyone asks"""
+        try:
+            fetched = await prefetch_pollen_forecasts()
+            logger.info(f"Prefetched pollen forecasts for {fetched} location(s)")
+        except Exception as e:
+            logger.error(f"Error prefetching pollen forecasts: {e}")
+
     async def check_soundcloud_updates(self, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Check for new SoundCloud tracks and notify the chat"""
         try:
-            new_tracks = soundcloud_service.check_for_new_tracks()
+            new_tracks = await soundcloud_service.check_for_new_tracks()
             
             if new_tracks:
                 logger.info(f"Found {len(new_tracks)} new SoundCloud track(s)")
@@ -0,0 +1,180 @@
+import asyncio
+import os
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+import pytz
+
+from config.constants import (
+    SEARCH_CACHE_TTL, SEARCH_CACHE_SIZE, SEARCH_RESULTS_PER_PAGE,
+    SEARCH_MAX_RESULTS, SEARCH_DAILY_QUOTA
+)
+from utils.http_client import http_client
+from utils.ttl_cache import TTLCache, MISSING
+
+SEARCH_URL = 'https://www.googleapis.com/customsearch/v1'
+
+# Most results Custom Search returns per call
+SEARCH_BLOCK_SIZE = 10
+
+# Google resets the Custom Search quota at midnight Pacific time
+QUOTA_TIMEZONE = pytz.timezone('America/Los_Angeles')
+
+class SearchError(Exception):
+    """A search that failed with a message fit to show the user"""
+
+def normalize_query(query: str) -> str:
+    """Cache key for a query: lowercase with collapsed whitespace"""
+    return ' '.join(query.lower().split())
+
+class SearchService:
+    """
+    Google Custom Search with a result cache.
+
+    Results are fetched in blocks of ten (one API call each) and cached per
+    normalized query, so repeats and further pages are served from memory.
+    Concurrent requests for a block that is already being fetched wait for
+    that fetch instead of starting their own.
+    """
+
+    def __init__(self):
+        self.cache = TTLCache(SEARCH_CACHE_TTL, SEARCH_CACHE_SIZE)
+        self._inflight: Dict[Tuple[str, int], asyncio.Future] = {}
+        # Last query and page shown per chat, for /googlemore
+        self._last_page: Dict[str, Tuple[str, int]] = {}
+        self.quota_day = None
+        self.stats = {'api_calls': 0, 'calls_today': 0, 'cache_hits': 0, 'coalesced': 0, 'errors': 0}
+
+    def _roll_quota_day(self) -> None:
+        today = datetime.now(QUOTA_TIMEZONE).date()
+        if today != self.quota_day:
+            self.quota_day = today
+            self.stats['calls_today'] = 0
+
+    def quota_remaining(self) -> int:
+        self._roll_quota_day()
+        return max(0, SEARCH_DAILY_QUOTA - self.stats['calls_today'])
+
+    async def _fetch_block(self, query: str, start: int) -> List[Dict]:
+        """One Custom Search API call for results start..start+9 (1-based)"""
+        if self.quota_remaining() <= 0:
+            raise SearchError("Daily search quota used up. Try again tomorrow.")
+
+        self.stats['api_calls'] += 1
+        self.stats['calls_today'] += 1
+        response = await http_client.get(SEARCH_URL, params={
+            'q': query,
+            'key': os.getenv('GOOGLE_API_KEY'),
+            'cx': os.getenv('GOOGLE_CSE_ID', ''),
+            'start': start,
+            'num': SEARCH_BLOCK_SIZE
+        })
+        if response.status_code != 200:
+            raise SearchError(f"Error: API returned status code {response.status_code}")
+
+        return [
+            {'title': item.get('title', ''), 'link': item.get('link', '')}
+            for item in response.json().get('items', [])
+        ]
+
+    async def _get_block(self, query: str, start: int) -> List[Dict]:
+        """A cached block of results, fetching it at most once at a time"""
+        key = (normalize_query(query), start)
+        cached = self.cache.get(key)
+        if cached is not MISSING:
+            self.stats['cache_hits'] += 1
+            return cached
+
+        if key in self._inflight:
+            self.stats['coalesced'] += 1
+            # Shielded so a cancelled waiter doesn't cancel the fetch for everyone else
+            return await asyncio.shield(self._inflight[key])
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            items = await self._fetch_block(query, start)
+        except Exception as e:
+            self.stats['errors'] += 1
+            future.set_exception(e)
+            future.exception()  # Mark retrieved in case nobody else was waiting
+            raise
+        except BaseException:
+            # Cancelled leader: release coalesced waiters instead of leaving them on a future that never resolves
+            future.cancel()
+            raise
+        else:
+            self.cache.set(key, items)
+            future.set_result(items)
+            return items
+        finally:
+            del self._inflight[key]
+
+    async def _get_results(self, query: str, first: int, count: int) -> List[Dict]:
+        """Results first..first+count-1 (0-based), from as many blocks as they span"""
+        results = []
+        block_start = first - first % SEARCH_BLOCK_SIZE
+        while len(results) < count and block_start < SEARCH_MAX_RESULTS:
+            block = await self._get_block(query, block_start + 1)
+            offset = max(0, first - block_start)
+            results.extend(block[offset:offset + count - len(results)])
+            if len(block) < SEARCH_BLOCK_SIZE:
+                break
+            block_start += SEARCH_BLOCK_SIZE
+        return results
+
+    async def search(self, query: str, page: int = 1, chat_id: str = None) -> str:
+        """
+        Search Google and format one page of results.
+
+        Args:
+            query (str): Search query
+            page (int): 1-based page of SEARCH_RESULTS_PER_PAGE results
+            chat_id (str): Chat to remember the page for, so /googlemore can continue it
+
+        Returns:
+            str: Formatted search results or error message
+        """
+        if not query:
+            return "Please provide a search query."
+
+        if not os.getenv("GOOGLE_API_KEY") or not os.getenv('GOOGLE_CSE_ID', ''):
+            return "Google Search API is not configured. Please set GOOGLE_API_KEY and GOOGLE_CSE_ID in the .env file."
+
+        first = (page - 1) * SEARCH_RESULTS_PER_PAGE
+        try:
+            items = await self._get_results(query, first, SEARCH_RESULTS_PER_PAGE)
+        except SearchError as e:
+            return str(e)
+        except Exception as e:
+            return f"Search error: {str(e)}"
+
+        if not items:
+            return "No search results found for that query." if page == 1 else "No more results for that query."
+
+        if chat_id is not None:
+            self._last_page[chat_id] = (query, page)
+
+        results = [
+            f"{first + i + 1}. {item['title']}\n   {item['link']}"
+            for i, item in enumerate(items)
+        ]
+        header = f"Top results for '{query}':" if page == 1 else f"More results for '{query}':"
+        footer = "\n\nSend /googlemore for the next results." if first + len(items) < SEARCH_MAX_RESULTS else ""
+        return f"{header}\n\n" + "\n\n".join(results) + footer
+
+    async def more(self, chat_id: str) -> str:
+        """Next page of the last search made in a chat"""
+        last = self._last_page.get(chat_id)
+        if last is None:
+            return "Nothing to continue. Search with /google <query> first."
+        query, page = last
+        return await self.search(query, page + 1, chat_id)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Quota and cache counters"""
+        self._roll_quota_day()
+        return {**self.stats, 'quota': SEARCH_DAILY_QUOTA, 'cached_blocks': len(self.cache)}
+
+# Singleton instance
+search_service = SearchService()
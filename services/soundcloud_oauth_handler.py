@@ -1,8 +1,8 @@
-import requests
 import json
 import os
 from typing import Optional, Dict
 from urllib.parse import urlencode, parse_qs, urlparse
+from utils.http_client import http_client
 
 class SoundCloudOAuthHandler:
     """Handle SoundCloud OAuth2 authentication flows"""
@@ -13,7 +13,7 @@ class SoundCloudOAuthHandler:
         self.redirect_uri = os.getenv('SOUNDCLOUD_REDIRECT_URI', 'localhost:8080/callback')
         self.token_file = os.path.join(os.path.dirname(__file__), '../data/soundcloud_token.json')
         
-    def get_client_credentials_token(self) -> Optional[str]:
+    async def get_client_credentials_token(self) -> Optional[str]:
         """
         Get access token using Client Credentials flow (for app-only access)
         This doesn't require user authorization and works for public data
@@ -51,7 +51,7 @@ class SoundCloudOAuthHandler:
                 
                 print(f"Trying client credentials with scope: {scope if scope is not None else 'no scope'}")
                 
-                response = requests.post(url, data=data, headers=headers)
+                response = await http_client.post(url, data=data, headers=headers)
                 
                 if response.status_code == 200:
                     token_data = response.json()
@@ -90,7 +90,7 @@ class SoundCloudOAuthHandler:
         auth_url = f"https://soundcloud.com/connect?{urlencode(params)}"
         return auth_url
     
-    def exchange_code_for_token(self, auth_code: str) -> Optional[str]:
+    async def exchange_code_for_token(self, auth_code: str) -> Optional[str]:
         """
         Exchange authorization code for access token
         (For user authorization flow)
@@ -120,7 +120,7 @@ class SoundCloudOAuthHandler:
             print(f"- Redirect URI: http://{self.redirect_uri}")
             print(f"- Code length: {len(auth_code)}")
             
-            response = requests.post(url, data=data, headers=headers)
+            response = await http_client.post(url, data=data, headers=headers)
             
             print(f"Token exchange response status: {response.status_code}")
             print(f"Response headers: {dict(response.headers)}")
@@ -178,11 +178,11 @@ class SoundCloudOAuthHandler:
             return token_data.get('access_token')
         return None
     
-    def test_token(self, token: str) -> bool:
+    async def test_token(self, token: str) -> bool:
         """Test if a token is valid"""
         try:
             headers = {'Authorization': f'OAuth {token}'}
-            response = requests.get('https://api.soundcloud.com/me', headers=headers)
+            response = await http_client.get('https://api.soundcloud.com/me', headers=headers)
             return response.status_code == 200
         except:
             return False
\ No newline at end of file
@@ -1,9 +1,17 @@
-import requests
-import json
+import asyncio
 import os
+import httpx
+from urllib.parse import urlsplit
 from typing import List, Dict, Optional, Set
 from datetime import datetime, timedelta
 from dataclasses import dataclass
+from data.storage import get_storage
+from data.persistence import persistence_manager
+from utils.http_client import http_client
+from config.constants import SOUNDCLOUD_POLL_CONCURRENCY, SOUNDCLOUD_RATE_LIMIT
+
+# Known track IDs are stored one row per tracked artist, so a poll only rewrites artists with new uploads
+KNOWN_TRACKS_NAMESPACE = 'soundcloud_known_tracks'
 
 @dataclass
 class SoundCloudTrack:
@@ -24,9 +32,16 @@ class SoundCloudService:
         self.client_id = os.getenv('SOUNDCLOUD_CLIENT_ID')
         self.client_secret = os.getenv('SOUNDCLOUD_CLIENT_SECRET')
         self.access_token = os.getenv('SOUNDCLOUD_ACCESS_TOKEN')
+        # Serializes token fetches so concurrent polls don't each request a new token
+        self._token_lock = asyncio.Lock()
         self.base_url = 'https://api.soundcloud.com'
         self.api_v2_url = 'https://api-v2.soundcloud.com'
-        self.data_path = os.path.join(os.path.dirname(__file__), '../data/soundcloud_tracking.json')
+        for url in (self.base_url, self.api_v2_url):
+            http_client.configure_host(urlsplit(url).netloc, concurrency=SOUNDCLOUD_POLL_CONCURRENCY,
+                                       rate=SOUNDCLOUD_RATE_LIMIT)
+        self.storage = get_storage()
+        persistence_manager.register('soundcloud_tracking', self._serialize_tracking_field)
+        persistence_manager.register(KNOWN_TRACKS_NAMESPACE, self._serialize_known_tracks)
         self.tracking_data = self._load_tracking_data()
         
         # Initialize OAuth handler
@@ -41,21 +56,45 @@ class SoundCloudService:
         if not self.access_token and self.oauth_handler:
             # 1. Try saved token first
             self.access_token = self.oauth_handler.get_saved_token()
-            
-            # 2. If no saved token, try client credentials
-            if not self.access_token and self.client_id and self.client_secret:
-                print("No saved token found, attempting Client Credentials flow...")
-                self.access_token = self.oauth_handler.get_client_credentials_token()
         
-        if not self.access_token:
+        # 2. If no saved token, the Client Credentials flow runs on the first API call
+        self._client_token_pending = bool(
+            not self.access_token and self.oauth_handler and self.client_id and self.client_secret
+        )
+        
+        if not self.access_token and not self._client_token_pending:
             print("No valid access token available")
         
         if not self.client_id:
             print("Warning: SOUNDCLOUD_CLIENT_ID not found in environment variables")
             print("SoundCloud functionality will be limited")
     
+    async def _ensure_access_token(self) -> Optional[str]:
+        """Fetch a Client Credentials token once if none was available at startup"""
+        if self._client_token_pending:
+            async with self._token_lock:
+                # Another request may have fetched it while we waited for the lock
+                if self._client_token_pending:
+                    print("No saved token found, attempting Client Credentials flow...")
+                    self.access_token = await self.oauth_handler.get_client_credentials_token()
+                    self._client_token_pending = False
+                    if not self.access_token:
+                        print("No valid access token available")
+        return self.access_token
+    
+    async def _refresh_access_token(self, rejected_token: Optional[str]) -> Optional[str]:
+        """Replace a token the API rejected; concurrent 401s for the same token share one refresh"""
+        async with self._token_lock:
+            if self.access_token != rejected_token:
+                return self.access_token
+            print("Attempting to refresh access token...")
+            new_token = await self.oauth_handler.get_client_credentials_token()
+            if new_token:
+                self.access_token = new_token
+            return new_token
+
     def _load_tracking_data(self) -> Dict:
-        """Load tracking data from file"""
+        """Load tracking data from storage"""
         default_data = {
             "tracked_users": {},
             "last_check": None,
@@ -65,53 +104,58 @@ class SoundCloudService:
             "my_followers": {}  # {user_id: {username, display_name}}
         }
 
-        if os.path.exists(self.data_path):
-            try:
-                with open(self.data_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-
-                # Convert known_tracks lists back to sets for efficient lookup
-                if "known_tracks" in data:
-                    for user_id, tracks in data["known_tracks"].items():
-                        if isinstance(tracks, list):
-                            data["known_tracks"][user_id] = set(tracks)
-
-                # Ensure new fields exist
-                if "my_account" not in data:
-                    data["my_account"] = None
-                if "my_stats_history" not in data:
-                    data["my_stats_history"] = []
-                if "my_followers" not in data:
-                    data["my_followers"] = {}  # {user_id: {username, display_name}}
-
-                return data
-            except Exception as e:
-                print(f"Error loading SoundCloud tracking data: {e}")
-                return default_data
-        return default_data
-    
-    def _save_tracking_data(self):
-        """Save tracking data to file"""
         try:
-            os.makedirs(os.path.dirname(self.data_path), exist_ok=True)
-            
-            # Create a copy of tracking data for JSON serialization
-            data_to_save = self.tracking_data.copy()
-            
-            # Convert sets to lists for JSON serialization
-            if "known_tracks" in data_to_save:
-                data_to_save["known_tracks"] = {
-                    user_id: list(tracks) if isinstance(tracks, set) else tracks
-                    for user_id, tracks in data_to_save["known_tracks"].items()
-                }
-            
-            with open(self.data_path, 'w', encoding='utf-8') as f:
-                json.dump(data_to_save, f, indent=2, ensure_ascii=False)
-                
+            data = self.storage.load('soundcloud_tracking')
+            known_tracks = self.storage.load(KNOWN_TRACKS_NAMESPACE)
+
+            # Older data kept every artist's known tracks in one row; split it into per-artist rows
+            legacy_known_tracks = data.pop("known_tracks", None)
+            if legacy_known_tracks is not None:
+                for user_id, tracks in legacy_known_tracks.items():
+                    known_tracks.setdefault(user_id, tracks)
+                self._save_known_tracks(legacy_known_tracks.keys())
+                persistence_manager.mark_dirty('soundcloud_tracking', "known_tracks")
+
+            # Convert known_tracks lists back to sets for efficient lookup
+            data["known_tracks"] = {user_id: set(tracks) for user_id, tracks in known_tracks.items()}
+
+            # Ensure all fields exist
+            for key, value in default_data.items():
+                data.setdefault(key, value)
+
+            return data
         except Exception as e:
-            print(f"Error saving SoundCloud tracking data: {e}")
+            print(f"Error loading SoundCloud tracking data: {e}")
+            return default_data
+    
+    def _serialize_tracking_field(self, key: str):
+        """Get a top-level tracking field in its stored (JSON) form"""
+        if key == "known_tracks":
+            # Stored per artist in KNOWN_TRACKS_NAMESPACE
+            return None
+        return self.tracking_data.get(key)
+    
+    def _serialize_known_tracks(self, user_id: str) -> Optional[List[int]]:
+        """Get one artist's known track IDs as a JSON list (None once untracked)"""
+        tracks = self.tracking_data["known_tracks"].get(user_id)
+        return sorted(tracks) if tracks is not None else None
+    
+    def _save_tracking_data(self, keys: List[str] = None):
+        """
+        Mark tracking data as changed so the next flush writes it
+        
+        Args:
+            keys (List[str]): Top-level fields that changed; marks every field if omitted
+        """
+        for key in keys or [key for key in self.tracking_data if key != "known_tracks"]:
+            persistence_manager.mark_dirty('soundcloud_tracking', key)
+    
+    def _save_known_tracks(self, user_ids):
+        """Mark the known tracks of these artists as changed"""
+        for user_id in user_ids:
+            persistence_manager.mark_dirty(KNOWN_TRACKS_NAMESPACE, user_id)
 
-    def add_user_to_track(self, username: str, display_name: str = None) -> bool:
+    async def add_user_to_track(self, username: str, display_name: str = None) -> bool:
         """
         Add a SoundCloud user to track for new uploads
         
@@ -128,7 +172,7 @@ class SoundCloudService:
         
         try:
             # Get user info from SoundCloud API
-            user_info = self._get_user_info(username)
+            user_info = await self._get_user_info(username)
             
             if not user_info:
                 print(f"Could not find user {username}")
@@ -148,13 +192,14 @@ class SoundCloudService:
             if user_id not in self.tracking_data["known_tracks"]:
                 self.tracking_data["known_tracks"][user_id] = set()
                 # Get existing tracks to avoid notifying about old content
-                existing_tracks = self._get_user_tracks(user_id)
+                existing_tracks = await self._get_user_tracks(user_id)
                 
                 print(f"Found {len(existing_tracks)} existing tracks for {username}")
                 for track in existing_tracks:
                     self.tracking_data["known_tracks"][user_id].add(track.id)
             
-            self._save_tracking_data()
+            self._save_tracking_data(["tracked_users"])
+            self._save_known_tracks([user_id])
             print(f"Successfully added {username} to tracking")
             return True
             
@@ -177,7 +222,8 @@ class SoundCloudService:
             del self.tracking_data["tracked_users"][user_id_to_remove]
             if user_id_to_remove in self.tracking_data["known_tracks"]:
                 del self.tracking_data["known_tracks"][user_id_to_remove]
-            self._save_tracking_data()
+            self._save_tracking_data(["tracked_users"])
+            self._save_known_tracks([user_id_to_remove])
             return True
         return False
     
@@ -185,52 +231,69 @@ class SoundCloudService:
         """Get list of currently tracked users"""
         return self.tracking_data["tracked_users"].copy()
     
-    def check_for_new_tracks(self) -> List[Dict]:
+    async def check_for_new_tracks(self) -> List[Dict]:
         """
         Check all tracked users for new tracks
         
+        Users are polled concurrently (at most SOUNDCLOUD_POLL_CONCURRENCY at
+        a time), and the results are merged into known_tracks afterwards.
+        
         Returns:
             List[Dict]: List of new tracks with user info
         """
-        if not self.access_token:
+        if not await self._ensure_access_token():
             print("No access token available for checking tracks")
             return []
         
+        tracked_users = list(self.tracking_data["tracked_users"].items())
+        limit = asyncio.Semaphore(SOUNDCLOUD_POLL_CONCURRENCY)
+        
+        async def poll(user_id: str) -> Optional[List[SoundCloudTrack]]:
+            async with limit:
+                try:
+                    # Get recent tracks for this user
+                    return await self._get_user_tracks(user_id, limit=20)
+                except Exception as e:
+                    print(f"Error checking tracks for user {user_id}: {e}")
+                    return None
+        
+        results = await asyncio.gather(*(poll(user_id) for user_id, _ in tracked_users))
+        
         new_tracks = []
+        changed_users = []
         
-        for user_id, user_data in self.tracking_data["tracked_users"].items():
-            try:
-                # Get recent tracks for this user
-                tracks = self._get_user_tracks(user_id, limit=20)
-                
-                # Ensure known_tracks is a set
-                if user_id not in self.tracking_data["known_tracks"]:
-                    self.tracking_data["known_tracks"][user_id] = set()
-                elif isinstance(self.tracking_data["known_tracks"][user_id], list):
-                    # Convert from list to set (backwards compatibility)
-                    self.tracking_data["known_tracks"][user_id] = set(self.tracking_data["known_tracks"][user_id])
-                
-                known_track_ids = self.tracking_data["known_tracks"][user_id]
-                
-                # Check for new tracks
-                for track in tracks:
-                    if track.id not in known_track_ids:
-                        # This is a new track!
-                        new_tracks.append({
-                            "track": track,
-                            "user_data": user_data
-                        })
-                        
-                        # Add to known tracks
-                        known_track_ids.add(track.id)
-                
-            except Exception as e:
-                print(f"Error checking tracks for user {user_id}: {e}")
+        for (user_id, user_data), tracks in zip(tracked_users, results):
+            # Skip failed polls and users untracked while the poll was running
+            if tracks is None or user_id not in self.tracking_data["tracked_users"]:
                 continue
+            
+            # Ensure known_tracks is a set
+            if user_id not in self.tracking_data["known_tracks"]:
+                self.tracking_data["known_tracks"][user_id] = set()
+            elif isinstance(self.tracking_data["known_tracks"][user_id], list):
+                # Convert from list to set (backwards compatibility)
+                self.tracking_data["known_tracks"][user_id] = set(self.tracking_data["known_tracks"][user_id])
+            
+            known_track_ids = self.tracking_data["known_tracks"][user_id]
+            if any(track.id not in known_track_ids for track in tracks):
+                changed_users.append(user_id)
+            
+            # Check for new tracks
+            for track in tracks:
+                if track.id not in known_track_ids:
+                    # This is a new track!
+                    new_tracks.append({
+                        "track": track,
+                        "user_data": user_data
+                    })
+                    
+                    # Add to known tracks
+                    known_track_ids.add(track.id)
         
         # Update last check time and save
         self.tracking_data["last_check"] = datetime.now().isoformat()
-        self._save_tracking_data()
+        self._save_tracking_data(["last_check"])
+        self._save_known_tracks(changed_users)
         
         return new_tracks
     
@@ -263,33 +326,32 @@ class SoundCloudService:
         
         return message
     
-    def _make_api_request(self, url: str, params: Dict = None) -> Optional[Dict]:
+    async def _make_api_request(self, url: str, params: Dict = None) -> Optional[Dict]:
         """Make authenticated API request"""
+        token = await self._ensure_access_token()
         headers = {}
-        if self.access_token:
-            headers['Authorization'] = f'OAuth {self.access_token}'
+        if token:
+            headers['Authorization'] = f'OAuth {token}'
         
         if params is None:
             params = {}
         
         # Add client_id as fallback
-        if not self.access_token and self.client_id:
+        if not token and self.client_id:
             params['client_id'] = self.client_id
         
         try:
-            response = requests.get(url, params=params, headers=headers, timeout=10)
+            response = await http_client.get(url, params=params, headers=headers)
             if response.status_code == 200:
                 return response.json()
             elif response.status_code == 401:
                 print(f"Authentication failed for SoundCloud API. Status: {response.status_code}")
                 # Try to refresh token if we have OAuth handler
                 if hasattr(self, 'oauth_handler') and self.oauth_handler:
-                    print("Attempting to refresh access token...")
-                    new_token = self.oauth_handler.get_client_credentials_token()
+                    new_token = await self._refresh_access_token(token)
                     if new_token:
-                        self.access_token = new_token
                         headers['Authorization'] = f'OAuth {new_token}'
-                        response = requests.get(url, params=params, headers=headers, timeout=10)
+                        response = await http_client.get(url, params=params, headers=headers)
                         if response.status_code == 200:
                             return response.json()
                 print(f"Authentication still failing. Token may need manual refresh.")
@@ -297,14 +359,14 @@ class SoundCloudService:
             else:
                 print(f"SoundCloud API error: {response.status_code} - {response.text}")
                 return None
-        except requests.exceptions.Timeout:
+        except httpx.TimeoutException:
             print(f"Request timed out for URL: {url}")
             return None
         except Exception as e:
             print(f"Error making API request: {e}")
             return None
     
-    def _get_user_info(self, username: str) -> Optional[Dict]:
+    async def _get_user_info(self, username: str) -> Optional[Dict]:
         """Get user information from SoundCloud API"""
         # Try multiple API endpoints and methods
         endpoints_to_try = [
@@ -327,7 +389,7 @@ class SoundCloudService:
         
         for method in endpoints_to_try:
             try:
-                result = self._make_api_request(method['url'], method['params'])
+                result = await self._make_api_request(method['url'], method['params'])
                 if result:
                     # Handle different response formats
                     if isinstance(result, list) and len(result) > 0:
@@ -351,7 +413,7 @@ class SoundCloudService:
         print(f"Could not find user {username} on any SoundCloud API endpoint")
         return None
     
-    def _get_user_tracks(self, user_id: str, limit: int = 50) -> List[SoundCloudTrack]:
+    async def _get_user_tracks(self, user_id: str, limit: int = 50) -> List[SoundCloudTrack]:
         """Get tracks for a specific user"""
         # Try multiple methods to get user tracks
         methods_to_try = [
@@ -374,7 +436,7 @@ class SoundCloudService:
         
         for method in methods_to_try:
             try:
-                data = self._make_api_request(method['url'], method['params'])
+                data = await self._make_api_request(method['url'], method['params'])
                 if data:
                     tracks = []
                     
@@ -414,9 +476,9 @@ class SoundCloudService:
         print(f"Could not fetch tracks for user {user_id} from any endpoint")
         return []
 
-    def set_my_account(self, username: str) -> bool:
+    async def set_my_account(self, username: str) -> bool:
         """Set the account to track stats for (your own account)"""
-        user_info = self._get_user_info(username)
+        user_info = await self._get_user_info(username)
         if user_info:
             self.tracking_data["my_account"] = {
                 "user_id": str(user_info['id']),
@@ -424,12 +486,12 @@ class SoundCloudService:
                 "display_name": user_info.get('full_name', username),
                 "permalink_url": user_info.get('permalink_url', f"https://soundcloud.com/{username}")
             }
-            self._save_tracking_data()
+            self._save_tracking_data(["my_account"])
             print(f"Set my account to: {username}")
             return True
         return False
 
-    def _get_my_followers(self) -> Dict[str, Dict]:
+    async def _get_my_followers(self) -> Dict[str, Dict]:
         """Fetch current followers list from SoundCloud API"""
         if not self.tracking_data.get("my_account"):
             return {}
@@ -443,7 +505,7 @@ class SoundCloudService:
             params = {"limit": 200, "linked_partitioning": 1}
 
             while next_href:
-                data = self._make_api_request(next_href, params if "?" not in next_href else None)
+                data = await self._make_api_request(next_href, params if "?" not in next_href else None)
                 if not data:
                     break
 
@@ -464,7 +526,7 @@ class SoundCloudService:
 
         return followers
 
-    def _get_track_likers(self, track_id: int) -> Dict[str, Dict]:
+    async def _get_track_likers(self, track_id: int) -> Dict[str, Dict]:
         """Fetch users who liked a specific track"""
         likers = {}
 
@@ -473,7 +535,7 @@ class SoundCloudService:
             params = {"limit": 200, "linked_partitioning": 1}
 
             while next_href:
-                data = self._make_api_request(next_href, params if "?" not in next_href else None)
+                data = await self._make_api_request(next_href, params if "?" not in next_href else None)
                 if not data:
                     break
 
@@ -493,7 +555,7 @@ class SoundCloudService:
 
         return likers
 
-    def get_my_account_stats(self) -> Optional[Dict]:
+    async def get_my_account_stats(self) -> Optional[Dict]:
         """Get current stats for my account - per-track stats for detecting changes"""
         if not self.tracking_data.get("my_account"):
             return None
@@ -502,15 +564,15 @@ class SoundCloudService:
 
         try:
             # Get user info for follower count
-            user_info = self._make_api_request(f"{self.base_url}/users/{user_id}")
+            user_info = await self._make_api_request(f"{self.base_url}/users/{user_id}")
             if not user_info:
                 return None
 
             # Get per-track stats
             track_stats = {}
-            tracks = self._get_user_tracks(user_id, limit=50)
+            tracks = await self._get_user_tracks(user_id, limit=50)
             for track in tracks:
-                track_data = self._make_api_request(f"{self.base_url}/tracks/{track.id}")
+                track_data = await self._make_api_request(f"{self.base_url}/tracks/{track.id}")
                 if track_data:
                     track_stats[str(track.id)] = {
                         "title": track.title,
@@ -531,9 +593,9 @@ class SoundCloudService:
             print(f"Error getting my account stats: {e}")
             return None
 
-    def get_stats_changes(self) -> Optional[Dict]:
+    async def get_stats_changes(self) -> Optional[Dict]:
         """Compare current stats with previous stats and return specific changes"""
-        current_stats = self.get_my_account_stats()
+        current_stats = await self.get_my_account_stats()
         if not current_stats:
             return None
 
@@ -549,7 +611,7 @@ class SoundCloudService:
         }
 
         # Get current followers list and compare with stored list
-        current_followers = self._get_my_followers()
+        current_followers = await self._get_my_followers()
         stored_followers = self.tracking_data.get("my_followers", {})
 
         if current_followers:
@@ -603,7 +665,7 @@ class SoundCloudService:
                     # Try to get who liked the track (only if there are new likes)
                     if new_likes > 0:
                         try:
-                            current_likers = self._get_track_likers(int(track_id))
+                            current_likers = await self._get_track_likers(int(track_id))
                             # We could store previous likers, but for now just show new likers count
                             # Getting specific new likers would require storing liker lists per track
                             # which might be expensive for many tracks
@@ -617,7 +679,7 @@ class SoundCloudService:
         if len(history) > 30:
             history = history[-30:]
         self.tracking_data["my_stats_history"] = history
-        self._save_tracking_data()
+        self._save_tracking_data(["my_stats_history", "my_followers"])
 
         return changes
 
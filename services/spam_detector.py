@@ -0,0 +1,81 @@
+from collections import OrderedDict, deque
+from typing import Deque
+from config.constants import SPAM_THRESHOLD, SPAM_TIMEFRAME, SPAM_STATE_TTL
+
+class SenderState:
+    """Recent message times for one user in one chat (warnings live in the persisted WarningLedger)"""
+    __slots__ = ('timestamps', 'last_active')
+
+    def __init__(self):
+        self.timestamps: Deque[float] = deque()
+        self.last_active = 0.0
+
+class SpamDetector:
+    """
+    Sliding-window message rate per (chat_id, user_id). Each message is an
+    amortized O(1) append/popleft, and senders are kept in least-recently-active
+    order so idle ones can be evicted from the front without scanning everyone.
+    """
+
+    def __init__(self, threshold: int = SPAM_THRESHOLD, timeframe: float = SPAM_TIMEFRAME,
+                 idle_ttl: float = SPAM_STATE_TTL):
+        self.threshold = threshold
+        self.timeframe = timeframe
+        self.idle_ttl = idle_ttl
+        # (chat_id, user_id) -> SenderState, least recently active first
+        self.senders: OrderedDict = OrderedDict()
+
+    def _touch(self, chat_id: str, user_id: str, now: float) -> SenderState:
+        """Get (or create) a sender's state and mark it as the most recently active"""
+        key = (chat_id, user_id)
+        state = self.senders.get(key)
+        if state is None:
+            state = self.senders[key] = SenderState()
+        else:
+            self.senders.move_to_end(key)
+        state.last_active = now
+        return state
+
+    def _expire(self, state: SenderState, now: float) -> None:
+        timestamps = state.timestamps
+        while timestamps and now - timestamps[0] > self.timeframe:
+            timestamps.popleft()
+
+    def record_message(self, chat_id: str, user_id: str, now: float) -> bool:
+        """
+        Record a message and check if the sender is spamming
+
+        Returns:
+            bool: True if the sender reached the threshold within the timeframe
+        """
+        state = self._touch(chat_id, user_id, now)
+        state.timestamps.append(now)
+        self._expire(state, now)
+        return len(state.timestamps) >= self.threshold
+
+    def message_count(self, chat_id: str, user_id: str) -> int:
+        """Number of messages from the sender inside the current window"""
+        state = self.senders.get((chat_id, user_id))
+        return len(state.timestamps) if state else 0
+
+    def sweep(self, now: float) -> int:
+        """
+        Evict senders idle for longer than the TTL
+
+        Returns:
+            int: Number of evicted senders
+        """
+        evicted = 0
+        while self.senders:
+            key, state = next(iter(self.senders.items()))
+            if now - state.last_active <= self.idle_ttl:
+                break
+            del self.senders[key]
+            evicted += 1
+        return evicted
+
+    def __len__(self) -> int:
+        return len(self.senders)
+
+# Singleton instance
+spam_detector = SpamDetector()
@@ -0,0 +1,68 @@
+import random
+from typing import Dict, List
+from config.constants import AUTO_KICK_THRESHOLD, SPAM_TIMEFRAME
+from services.lyrics_service import lyrics_service
+
+# Warning templates by escalation level, the last level is used for every later warning.
+# Fields: {name}, {count} (messages in the window), {seconds}, {left} (warnings left before a kick)
+WARNING_TEMPLATES: Dict[int, List[str]] = {
+    1: [
+        "{name}, lugna ner dig lite! {count} meddelanden på {seconds} sekunder är för mycket.",
+        "hallå {name}, ta det lugnt med spammandet 🙄",
+        "{name}, sluta spamma! {count} meddelanden på {seconds} sekunder...",
+    ],
+    2: [
+        "{name}, andra varningen nu. sluta spamma eller så åker du ut!",
+        "{name}, jag menar allvar. {left} varning kvar innan jag kickar dig.",
+        "seriöst {name}? {count} meddelanden igen. nästa gång blir det kick.",
+    ],
+    3: [
+        "{name}, nu räcker det. sista varningen!",
+        "okej {name}, du bad om det.",
+    ],
+}
+
+# First warnings for repeated copies of the same text
+DUPLICATE_TEMPLATES: List[str] = [
+    "{name}, du har redan skrivit det där. sluta klistra in samma sak!",
+    "{name}, samma meddelande om och om igen? nej tack.",
+]
+
+class SpamWarningEngine:
+    """Renders escalating spam warnings locally, without waiting for the LLM"""
+
+    def __init__(self, templates: Dict[int, List[str]] = None, duplicate_templates: List[str] = None):
+        templates = templates or WARNING_TEMPLATES
+        self.max_level = max(templates)
+        # Bound format methods, so rendering is a single call per warning
+        self._renderers = {level: [template.format for template in lines] for level, lines in templates.items()}
+        self._duplicate_renderers = [template.format for template in duplicate_templates or DUPLICATE_TEMPLATES]
+
+    def render(self, user_name: str, warning_count: int, message_count: int, duplicate: bool = False) -> str:
+        """
+        Render a warning for the given escalation level
+
+        Args:
+            user_name (str): Name of the spammer
+            warning_count (int): Which warning this is (1-based)
+            message_count (int): Messages sent within the spam timeframe
+            duplicate (bool): Flagged for repeating the same text rather than for rate
+
+        Returns:
+            str: Warning text followed by a kick line from the lyrics
+        """
+        level = min(max(warning_count, 1), self.max_level)
+        if duplicate and level == 1:
+            render = random.choice(self._duplicate_renderers)
+        else:
+            render = random.choice(self._renderers[level])
+        warning = render(
+            name=user_name,
+            count=message_count,
+            seconds=SPAM_TIMEFRAME,
+            left=max(AUTO_KICK_THRESHOLD - warning_count, 0)
+        )
+        return f"{warning} {lyrics_service.get_kick_line()}"
+
+# Singleton instance
+spam_warning_engine = SpamWarningEngine()
@@ -1,65 +1,120 @@
-import json
-import os
-from typing import Dict, Optional, List
+import time
+from typing import Dict, Optional, List, Tuple
 from telegram import Update, User
 from datetime import datetime
+from data.storage import get_storage
+from data.persistence import persistence_manager
+from utils.text_index import TextIndex
+from utils.sorted_index import SortedIndex
+from utils.top_k import TopK
+
+# Number of most active users kept ranked for /stats
+TOP_USERS_TRACKED = 10
 
 class UserService:
     """Service for managing user information"""
     
     def __init__(self):
-        self.data_path = os.path.join(os.path.dirname(__file__), '../data/users.json')
+        self.storage = get_storage()
         self.users = self._load_users()
+        persistence_manager.register('users', self.users.get)
+        
+        # Lowercased names for /whois and /rep lookups, kept current by update_user
+        self.search_index = TextIndex()
+        # Lowercased username -> user_id, for @name lookups
+        self.username_index: Dict[str, str] = {}
+        # Users ordered by last_seen (epoch seconds), and the most active users by message count
+        self.last_seen_index = SortedIndex()
+        self.top_users = TopK(TOP_USERS_TRACKED)
+        self.total_messages = 0
+        
+        for user_id, user_data in self.users.items():
+            self._migrate_last_seen(user_id, user_data)
+        for user_id, user_data in self.users.items():
+            self._index_user(user_id, user_data)
+            self._index_username(user_id, None, user_data.get('username'), user_data.get('last_seen') or 0)
+            if user_data.get('last_seen') is not None:
+                self.last_seen_index.update(user_id, user_data['last_seen'])
+            self.top_users.update(user_id, user_data.get('message_count', 0))
+            self.total_messages += user_data.get('message_count', 0)
     
-    def _load_users(self) -> Dict[str, Dict]:
-        """Load users from file"""
-        if os.path.exists(self.data_path):
+    def _migrate_last_seen(self, user_id: str, user_data: Dict) -> None:
+        """Convert an ISO last_seen from older data to epoch seconds"""
+        last_seen = user_data.get('last_seen')
+        if isinstance(last_seen, str):
             try:
-                with open(self.data_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except Exception as e:
-                print(f"Error loading users: {e}")
-                return {}
-        return {}
-    
-    def _save_users(self):
-        """Save users to file"""
+                user_data['last_seen'] = datetime.fromisoformat(last_seen).timestamp()
+            except ValueError:
+                user_data['last_seen'] = None
+            persistence_manager.mark_dirty('users', user_id)
+    
+    def _index_user(self, user_id: str, user_data: Dict) -> None:
+        self.search_index.update(user_id, (
+            user_data.get('first_name'),
+            user_data.get('last_name'),
+            user_data.get('username')
+        ))
+    
+    def _index_username(self, user_id: str, old_username: Optional[str], new_username: Optional[str],
+                        seen_at: float) -> None:
+        """
+        Point a username at a user. Telegram usernames can move to another
+        account, so when two users claim the same name the most recently seen wins.
+        """
+        if old_username and old_username.lower() != (new_username or '').lower():
+            if self.username_index.get(old_username.lower()) == user_id:
+                del self.username_index[old_username.lower()]
+        
+        if not new_username:
+            return
+        key = new_username.lower()
+        holder = self.username_index.get(key)
+        if holder and holder != user_id:
+            holder_seen = self.users.get(holder, {}).get('last_seen') or 0
+            if holder_seen > seen_at:
+                return
+        self.username_index[key] = user_id
+    
+    def _load_users(self) -> Dict[str, Dict]:
+        """Load users from storage"""
         try:
-            # Ensure directory exists
-            os.makedirs(os.path.dirname(self.data_path), exist_ok=True)
-            with open(self.data_path, 'w', encoding='utf-8') as f:
-                json.dump(self.users, f, indent=2, ensure_ascii=False)
+            return self.storage.load('users')
         except Exception as e:
-            print(f"Error saving users: {e}")
+            print(f"Error loading users: {e}")
+            return {}
     
     def update_user(self, user: User) -> None:
         """Update user information"""
         user_id = str(user.id)
-        current_time = datetime.now().isoformat()
+        now = time.time()
         
         # Create or update user record
         if user_id not in self.users:
             self.users[user_id] = {
-                'first_seen': current_time,
+                'first_seen': datetime.now().isoformat(),
                 'message_count': 0
             }
         
+        self._index_username(user_id, self.users[user_id].get('username'), user.username, now)
+        
         # Update user info
         self.users[user_id].update({
             'first_name': user.first_name,
             'last_name': user.last_name,
             'username': user.username,
-            'last_seen': current_time,
+            'last_seen': now,
             'is_bot': user.is_bot,
             'language_code': user.language_code
         })
         
         # Increment message count
         self.users[user_id]['message_count'] = self.users[user_id].get('message_count', 0) + 1
+        self.total_messages += 1
+        persistence_manager.mark_dirty('users', user_id)
         
-        # Save periodically (every 10 updates)
-        if self.users[user_id]['message_count'] % 10 == 0:
-            self._save_users()
+        self._index_user(user_id, self.users[user_id])
+        self.last_seen_index.update(user_id, now)
+        self.top_users.update(user_id, self.users[user_id]['message_count'])
     
     def get_user(self, user_id: str) -> Optional[Dict]:
         """Get user information by ID"""
@@ -83,39 +138,43 @@ class UserService:
         """Get all users"""
         return self.users.copy()
     
+    def get_user_count(self) -> int:
+        """Number of known users"""
+        return len(self.users)
+    
     def get_active_users(self, days: int = 30) -> Dict[str, Dict]:
         """Get users active in the last N days"""
-        from datetime import datetime, timedelta
-        cutoff = datetime.now() - timedelta(days=days)
-        
-        active_users = {}
-        for user_id, user_data in self.users.items():
-            if user_data.get('last_seen'):
-                try:
-                    last_seen = datetime.fromisoformat(user_data['last_seen'])
-                    if last_seen > cutoff:
-                        active_users[user_id] = user_data
-                except:
-                    pass
-        
-        return active_users
+        cutoff = time.time() - days * 86400
+        return {user_id: self.users[user_id] for user_id in self.last_seen_index.members_at_least(cutoff)}
+    
+    def count_active_users(self, days: int = 30) -> int:
+        """Count users active in the last N days"""
+        return self.last_seen_index.count_at_least(time.time() - days * 86400)
+    
+    def get_top_users(self, limit: int = 5) -> List[Tuple[str, Dict]]:
+        """Get the users with the most messages"""
+        return [(user_id, self.users[user_id]) for user_id, _ in self.top_users.top(limit)]
+    
+    def get_user_id_by_username(self, username: str) -> Optional[str]:
+        """Look up a user ID by username (case-insensitive, with or without @)"""
+        return self.username_index.get(username.lstrip('@').lower())
+    
+    def find_users(self, query: str) -> List[Dict]:
+        """Resolve @username directly, otherwise search names"""
+        query = query.strip()
+        if query.startswith('@'):
+            user_id = self.get_user_id_by_username(query)
+            if user_id:
+                return [{**self.users[user_id], 'user_id': user_id}]
+            query = query[1:]
+        return self.search_users(query)
     
     def search_users(self, query: str) -> List[Dict]:
-        """Search users by name or username"""
-        query = query.lower()
-        matches = []
-        
-        for user_id, user_data in self.users.items():
-            # Search in first name, last name, and username
-            searchable_fields = [
-                user_data.get('first_name', ''),
-                user_data.get('last_name', ''),
-                user_data.get('username', '')
-            ]
-            
-            if any(query in field.lower() for field in searchable_fields if field):
-                matches.append({**user_data, 'user_id': user_id})
-        
-        return matches
+        """Search users by name or username, exact and prefix matches first, then most active"""
+        ranked = sorted(
+            self.search_index.search(query),
+            key=lambda match: (match[0], -self.users[match[1]].get('message_count', 0))
+        )
+        return [{**self.users[user_id], 'user_id': user_id} for _, user_id in ranked]
 
 user_service = UserService()
\ No newline at end of file
@@ -1,13 +1,158 @@
-import requests
+import asyncio
 import os
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional
 
-def get_weather(city):
+from config.constants import WEATHER_CACHE_TTL, GEOCODE_CACHE_TTL, GEOCODE_NEGATIVE_TTL, WEATHER_CACHE_SIZE
+from utils.http_client import http_client
+from utils.ttl_cache import TTLCache, MISSING
+
+GEOCODE_URL = "http://api.openweathermap.org/geo/1.0/direct"
+WEATHER_URL = "http://api.openweathermap.org/data/2.5/weather"
+
+@dataclass
+class GeoLocation:
+    name: str
+    latitude: float
+    longitude: float
+    country: Optional[str] = None
+
+@dataclass
+class WeatherReport:
+    city: str
+    main: str
+    description: str
+    temperature: float  # °C
+    humidity: int
+    fetched_at: float
+
+    def format(self) -> str:
+        """Human-readable report as sent by /weather"""
+        return f"Weather in {self.city}:\n" \
+               f"Main: {self.main}\n" \
+               f"Description: {self.description}\n" \
+               f"Temperature: {self.temperature:.2f} °C\n" \
+               f"Humidity: {self.humidity}%"
+
+# Keyed by normalized city name; None marks a city the geocoder doesn't know
+_geocode_cache = TTLCache(GEOCODE_CACHE_TTL, WEATHER_CACHE_SIZE)
+_weather_cache = TTLCache(WEATHER_CACHE_TTL, WEATHER_CACHE_SIZE)
+
+def normalize_city(city: str) -> str:
+    """Cache key for a city name: lowercase with collapsed whitespace"""
+    return ' '.join(city.lower().split())
+
+async def geocode(city: str) -> Optional[GeoLocation]:
+    """
+    Resolve a place name to coordinates via the OpenWeatherMap geocoder.
+
+    Args:
+        city (str): City or place name
+
+    Returns:
+        Optional[GeoLocation]: Location, or None if unknown or the lookup failed
+    """
+    key = normalize_city(city)
+    cached = _geocode_cache.get(key)
+    if cached is not MISSING:
+        return cached
+
+    weather_key = os.getenv('OPENWEATHERMAP_API_KEY')
+    if not weather_key:
+        return None
+
+    try:
+        response = await http_client.get(GEOCODE_URL, params={'q': city, 'limit': 1, 'appid': weather_key})
+        if response.status_code != 200:
+            # Not cached: the city may well exist once the API recovers
+            print(f"Geocoding failed for {city}: {response.status_code}")
+            return None
+        results = response.json()
+    except Exception as e:
+        print(f"Error geocoding {city}: {e}")
+        return None
+
+    if not results:
+        _geocode_cache.set(key, None, ttl=GEOCODE_NEGATIVE_TTL)
+        return None
+
+    result = results[0]
+    location = GeoLocation(result.get('name', city), result['lat'], result['lon'], result.get('country'))
+    _geocode_cache.set(key, location)
+    return location
+
+async def get_weather_report(city: str) -> Optional[WeatherReport]:
+    """
+    Get current weather for a city, served from cache when fresh.
+
+    Args:
+        city (str): City name
+
+    Returns:
+        Optional[WeatherReport]: Report, or None if the city is unknown or the request failed
+    """
+    key = normalize_city(city)
+    cached = _weather_cache.get(key)
+    if cached is not MISSING:
+        return cached
+
+    location = await geocode(city)
+    if location is None:
+        return None
+
+    try:
+        response = await http_client.get(WEATHER_URL, params={
+            'lat': location.latitude,
+            'lon': location.longitude,
+            'units': 'metric',
+            'appid': os.getenv('OPENWEATHERMAP_API_KEY')
+        })
+        data = response.json()
+        if response.status_code != 200:
+            print(f"Weather request failed for {city}: {data.get('message', response.status_code)}")
+            return None
+
+        report = WeatherReport(
+            city=location.name,
+            main=data["weather"][0]["main"],
+            description=data["weather"][0]["description"],
+            temperature=data["main"]["temp"],
+            humidity=data["main"]["humidity"],
+            fetched_at=time.time()
+        )
+    except Exception as e:
+        print(f"Error fetching weather data for {city}: {e}")
+        return None
+
+    _weather_cache.set(key, report)
+    return report
+
+async def get_weather_reports(cities: Iterable[str]) -> Dict[str, Optional[WeatherReport]]:
+    """
+    Get reports for several cities at once, e.g. for a morning digest.
+
+    Cities are fetched concurrently and each distinct city only once.
+
+    Args:
+        cities (Iterable[str]): City names
+
+    Returns:
+        Dict[str, Optional[WeatherReport]]: Report (or None) per city, in the given order
+    """
+    cities = list(cities)
+    unique = {normalize_city(city): city for city in reversed(cities)}
+    reports = await asyncio.gather(*(get_weather_report(city) for city in unique.values()))
+    by_key = dict(zip(unique.keys(), reports))
+    return {city: by_key[normalize_city(city)] for city in cities}
+
+async def get_weather(city):
     """
     Get weather information for a specified city.
-    
+
     Args:
         city (str): City name
-        
+
     Returns:
         str: Formatted weather information
     """
@@ -15,30 +160,10 @@ def get_weather(city):
         return "Please provide a city or region."
 
     # Get API key when needed, not at import time
-    weather_key = os.getenv('OPENWEATHERMAP_API_KEY')
-    if not weather_key:
+    if not os.getenv('OPENWEATHERMAP_API_KEY'):
         return "Weather service not configured. Missing OPENWEATHERMAP_API_KEY."
 
-    url = f"http://api.openweathermap.org/data/2.5/weather?q={city}&appid={weather_key}"
-    
-    try:
-        response = requests.get(url)
-        data = response.json()
-
-        if data["cod"] == 200:
-            main_weather = data["weather"][0]["main"]
-            description = data["weather"][0]["description"]
-            temperature = data["main"]["temp"]
-            temperature_celsius = temperature - 273.15
-            humidity = data["main"]["humidity"]
-
-            weather_info = f"Weather in {city}:\n" \
-                        f"Main: {main_weather}\n" \
-                        f"Description: {description}\n" \
-                        f"Temperature: {temperature_celsius:.2f} °C\n" \
-                        f"Humidity: {humidity}%"
-            return weather_info
-        else:
-            return f"Failed to retrieve weather information for {city}."
-    except Exception as e:
-        return f"Error fetching weather data: {str(e)}"
\ No newline at end of file
+    report = await get_weather_report(city)
+    if report is None:
+        return f"Failed to retrieve weather information for {city}."
+    return report.format()
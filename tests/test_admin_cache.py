@@ -0,0 +1,57 @@
+import asyncio
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from unittest.mock import AsyncMock, MagicMock
+from services.admin_cache import AdminCache
+
+
+def make_bot(admin_ids, bot_id=99):
+    bot = MagicMock()
+    bot.id = bot_id
+    bot.get_chat_administrators = AsyncMock(
+        return_value=[MagicMock(user=MagicMock(id=admin_id)) for admin_id in admin_ids]
+    )
+    return bot
+
+
+class TestAdminCache:
+    """Tests for the chat administrator cache"""
+
+    def test_lookups_are_cached(self):
+        """Test that repeated checks only call the API once"""
+        cache = AdminCache(ttl=60)
+        bot = make_bot([1, 99])
+
+        async def run():
+            assert await cache.is_admin(bot, -100, 1)
+            assert not await cache.is_admin(bot, -100, 2)
+            assert await cache.bot_is_admin(bot, -100)
+
+        asyncio.run(run())
+        assert bot.get_chat_administrators.await_count == 1
+        assert cache.stats['hits'] == 2
+
+    def test_promotion_invalidates_chat(self):
+        """Test that an admin status change forces a fresh lookup"""
+        cache = AdminCache(ttl=60)
+        bot = make_bot([1])
+
+        asyncio.run(cache.get_admin_ids(bot, -100))
+        cache.handle_member_change(-100, "member", "administrator")
+        asyncio.run(cache.get_admin_ids(bot, -100))
+
+        assert bot.get_chat_administrators.await_count == 2
+
+    def test_ordinary_member_change_keeps_cache(self):
+        """Test that members joining or leaving don't invalidate the cache"""
+        cache = AdminCache(ttl=60)
+        bot = make_bot([1])
+
+        asyncio.run(cache.get_admin_ids(bot, -100))
+        cache.handle_member_change(-100, "member", "left")
+
+        assert -100 in cache.entries
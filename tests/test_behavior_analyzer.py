@@ -0,0 +1,39 @@
+import sys
+import os
+from unittest.mock import patch
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.behavior_analyzer import behavior_analyzer
+from services.reputation_service import reputation_service
+
+
+class TestBehaviorAnalyzer:
+    """Tests for per-message reputation analysis"""
+
+    def test_message_analyses_are_applied_once(self):
+        """Test that every analysis of one message ends up in a single reputation update"""
+        deltas = behavior_analyzer.analyze_message("thanks, that was great")
+        behavior_analyzer.analyze_response_to_anna(deltas, "thanks, that was great", True)
+        behavior_analyzer.analyze_helpfulness(deltas, True)
+
+        with patch.object(reputation_service, 'apply_trait_deltas') as apply_trait_deltas:
+            behavior_analyzer.apply("42", deltas)
+
+        apply_trait_deltas.assert_called_once()
+        user_id, applied, reasons = apply_trait_deltas.call_args.args
+        assert user_id == "42"
+        assert applied['respect'] == 0.7
+        assert applied['helpfulness'] == 1.0
+        assert reasons['respect'] == 'Positive response to Anna, Showed community spirit'
+
+    def test_spam_adds_to_message_deltas(self):
+        """Test that spam analysis accumulates instead of applying on its own"""
+        deltas = behavior_analyzer.analyze_message("buy now")
+
+        with patch.object(reputation_service, 'apply_trait_deltas') as apply_trait_deltas:
+            behavior_analyzer.analyze_spam_behavior(deltas, 10, 10, duplicate_count=3)
+
+        apply_trait_deltas.assert_not_called()
+        assert deltas.deltas['spam_tendency'] > 0
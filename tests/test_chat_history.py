@@ -0,0 +1,66 @@
+import pytest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.chat_history import ChatHistoryBuffer, ChatHistoryStore, HistoryRecord
+
+
+class TestChatHistory:
+    """Tests for the ring-buffer chat history"""
+
+    def test_buffer_keeps_only_capacity_newest(self):
+        """Test that the oldest records are overwritten once the buffer is full"""
+        buffer = ChatHistoryBuffer(capacity=3)
+        for i in range(5):
+            buffer.append(HistoryRecord("user", f"msg {i}", "1", float(i)))
+
+        assert len(buffer) == 3
+        assert [record.content for record in buffer] == ["msg 2", "msg 3", "msg 4"]
+
+    def test_context_is_formatted_for_openai(self):
+        """Test that bot messages map to the assistant role"""
+        store = ChatHistoryStore(capacity=12)
+        store.append("chat", "1", "user", "hej anna")
+        store.append("chat", "bot", "bot", "tja")
+
+        assert store.get_context("chat") == [
+            {"role": "user", "content": "hej anna"},
+            {"role": "assistant", "content": "tja"}
+        ]
+
+    def test_context_limit(self):
+        """Test that the context respects the requested limit"""
+        store = ChatHistoryStore(capacity=12)
+        for i in range(10):
+            store.append("chat", "1", "user", f"msg {i}")
+
+        assert [m["content"] for m in store.get_context("chat", 2)] == ["msg 8", "msg 9"]
+        assert [m["content"] for m in store.get_context("chat", 8)][0] == "msg 2"
+
+    def test_context_unknown_chat(self):
+        """Test that an unknown chat has no context"""
+        assert ChatHistoryStore().get_context("missing") == []
+
+    def test_round_trip_dict(self):
+        """Test converting to and from the on-disk format"""
+        store = ChatHistoryStore(capacity=2)
+        data = {"chat": [
+            {"role": "user", "content": "a", "user_id": "1", "timestamp": 1.0},
+            {"role": "user", "content": "b", "user_id": "2", "timestamp": 2.0},
+            {"role": "bot", "content": "c", "user_id": "bot", "timestamp": 3.0}
+        ]}
+        store.load_dict(data)
+
+        assert store.to_dict() == {"chat": data["chat"][-2:]}
+
+    def test_user_ids_are_interned(self):
+        """Test that repeated user ids share one string object"""
+        store = ChatHistoryStore()
+        store.append("chat", "".join(["12", "34"]), "user", "a")
+        store.append("chat", "".join(["1", "234"]), "user", "b")
+
+        first, second = list(store.buffers["chat"])
+        assert first.user_id is second.user_id
@@ -0,0 +1,52 @@
+import asyncio
+import sys
+import os
+from unittest.mock import AsyncMock, MagicMock, patch
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The OpenAI client is created at import time and only needs some key to exist
+os.environ.setdefault("OPENAI_API_KEY", "test_key")
+
+from handlers import command_handlers
+from services.raid_detector import RaidDetector
+
+
+class TestChatCommand:
+    """Tests for the /chat command"""
+
+    def make_update(self, chat_id=1, user_id=2):
+        update = MagicMock()
+        update.effective_chat.id = chat_id
+        update.effective_user.id = user_id
+        update.effective_user.first_name = "Test"
+        update.message.reply_text = AsyncMock()
+        return update
+
+    def test_chat_skips_llm_during_lockdown(self):
+        """Test that /chat doesn't reach the LLM scheduler while the chat is in lockdown"""
+        detector = RaidDetector(join_threshold=1)
+        detector.record_join("1", "raider", 0)
+        update = self.make_update()
+        context = MagicMock(args=["hej", "anna"])
+
+        with patch.object(command_handlers, "raid_detector", detector), \
+                patch.object(command_handlers.llm_scheduler, "submit", new_callable=AsyncMock) as submit:
+            asyncio.run(command_handlers.chat_with_anna(update, context))
+
+        submit.assert_not_called()
+        update.message.reply_text.assert_called_once()
+
+    def test_chat_replies_outside_lockdown(self):
+        """Test that /chat submits to the scheduler when the chat isn't locked"""
+        update = self.make_update()
+        context = MagicMock(args=["hej", "anna"])
+
+        with patch.object(command_handlers, "raid_detector", RaidDetector()), \
+                patch.object(command_handlers.llm_scheduler, "submit", new_callable=AsyncMock,
+                             return_value="Hej!") as submit:
+            asyncio.run(command_handlers.chat_with_anna(update, context))
+
+        submit.assert_called_once()
+        update.message.reply_text.assert_called_once_with("Hej!")
@@ -0,0 +1,56 @@
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.duplicate_detector import DuplicateDetector, simhash, normalize
+
+PAYLOAD = "Köp billiga kryptovalutor nu på vår fantastiska sajt, bara idag med rabatt"
+
+
+class TestDuplicateDetector:
+    """Tests for near-duplicate flood detection"""
+
+    def test_near_identical_texts_have_close_fingerprints(self):
+        """Test that punctuation and case changes don't change the fingerprint"""
+        assert simhash(normalize(PAYLOAD)) == simhash(normalize(PAYLOAD.upper() + "!!!"))
+
+    def test_same_user_pasting_slowly(self):
+        """Test that one user repeating a payload is flagged at the threshold"""
+        detector = DuplicateDetector(threshold=3, window=600)
+
+        assert detector.check("c", "u", PAYLOAD, 0) is None
+        assert detector.check("c", "u", PAYLOAD, 100) is None
+        match = detector.check("c", "u", PAYLOAD + "!", 200)
+
+        assert match is not None
+        assert match.count == 3
+        assert match.distinct_users == 1
+
+    def test_several_users_copy_pasting(self):
+        """Test that copies from different users count together"""
+        detector = DuplicateDetector(threshold=3)
+        detector.check("c", "a", PAYLOAD, 0)
+        detector.check("c", "b", PAYLOAD, 1)
+        match = detector.check("c", "c", PAYLOAD, 2)
+
+        assert match.distinct_users == 3
+
+    def test_chats_window_and_short_messages(self):
+        """Test that chats are separate, old copies expire and short texts are ignored"""
+        detector = DuplicateDetector(threshold=2, window=10)
+        detector.check("a", "u", PAYLOAD, 0)
+
+        assert detector.check("b", "u", PAYLOAD, 1) is None
+        assert detector.check("a", "u", PAYLOAD, 20) is None
+        assert detector.check("a", "u", "haha", 21) is None
+        assert detector.check("a", "u", "haha", 22) is None
+
+    def test_lru_is_bounded(self):
+        """Test that each chat keeps at most lru_size fingerprints"""
+        detector = DuplicateDetector(lru_size=5)
+        for i in range(20):
+            detector.check("c", "u", f"{PAYLOAD} variant number {i} " + "x" * i, i)
+
+        assert len(detector.chats["c"].entries) <= 5
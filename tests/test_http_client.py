@@ -0,0 +1,119 @@
+import asyncio
+import pytest
+import sys
+import os
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from utils.http_client import HTTPClient
+
+
+def make_client(handler, **kwargs):
+    return HTTPClient(base_delay=0, transport=httpx.MockTransport(handler), **kwargs)
+
+
+class TestHTTPClient:
+    """Tests for the shared async HTTP client"""
+
+    def test_get_retries_server_errors(self):
+        """Test a GET that fails with 503 is retried until it succeeds"""
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(503 if len(calls) < 3 else 200, json={'ok': True})
+
+        client = make_client(handler, max_retries=2)
+        response = asyncio.run(client.get('https://example.com/data'))
+
+        assert response.status_code == 200
+        assert len(calls) == 3
+        assert client.stats['retries'] == 2
+
+    def test_gives_up_after_max_retries(self):
+        """Test the last error response is returned once retries run out"""
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(500)
+
+        client = make_client(handler, max_retries=1)
+        response = asyncio.run(client.get('https://example.com/data'))
+
+        assert response.status_code == 500
+        assert len(calls) == 2
+
+    def test_post_not_retried_by_default(self):
+        """Test a POST is sent once since it may not be idempotent"""
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(502)
+
+        client = make_client(handler)
+        response = asyncio.run(client.post('https://example.com/token', data={'a': 'b'}))
+
+        assert response.status_code == 502
+        assert len(calls) == 1
+
+    def test_transport_error_raised_after_retries(self):
+        """Test connection errors are retried and then raised"""
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            raise httpx.ConnectError('refused', request=request)
+
+        client = make_client(handler, max_retries=1)
+        with pytest.raises(httpx.ConnectError):
+            asyncio.run(client.get('https://example.com/data'))
+
+        assert len(calls) == 2
+        assert client.stats['failures'] == 1
+
+    def test_retry_after_header_honoured(self):
+        """Test a numeric Retry-After sets the backoff delay"""
+        client = HTTPClient(base_delay=0.5)
+        response = httpx.Response(429, headers={'Retry-After': '3'})
+
+        assert client._backoff(0, response) == 3.0
+        assert 0 <= client._backoff(2) <= 2.0
+
+    def test_long_retry_after_fails_instead_of_sleeping(self):
+        """Test a Retry-After beyond the cap returns the error response at once"""
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(503, headers={'Retry-After': '3600'})
+
+        client = make_client(handler, max_retries=2)
+        response = asyncio.run(client.get('https://example.com/data'))
+
+        assert response.status_code == 503
+        assert len(calls) == 1
+
+    def test_rate_limited_host_is_spaced_out(self):
+        """Test that requests to a host with a rate are sent 1/rate seconds apart"""
+        sent = []
+
+        def handler(request):
+            sent.append(time.monotonic())
+            return httpx.Response(200)
+
+        client = make_client(handler)
+        client.configure_host('api.example.com', concurrency=10, rate=50)
+
+        async def run():
+            await asyncio.gather(*(client.get('https://api.example.com/x') for _ in range(4)))
+
+        asyncio.run(run())
+
+        assert len(sent) == 4
+        assert sent[-1] - sent[0] >= 3 / 50 * 0.9
@@ -0,0 +1,54 @@
+import pytest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import message_features
+from services.message_features import KeywordMatcher, MessageFeatures, register_keywords
+
+
+@pytest.fixture
+def keyword_registry(monkeypatch):
+    """Isolate the module-level keyword registry so test categories don't leak into other tests"""
+    monkeypatch.setattr(message_features, '_keyword_sets', dict(message_features._keyword_sets))
+    monkeypatch.setattr(message_features, '_matcher', None)
+
+
+class TestMessageFeatures:
+    """Tests for the single-pass keyword matcher"""
+
+    def test_overlapping_keywords_are_all_found(self):
+        """Test that keywords sharing a prefix or overlapping are all reported"""
+        matcher = KeywordMatcher({"question": ["var", "varför"], "humor": ["ha", "haha", "lol"]})
+        matches, _ = matcher.find("varför hahaha lol")
+
+        assert matches["question"] == {"var", "varför"}
+        assert matches["humor"] == {"ha", "haha", "lol"}
+
+    def test_prefix_matches_only_at_start(self):
+        """Test that prefix matches are only reported for the start of the text"""
+        matcher = KeywordMatcher({"starter": ["vad", "hur"]})
+        _, prefix_matches = matcher.find("hur mår du, vad gör du")
+
+        assert prefix_matches["starter"] == {"hur"}
+
+    def test_no_matches(self):
+        """Test text without any keywords"""
+        matcher = KeywordMatcher({"rude": ["idiot"]})
+        assert matcher.find("hej hej") == ({}, {})
+
+    def test_features_are_case_insensitive(self, keyword_registry):
+        """Test that features match keywords regardless of case and count distinct hits"""
+        register_keywords("test_polite", ["tack", "thanks"])
+        features = MessageFeatures("TACK tack Thanks!")
+
+        assert features.count("test_polite") == 2
+        assert features.starts_with("test_polite")
+        assert features.caps_ratio > 0.25
+        assert not features.has_question_mark
+
+    def test_registered_keywords_do_not_leak(self):
+        """Test that categories registered by other tests are gone again"""
+        assert "test_polite" not in message_features._keyword_sets
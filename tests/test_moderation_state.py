@@ -0,0 +1,94 @@
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.moderation_state import WarningLedger, WarningRecord
+
+DAY = 86400
+
+
+def make_ledger():
+    ledger = WarningLedger(half_life=DAY, cooldown=9)
+    ledger.records = {}
+    ledger._expiry = []
+    return ledger
+
+
+class TestWarningLedger:
+    """Tests for persisted, decaying spam warnings"""
+
+    def test_warnings_accumulate_per_chat(self):
+        """Test that quick warnings count up and are scoped per chat"""
+        ledger = make_ledger()
+
+        assert ledger.record_warning("a", "u", 0) == 1
+        assert ledger.record_warning("a", "u", 10) == 2
+        assert ledger.record_warning("a", "u", 20) == 3
+        assert ledger.get_warning_count("b", "u", 20) == 0
+
+    def test_warnings_decay_lazily(self):
+        """Test that counts halve per half-life when read, without being rewritten"""
+        ledger = make_ledger()
+        ledger.record_warning("a", "u", 0)
+        ledger.record_warning("a", "u", 0)
+
+        assert ledger.get_warning_count("a", "u", DAY) == 1
+        assert ledger.records["a:u"].value == 2
+        # A new warning starts from the decayed value
+        assert ledger.record_warning("a", "u", 2 * DAY) == 2
+
+    def test_faded_warnings_are_forgotten(self):
+        """Test that fully decayed records are dropped on read"""
+        ledger = make_ledger()
+        ledger.record_warning("a", "u", 0)
+
+        assert ledger.get_warning_count("a", "u", 10 * DAY) == 0
+        assert "a:u" not in ledger.records
+
+    def test_cooldown_and_reset(self):
+        """Test the warning cooldown and resetting after a kick"""
+        ledger = make_ledger()
+        ledger.record_warning("a", "u", 0)
+
+        assert not ledger.should_send_warning("a", "u", 9)
+        assert ledger.should_send_warning("a", "u", 10)
+        ledger.reset("a", "u")
+        assert ledger.get_warning_count("a", "u", 10) == 0
+
+    def test_record_round_trip(self):
+        """Test that records survive serialization for storage"""
+        record = WarningRecord(1.5, 100.0, 90.0)
+        restored = WarningRecord.from_dict(record.to_dict())
+
+        assert (restored.value, restored.updated_at, restored.last_warning) == (1.5, 100.0, 90.0)
+
+    def test_halves_round_up(self):
+        """Test that a decayed count of exactly 2.5 shows as 3, not 2"""
+        ledger = make_ledger()
+        ledger.records["a:u"] = WarningRecord(5.0, 0, 0)
+
+        assert ledger.get_warning_count("a", "u", DAY) == 3
+
+    def test_sweep_drops_faded_records(self):
+        """Test that idle users whose warnings faded are pruned without being read"""
+        ledger = make_ledger()
+        ledger.record_warning("a", "old", 0)
+        ledger.record_warning("a", "recent", 10 * DAY)
+
+        assert ledger.sweep(10 * DAY) == 1
+        assert list(ledger.records) == ["a:recent"]
+
+    def test_sweep_only_visits_expired_entries(self):
+        """Test that sweep stops at the first record that hasn't faded and skips superseded entries"""
+        ledger = make_ledger()
+        ledger.record_warning("a", "old", 0)
+        ledger.record_warning("a", "rewarned", 0)
+        ledger.record_warning("a", "rewarned", 5 * DAY)
+        for i in range(100):
+            ledger.record_warning("b", str(i), 10 * DAY)
+
+        assert ledger.sweep(8 * DAY) == 1
+        assert "a:rewarned" in ledger.records
+        assert len(ledger._expiry) == 101
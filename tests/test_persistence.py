@@ -0,0 +1,74 @@
+import asyncio
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.storage import SQLiteBackend
+from data.persistence import PersistenceManager
+
+
+class TestPersistenceManager:
+    """Tests for the write-behind persistence manager"""
+
+    def make_manager(self, tmp_path, max_dirty=100):
+        storage = SQLiteBackend(str(tmp_path / "test.db"))
+        return PersistenceManager(storage=storage, max_dirty=max_dirty), storage
+
+    def test_flush_writes_only_dirty_rows(self, tmp_path):
+        """Test that only marked entities are written, coalescing repeated marks"""
+        manager, storage = self.make_manager(tmp_path)
+        users = {"1": {"name": "Anna"}, "2": {"name": "Bo"}}
+        manager.register("users", users.get)
+
+        manager.mark_dirty("users", "1")
+        manager.mark_dirty("users", "1")
+        assert manager.pending_count() == 1
+
+        asyncio.run(manager.flush())
+
+        assert storage.load("users") == {"1": {"name": "Anna"}}
+        assert manager.pending_count() == 0
+
+    def test_deleted_entities_are_removed(self, tmp_path):
+        """Test that a dirty key whose getter returns None is deleted"""
+        manager, storage = self.make_manager(tmp_path)
+        lists = {"-100": ["mjölk"]}
+        manager.register("chat_lists", lists.get)
+        storage.upsert("chat_lists", "-200", ["bröd"])
+
+        manager.mark_dirty("chat_lists", "-100")
+        manager.mark_dirty("chat_lists", "-200")
+        asyncio.run(manager.flush())
+
+        assert storage.load("chat_lists") == {"-100": ["mjölk"]}
+
+    def test_size_budget_triggers_early_flush(self, tmp_path):
+        """Test that reaching max_dirty starts a flush without waiting for the interval"""
+        manager, storage = self.make_manager(tmp_path, max_dirty=3)
+        users = {str(i): {"n": i} for i in range(3)}
+        manager.register("users", users.get)
+
+        async def mark_all():
+            for user_id in users:
+                manager.mark_dirty("users", user_id)
+            await manager._pending_flush
+
+        asyncio.run(mark_all())
+
+        assert len(storage.load("users")) == 3
+
+    def test_flush_runs_hooks(self, tmp_path):
+        """Test that flush hooks run on every flush"""
+        manager, _ = self.make_manager(tmp_path)
+        calls = []
+
+        async def hook():
+            calls.append(1)
+
+        manager.add_flush_hook(hook)
+        asyncio.run(manager.flush())
+        asyncio.run(manager.flush())
+
+        assert len(calls) == 2
@@ -0,0 +1,71 @@
+import copy
+import json
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from unittest.mock import patch
+
+from data.personality_trainer import PersonalityTrainer
+
+
+def message(user_id, content, timestamp, role='user'):
+    return {'role': role, 'user_id': user_id, 'content': content, 'timestamp': timestamp}
+
+
+class TestPersonalityTrainer:
+    """Tests for incremental chat history analysis"""
+
+    @pytest.fixture
+    def trainer(self, tmp_path):
+        with patch.object(PersonalityTrainer, '_load_personality_data',
+                          lambda self: self._initialize_personality_data()):
+            trainer = PersonalityTrainer()
+        trainer.data_path = str(tmp_path / 'personality_data.json')
+        return trainer
+
+    def test_reanalysis_does_not_inflate_counts(self, trainer):
+        """Test that analysing the same shards twice counts every message once"""
+        shards = {
+            '1': [message('a', 'hej allihop 😀', 1.0), message('b', 'hej hej', 2.0),
+                  message('bot', 'tja!', 3.0, role='bot')],
+            '2': [message('a', 'hi 😀😀', 1.5)],
+        }
+
+        trainer.analyze_chat_history(shards)
+        snapshot = (dict(trainer.frequent_users), dict(trainer.greeting_counts), dict(trainer.emoji_counts))
+        trainer.analyze_chat_history(shards)
+
+        assert (dict(trainer.frequent_users), dict(trainer.greeting_counts), dict(trainer.emoji_counts)) == snapshot
+        assert trainer.frequent_users == {'a': 2, 'b': 1}
+        assert trainer.greeting_counts == {'hej': 2, 'hi': 1}
+        assert sum(trainer.emoji_counts.values()) == 2
+
+    def test_only_messages_after_watermark_counted(self, trainer):
+        """Test that a later call picks up only messages newer than the chat's watermark"""
+        history = [message('a', 'hej', 1.0), message('b', 'hey', 2.0)]
+        trainer.analyze_chat_history({'1': history})
+        assert trainer.watermarks['1'] == 2.0
+
+        history = history[1:] + [message('c', 'hej 🎵', 3.0)]
+        trainer.analyze_chat_history({'1': history})
+
+        assert trainer.frequent_users == {'a': 1, 'b': 1, 'c': 1}
+        assert trainer.greeting_counts == {'hej': 2, 'hey': 1}
+        assert trainer.watermarks['1'] == 3.0
+
+    def test_deferred_save_writes_given_snapshot(self, trainer):
+        """Test that analysis can skip the write and a later save stores the snapshot it was handed"""
+        assert trainer.analyze_chat_history({'1': [message('a', 'hej', 1.0)]}, save=False)
+        assert not os.path.exists(trainer.data_path)
+        assert not trainer.analyze_chat_history({'1': [message('a', 'hej', 1.0)]}, save=False)
+
+        snapshot = copy.deepcopy(trainer.personality_data)
+        trainer.frequent_users['late'] = 1
+        trainer.save_personality_data(snapshot)
+
+        with open(trainer.data_path) as f:
+            assert json.load(f)['frequent_users'] == {'a': 1}
@@ -0,0 +1,69 @@
+import asyncio
+import pytest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from unittest.mock import patch, AsyncMock
+
+from services import pollen_service
+from services.weather_service import GeoLocation
+
+FORECAST = {
+    "dailyInfo": [
+        {"date": {"year": 2026, "month": 5, "day": d}, "pollenTypeInfo": []}
+        for d in range(1, 6)
+    ]
+}
+
+
+class TestPollenService:
+    """Tests for the day-scoped pollen forecast cache"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        pollen_service._forecast_cache.clear()
+        pollen_service._recent_locations.clear()
+
+    def test_forecast_fetched_once_per_day(self):
+        """Test that repeated requests on the same day reuse one API call"""
+        api = AsyncMock(return_value=FORECAST)
+        with patch.object(pollen_service, "get_pollen_forecast", api), \
+                patch.object(pollen_service, "local_date", return_value="2026-05-01"):
+            three_days = asyncio.run(pollen_service.get_pollen_for_location("Gothenburg", 3))
+            one_day = asyncio.run(pollen_service.get_pollen_for_location("gothenburg", 1))
+
+        assert api.call_count == 1
+        assert three_days.count("📅") == 3
+        assert one_day.count("📅") == 1
+
+        with patch.object(pollen_service, "get_pollen_forecast", api), \
+                patch.object(pollen_service, "local_date", return_value="2026-05-02"):
+            asyncio.run(pollen_service.get_pollen_for_location("gothenburg"))
+
+        assert api.call_count == 2
+
+    def test_errors_are_not_cached(self):
+        """Test that a failed fetch is retried on the next request"""
+        api = AsyncMock(side_effect=[{"error": "API error: 500"}, FORECAST])
+        with patch.object(pollen_service, "get_pollen_forecast", api):
+            first = asyncio.run(pollen_service.get_pollen_for_location("stockholm"))
+            second = asyncio.run(pollen_service.get_pollen_for_location("stockholm"))
+
+        assert first.startswith("Error getting pollen data")
+        assert "Pollen Forecast for Stockholm" in second
+
+    def test_geocoded_place_is_prefetched(self):
+        """Test that places outside the presets are geocoded and prefetched later"""
+        geo = AsyncMock(return_value=GeoLocation("Uppsala", 59.8586, 17.6389, "SE"))
+        api = AsyncMock(return_value=FORECAST)
+        with patch.object(pollen_service, "geocode", geo), \
+                patch.object(pollen_service, "get_pollen_forecast", api):
+            message = asyncio.run(pollen_service.get_pollen_for_location("Uppsala"))
+            pollen_service._forecast_cache.clear()
+            fetched = asyncio.run(pollen_service.prefetch_pollen_forecasts())
+
+        assert "Pollen Forecast for Uppsala" in message
+        assert fetched == len(pollen_service.LOCATIONS) + 1
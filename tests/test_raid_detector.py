@@ -0,0 +1,76 @@
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.raid_detector import DecayedCounter, RaidDetector
+
+
+class TestRaidDetector:
+    """Tests for chat-wide raid detection"""
+
+    def test_decayed_counter_halves_per_half_life(self):
+        """Test that counts decay exponentially"""
+        counter = DecayedCounter(half_life=10)
+        counter.add(0, 8)
+
+        assert counter.get(10) == 4
+        assert counter.get(30) == 1
+
+    def test_many_new_users_trigger_lockdown(self):
+        """Test that twenty fresh accounts with three messages each start a lockdown"""
+        detector = RaidDetector(half_life=30, message_threshold=15, join_threshold=100)
+        started = []
+        for i in range(20):
+            detector.record_join("c", f"raider{i}", i * 0.5)
+        for i in range(20):
+            for j in range(3):
+                started.append(detector.record_message("c", detector.is_new_user("c", f"raider{i}", 10), 10 + i * 0.1))
+
+        assert started.count(True) == 1
+        assert detector.in_lockdown("c")
+
+    def test_regular_members_never_count(self):
+        """Test that messages from established members don't feed the raid rate"""
+        detector = RaidDetector(message_threshold=5)
+        for i in range(50):
+            detector.record_message("c", detector.is_new_user("c", "regular", i), i)
+
+        assert not detector.in_lockdown("c")
+
+    def test_join_rate_and_release(self):
+        """Test lockdown on a join burst and release once the rate has fallen"""
+        detector = RaidDetector(half_life=10, join_threshold=5, min_lockdown=60, release_ratio=0.3)
+        for i in range(5):
+            detector.record_join("c", str(i), 0)
+
+        assert detector.in_lockdown("c")
+        assert not detector.try_release("c", 30)
+        assert detector.try_release("c", 60)
+        assert not detector.in_lockdown("c")
+
+    def test_kick_queue_batches(self):
+        """Test that kicks are deduplicated and handed out in batches"""
+        detector = RaidDetector()
+        for user_id in ["1", "2", "2", "3"]:
+            detector.queue_kick("c", user_id)
+
+        assert detector.next_kick_batch("c", 2) == ["1", "2"]
+        assert detector.next_kick_batch("c", 2) == ["3"]
+        assert detector.next_kick_batch("c", 2) == []
+
+    def test_cannot_kick_lasts_one_lockdown(self):
+        """Test that a failed kick stops queueing and is reported once per lockdown"""
+        detector = RaidDetector(half_life=10, join_threshold=5, min_lockdown=60, release_ratio=0.3)
+        for i in range(5):
+            detector.record_join("c", str(i), 0)
+            detector.queue_kick("c", str(i))
+
+        assert detector.mark_cannot_kick("c")
+        assert not detector.mark_cannot_kick("c")
+        assert not detector.can_kick("c")
+        assert detector.next_kick_batch("c", 10) == []
+
+        assert detector.try_release("c", 60)
+        assert detector.can_kick("c")
@@ -0,0 +1,112 @@
+import asyncio
+import pytest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from unittest.mock import patch
+
+from services.search_service import SearchService, SEARCH_BLOCK_SIZE
+
+
+def make_block(start, size=SEARCH_BLOCK_SIZE):
+    return [{'title': f'Result {start + i}', 'link': f'https://example.com/{start + i}'} for i in range(size)]
+
+
+class TestSearchService:
+    """Tests for the cached, coalescing Google search"""
+
+    @pytest.fixture
+    def service(self, monkeypatch):
+        monkeypatch.setenv('GOOGLE_API_KEY', 'test_key')
+        monkeypatch.setenv('GOOGLE_CSE_ID', 'test_cse')
+        return SearchService()
+
+    def test_repeated_query_served_from_cache(self, service):
+        """Test that queries differing only in case and spacing share one API call"""
+        calls = []
+
+        async def fetch(query, start):
+            calls.append(start)
+            return make_block(start)
+
+        with patch.object(service, '_fetch_block', side_effect=fetch):
+            first = asyncio.run(service.search('Python  asyncio'))
+            second = asyncio.run(service.search('python asyncio'))
+
+        assert calls == [1]
+        assert '1. Result 1' in first
+        assert second.endswith(first.split('\n\n', 1)[1])
+        assert service.stats['cache_hits'] == 1
+
+    def test_concurrent_identical_queries_coalesce(self, service):
+        """Test that simultaneous searches for one query wait on a single fetch"""
+        calls = []
+
+        async def fetch(query, start):
+            calls.append(start)
+            await asyncio.sleep(0.01)
+            return make_block(start)
+
+        async def run():
+            return await asyncio.gather(*(service.search('same query') for _ in range(5)))
+
+        with patch.object(service, '_fetch_block', side_effect=fetch):
+            results = asyncio.run(run())
+
+        assert calls == [1]
+        assert len(set(results)) == 1
+        assert service.stats['coalesced'] == 4
+
+    def test_cancelled_fetch_releases_waiters(self, service):
+        """Test that cancelling the fetching caller doesn't leave coalesced callers waiting forever"""
+        async def fetch(query, start):
+            await asyncio.sleep(10)
+            return make_block(start)
+
+        async def run():
+            leader = asyncio.create_task(service._get_block('slow query', 1))
+            await asyncio.sleep(0)
+            waiter = asyncio.create_task(service._get_block('slow query', 1))
+            await asyncio.sleep(0)
+            leader.cancel()
+            await asyncio.wait_for(asyncio.gather(leader, waiter, return_exceptions=True), timeout=1)
+            return leader, waiter
+
+        with patch.object(service, '_fetch_block', side_effect=fetch):
+            leader, waiter = asyncio.run(run())
+
+        assert leader.cancelled()
+        assert waiter.cancelled()
+        assert service.stats['coalesced'] == 1
+        assert not service._inflight
+
+    def test_more_pages_through_cached_block(self, service):
+        """Test that later pages reuse the cached block and fetch the next one only when needed"""
+        calls = []
+
+        async def fetch(query, start):
+            calls.append(start)
+            return make_block(start)
+
+        with patch.object(service, '_fetch_block', side_effect=fetch):
+            asyncio.run(service.search('paging', chat_id='1'))
+            page_2 = asyncio.run(service.more('1'))
+            asyncio.run(service.more('1'))
+            page_4 = asyncio.run(service.more('1'))
+
+        assert '4. Result 4' in page_2
+        assert '10. Result 10' in page_4 and '12. Result 12' in page_4
+        assert calls == [1, 11]
+
+    def test_failures_not_cached(self, service):
+        """Test that an API error is reported and the next search tries again"""
+        with patch.object(service, '_fetch_block', side_effect=RuntimeError('boom')):
+            assert asyncio.run(service.search('flaky')) == 'Search error: boom'
+
+        with patch.object(service, '_fetch_block', return_value=make_block(1)):
+            assert '1. Result 1' in asyncio.run(service.search('flaky'))
+
+        assert service.stats['errors'] == 1
@@ -0,0 +1,53 @@
+import pytest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.sorted_index import SortedIndex
+
+
+class TestSortedIndex:
+    """Tests for the sorted key index used by leaderboards and activity queries"""
+
+    @pytest.fixture
+    def index(self):
+        index = SortedIndex()
+        for member, key in [("a", 5.0), ("b", 3.0), ("c", 9.0), ("d", -2.0)]:
+            index.update(member, key)
+        return index
+
+    def test_top_is_highest_first(self, index):
+        """Test that top returns the highest keys in descending order"""
+        assert index.top(2) == [("c", 9.0), ("a", 5.0)]
+        assert len(index.top(10)) == 4
+        assert index.top(0) == []
+
+    def test_rank(self, index):
+        """Test 1-based descending ranks"""
+        assert index.rank("c") == 1
+        assert index.rank("d") == 4
+        assert index.rank("missing") is None
+
+    def test_update_moves_member(self, index):
+        """Test that updating a key re-ranks the member without duplicating it"""
+        index.update("d", 10.0)
+
+        assert index.rank("d") == 1
+        assert len(index) == 4
+        assert index.get("d") == 10.0
+
+    def test_remove(self, index):
+        """Test removing a member"""
+        index.remove("c")
+        index.remove("missing")
+
+        assert "c" not in index
+        assert index.top(1) == [("a", 5.0)]
+
+    def test_count_at_least(self, index):
+        """Test range counts and members"""
+        assert index.count_at_least(3.0) == 3
+        assert index.count_at_least(100.0) == 0
+        assert list(index.members_at_least(5.0)) == ["a", "c"]
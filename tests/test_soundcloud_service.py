@@ -1,3 +1,4 @@
+import asyncio
 import pytest
 import sys
 import os
@@ -19,6 +20,7 @@ class TestSoundCloudService:
 
         with patch.dict("sys.modules", {"services.soundcloud_oauth_handler": MagicMock()}):
             from services.soundcloud_service import SoundCloudService
+            from data.storage import JsonFileBackend
 
             with patch.object(SoundCloudService, "__init__", lambda x: None):
                 service = SoundCloudService()
@@ -27,7 +29,7 @@ class TestSoundCloudService:
                 service.access_token = "test_token"
                 service.base_url = "https://api.soundcloud.com"
                 service.api_v2_url = "https://api-v2.soundcloud.com"
-                service.data_path = str(tmp_path / "soundcloud_tracking.json")
+                service.storage = JsonFileBackend(str(tmp_path))
                 service.tracking_data = {
                     "tracked_users": {},
                     "last_check": None,
@@ -36,6 +38,8 @@ class TestSoundCloudService:
                     "my_stats_history": []
                 }
                 service.oauth_handler = None
+                service._client_token_pending = False
+                service._token_lock = asyncio.Lock()
                 return service
 
     def test_set_my_account_success(self, service):
@@ -49,7 +53,7 @@ class TestSoundCloudService:
 
         with patch.object(service, "_get_user_info", return_value=mock_user_info):
             with patch.object(service, "_save_tracking_data"):
-                result = service.set_my_account("testuser")
+                result = asyncio.run(service.set_my_account("testuser"))
 
         assert result is True
         assert service.tracking_data["my_account"] is not None
@@ -58,14 +62,14 @@ class TestSoundCloudService:
     def test_set_my_account_failure(self, service):
         """Test setting my account when user not found"""
         with patch.object(service, "_get_user_info", return_value=None):
-            result = service.set_my_account("nonexistent")
+            result = asyncio.run(service.set_my_account("nonexistent"))
 
         assert result is False
         assert service.tracking_data["my_account"] is None
 
     def test_get_my_account_stats_no_account(self, service):
         """Test getting stats when no account is set"""
-        result = service.get_my_account_stats()
+        result = asyncio.run(service.get_my_account_stats())
         assert result is None
 
     def test_get_stats_changes_new_follower(self, service):
@@ -83,9 +87,10 @@ class TestSoundCloudService:
             "track_stats": {}
         }
 
-        with patch.object(service, "get_my_account_stats", return_value=mock_current_stats):
+        with patch.object(service, "get_my_account_stats", return_value=mock_current_stats), \
+                patch.object(service, "_get_my_followers", return_value={}):
             with patch.object(service, "_save_tracking_data"):
-                result = service.get_stats_changes()
+                result = asyncio.run(service.get_stats_changes())
 
         assert result["new_followers"] == 2
         assert result["lost_followers"] == 0
@@ -105,9 +110,10 @@ class TestSoundCloudService:
             "track_stats": {}
         }
 
-        with patch.object(service, "get_my_account_stats", return_value=mock_current_stats):
+        with patch.object(service, "get_my_account_stats", return_value=mock_current_stats), \
+                patch.object(service, "_get_my_followers", return_value={}):
             with patch.object(service, "_save_tracking_data"):
-                result = service.get_stats_changes()
+                result = asyncio.run(service.get_stats_changes())
 
         assert result["new_followers"] == 0
         assert result["lost_followers"] == 2
@@ -131,9 +137,11 @@ class TestSoundCloudService:
             }
         }
 
-        with patch.object(service, "get_my_account_stats", return_value=mock_current_stats):
+        with patch.object(service, "get_my_account_stats", return_value=mock_current_stats), \
+                patch.object(service, "_get_my_followers", return_value={}), \
+                patch.object(service, "_get_track_likers", return_value={}):
             with patch.object(service, "_save_tracking_data"):
-                result = service.get_stats_changes()
+                result = asyncio.run(service.get_stats_changes())
 
         assert len(result["track_changes"]) == 1
         assert result["track_changes"][0]["title"] == "My Song"
@@ -159,13 +167,110 @@ class TestSoundCloudService:
             }
         }
 
-        with patch.object(service, "get_my_account_stats", return_value=mock_current_stats):
+        with patch.object(service, "get_my_account_stats", return_value=mock_current_stats), \
+                patch.object(service, "_get_my_followers", return_value={}):
             with patch.object(service, "_save_tracking_data"):
-                result = service.get_stats_changes()
+                result = asyncio.run(service.get_stats_changes())
 
         assert len(result["track_changes"]) == 1
         assert result["track_changes"][0]["new_reposts"] == 3
 
+    def test_check_for_new_tracks_polls_concurrently(self, service):
+        """Test that users are polled in parallel and new tracks merged in one pass"""
+        from services.soundcloud_service import SoundCloudTrack
+
+        service.tracking_data["tracked_users"] = {str(i): {"display_name": f"Artist {i}"} for i in range(5)}
+        service.tracking_data["known_tracks"] = {"0": [100]}
+        in_flight = []
+        peak = []
+
+        async def fake_tracks(user_id, limit=50):
+            in_flight.append(user_id)
+            peak.append(len(in_flight))
+            await asyncio.sleep(0.01)
+            in_flight.remove(user_id)
+            if user_id == "4":
+                raise RuntimeError("timeout")
+            return [SoundCloudTrack(100 + int(user_id), "Song", "artist", int(user_id), "url", "2026-01-01", 0)]
+
+        with patch.object(service, "_get_user_tracks", side_effect=fake_tracks):
+            with patch.object(service, "_save_tracking_data"), \
+                    patch.object(service, "_save_known_tracks") as save_known:
+                new_tracks = asyncio.run(service.check_for_new_tracks())
+
+        assert max(peak) == 5
+        assert [t["track"].id for t in new_tracks] == [101, 102, 103]
+        assert service.tracking_data["known_tracks"]["0"] == {100}
+        assert service.tracking_data["known_tracks"]["2"] == {102}
+        assert "4" not in service.tracking_data["known_tracks"]
+        # Only artists with new uploads are rewritten
+        save_known.assert_called_once_with(["1", "2", "3"])
+
+    def test_legacy_known_tracks_split_per_artist(self, service):
+        """Test that a single known_tracks row is loaded and re-saved as one row per artist"""
+        service.storage.upsert("soundcloud_tracking", "known_tracks", {"1": [11, 12], "2": [21]})
+        service.storage.upsert("soundcloud_known_tracks", "3", [31])
+
+        with patch("services.soundcloud_service.persistence_manager") as manager:
+            data = service._load_tracking_data()
+        service.tracking_data = data
+
+        assert data["known_tracks"] == {"1": {11, 12}, "2": {21}, "3": {31}}
+        marked = {c.args for c in manager.mark_dirty.call_args_list}
+        assert marked == {("soundcloud_known_tracks", "1"), ("soundcloud_known_tracks", "2"),
+                          ("soundcloud_tracking", "known_tracks")}
+        assert service._serialize_tracking_field("known_tracks") is None
+        assert service._serialize_known_tracks("1") == [11, 12]
+
+    def test_client_token_fetched_once_for_concurrent_requests(self, service):
+        """Test that requests racing for the startup token share a single fetch"""
+        service.access_token = None
+        service._client_token_pending = True
+        fetches = []
+
+        async def fetch_token():
+            fetches.append(1)
+            await asyncio.sleep(0.01)
+            return "client_token"
+
+        service.oauth_handler = MagicMock()
+        service.oauth_handler.get_client_credentials_token = fetch_token
+
+        async def run():
+            return await asyncio.gather(*(service._ensure_access_token() for _ in range(5)))
+
+        assert asyncio.run(run()) == ["client_token"] * 5
+        assert len(fetches) == 1
+
+    def test_concurrent_401s_refresh_token_once(self, service):
+        """Test that requests rejected with the same token trigger only one refresh"""
+        service.access_token = "expired_token"
+        fetches = []
+
+        async def fetch_token():
+            fetches.append(1)
+            await asyncio.sleep(0.01)
+            return "fresh_token"
+
+        async def fake_get(url, params=None, headers=None):
+            if headers.get("Authorization") == "OAuth expired_token":
+                return MagicMock(status_code=401)
+            return MagicMock(status_code=200, json=lambda: {"ok": True})
+
+        service.oauth_handler = MagicMock()
+        service.oauth_handler.get_client_credentials_token = fetch_token
+
+        async def run():
+            return await asyncio.gather(*(service._make_api_request("https://api.soundcloud.com/me")
+                                          for _ in range(5)))
+
+        with patch("services.soundcloud_service.http_client.get", side_effect=fake_get):
+            results = asyncio.run(run())
+
+        assert results == [{"ok": True}] * 5
+        assert len(fetches) == 1
+        assert service.access_token == "fresh_token"
+
     def test_format_stats_update_single_follower_with_name(self, service):
         """Test formatting single new follower with name"""
         changes = {
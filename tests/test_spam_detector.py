@@ -0,0 +1,42 @@
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.spam_detector import SpamDetector
+
+
+class TestSpamDetector:
+    """Tests for the sliding-window spam detector"""
+
+    def test_threshold_within_timeframe(self):
+        """Test that the threshold is reached only by messages inside the window"""
+        detector = SpamDetector(threshold=3, timeframe=10)
+
+        assert not detector.record_message("c", "u", 0)
+        assert not detector.record_message("c", "u", 5)
+        assert detector.record_message("c", "u", 9)
+        # The first message falls out of the window
+        assert not detector.record_message("c", "u", 16)
+        assert detector.message_count("c", "u") == 2
+
+    def test_senders_are_scoped_per_chat(self):
+        """Test that the same user in two chats has separate windows"""
+        detector = SpamDetector(threshold=2, timeframe=10)
+        detector.record_message("a", "u", 0)
+
+        assert not detector.record_message("b", "u", 1)
+        assert detector.record_message("a", "u", 2)
+
+    def test_sweep_evicts_only_idle_senders(self):
+        """Test that the sweep drops idle senders and keeps active ones"""
+        detector = SpamDetector(idle_ttl=100)
+        detector.record_message("c", "idle", 0)
+        detector.record_message("c", "active", 50)
+        detector.record_message("c", "idle2", 10)
+        detector.record_message("c", "idle2", 150)
+
+        assert detector.sweep(140) == 1
+        assert len(detector) == 2
+        assert detector.message_count("c", "idle") == 0
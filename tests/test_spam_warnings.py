@@ -0,0 +1,33 @@
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.spam_warnings import SpamWarningEngine
+
+
+class TestSpamWarningEngine:
+    """Tests for template-based spam warnings"""
+
+    def test_warnings_escalate(self):
+        """Test that each warning level uses its own templates"""
+        engine = SpamWarningEngine({1: ["{name} först"], 2: ["{name} andra, {left} kvar"], 3: ["{name} sista"]})
+
+        assert engine.render("Bo", 1, 5).startswith("Bo först")
+        assert engine.render("Bo", 2, 5).startswith("Bo andra, 1 kvar")
+        assert engine.render("Bo", 3, 5).startswith("Bo sista")
+
+    def test_later_warnings_use_last_level(self):
+        """Test that warnings past the last level reuse it"""
+        engine = SpamWarningEngine({1: ["{name} först"], 2: ["{name} sista"]})
+
+        assert engine.render("Bo", 7, 5).startswith("Bo sista")
+
+    def test_default_templates_render(self):
+        """Test that every default template renders with the available fields"""
+        engine = SpamWarningEngine()
+
+        for level in range(1, engine.max_level + 1):
+            for _ in range(10):
+                assert "Anna" in engine.render("Anna", level, 6)
@@ -0,0 +1,98 @@
+import json
+import pytest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.storage import JsonFileBackend, SQLiteBackend, StorageBackend, migrate_json_to_sqlite
+
+
+class TestStorageBackend:
+    """Tests for the backend interface"""
+
+    def test_incomplete_backend_fails_on_creation(self):
+        """Test that a backend missing a required method can't be instantiated"""
+        class LoadOnlyBackend(StorageBackend):
+            def load(self, namespace):
+                return {}
+
+        with pytest.raises(TypeError):
+            LoadOnlyBackend()
+
+
+class TestSQLiteBackend:
+    """Tests for the SQLite storage backend"""
+
+    def test_upsert_and_load(self, tmp_path):
+        """Test that rows round-trip and upserts replace existing values"""
+        backend = SQLiteBackend(str(tmp_path / "test.db"))
+        backend.upsert_many("users", {"1": {"first_name": "Åsa"}, "2": {"first_name": "Bo"}})
+        backend.upsert("users", "1", {"first_name": "Anna"})
+
+        assert backend.load("users") == {"1": {"first_name": "Anna"}, "2": {"first_name": "Bo"}}
+        assert backend.load("reputation") == {}
+
+    def test_delete(self, tmp_path):
+        """Test deleting rows only affects the given namespace"""
+        backend = SQLiteBackend(str(tmp_path / "test.db"))
+        backend.upsert("users", "1", {"a": 1})
+        backend.upsert("reputation", "1", {"b": 2})
+        backend.delete("users", "1")
+
+        assert backend.load("users") == {}
+        assert backend.load("reputation") == {"1": {"b": 2}}
+
+    def test_persists_across_connections(self, tmp_path):
+        """Test that committed rows are visible after reopening the database"""
+        path = str(tmp_path / "test.db")
+        backend = SQLiteBackend(path)
+        backend.upsert("chat_lists", "-100", ["mjölk", "bröd"])
+        backend.close()
+
+        reopened = SQLiteBackend(path)
+        assert not reopened.is_empty()
+        assert reopened.load("chat_lists") == {"-100": ["mjölk", "bröd"]}
+
+
+class TestMigration:
+    """Tests for migrating the JSON files into SQLite"""
+
+    def test_migrate_json_to_sqlite(self, tmp_path):
+        """Test that every legacy JSON document is copied row by row"""
+        with open(tmp_path / "users.json", "w", encoding="utf-8") as f:
+            json.dump({"1": {"username": "anna"}}, f)
+        with open(tmp_path / "chat_lists.json", "w", encoding="utf-8") as f:
+            json.dump({"-100": ["kaffe"]}, f)
+
+        backend = SQLiteBackend(str(tmp_path / "test.db"))
+        migrated = migrate_json_to_sqlite(backend, str(tmp_path))
+
+        assert migrated["users"] == 1
+        assert migrated["reputation"] == 0
+        assert backend.load("users") == {"1": {"username": "anna"}}
+        assert backend.load("chat_lists") == {"-100": ["kaffe"]}
+
+    def test_json_backend_writes_whole_document(self, tmp_path):
+        """Test that the JSON backend keeps the original one-file format"""
+        backend = JsonFileBackend(str(tmp_path))
+        backend.load("users")
+        backend.upsert("users", "1", {"username": "anna"})
+
+        with open(tmp_path / "users.json", encoding="utf-8") as f:
+            assert json.load(f) == {"1": {"username": "anna"}}
+
+    def test_json_backend_does_not_share_loaded_document(self, tmp_path):
+        """Test that changes to the loaded dict only reach the file through upserts"""
+        with open(tmp_path / "users.json", "w", encoding="utf-8") as f:
+            json.dump({"1": {"username": "anna"}}, f)
+        backend = JsonFileBackend(str(tmp_path))
+        users = backend.load("users")
+        users["1"]["username"] = "changed"
+        users["2"] = {"username": "unsaved"}
+
+        backend.upsert("users", "3", {"username": "saved"})
+
+        with open(tmp_path / "users.json", encoding="utf-8") as f:
+            assert json.load(f) == {"1": {"username": "anna"}, "3": {"username": "saved"}}
@@ -0,0 +1,60 @@
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.text_index import TextIndex, EXACT_MATCH, PREFIX_MATCH, SUBSTRING_MATCH
+
+
+def make_index():
+    index = TextIndex()
+    index.update("1", ["Anna", "Svensson", "anna_s"])
+    index.update("2", ["Johanna", None, "jojo"])
+    index.update("3", ["Bo", "Annersson", None])
+    return index
+
+
+class TestTextIndex:
+    """Tests for the prefix/trigram name index"""
+
+    def test_ranked_matches(self):
+        """Test exact, prefix and substring matches and their order"""
+        index = make_index()
+
+        assert index.search("anna") == [(EXACT_MATCH, "1"), (SUBSTRING_MATCH, "2")]
+        assert index.search("ann") == [(PREFIX_MATCH, "1"), (PREFIX_MATCH, "3"), (SUBSTRING_MATCH, "2")]
+
+    def test_case_insensitive_substring(self):
+        """Test substring queries regardless of case"""
+        index = make_index()
+
+        assert index.search("SSON") == [(SUBSTRING_MATCH, "1"), (SUBSTRING_MATCH, "3")]
+        assert index.search("xyz") == []
+
+    def test_short_queries(self):
+        """Test that queries shorter than a trigram still find substrings"""
+        index = make_index()
+
+        assert [member for _, member in index.search("jo")] == ["2"]
+        assert {member for _, member in index.search("o")} == {"1", "2", "3"}
+
+    def test_update_replaces_old_names(self):
+        """Test that renamed members are no longer found by their old names"""
+        index = make_index()
+        index.update("2", ["Greta", None, "gg"])
+
+        assert index.search("johanna") == []
+        assert index.search("greta") == [(EXACT_MATCH, "2")]
+
+        index.remove("2")
+        assert index.search("greta") == []
+        assert len(index) == 2
+
+    def test_multi_word_fields(self):
+        """Test that each word of a field works as a prefix"""
+        index = TextIndex()
+        index.update("1", ["Anna Maria"])
+
+        assert index.search("mar") == [(PREFIX_MATCH, "1")]
+        assert index.search("anna m") == [(PREFIX_MATCH, "1")]
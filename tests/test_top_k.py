@@ -0,0 +1,38 @@
+import random
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.top_k import TopK
+
+
+class TestTopK:
+    """Tests for the incrementally maintained top-k heap"""
+
+    def test_keeps_highest_counts(self):
+        """Test that members enter the top k only by passing the minimum"""
+        top = TopK(2)
+        top.update("a", 5)
+        top.update("b", 3)
+        top.update("c", 3)
+
+        assert top.top() == [("a", 5), ("b", 3)]
+        top.update("c", 4)
+        assert top.top() == [("a", 5), ("c", 4)]
+        assert len(top) == 2
+
+    def test_matches_full_sort_under_increments(self):
+        """Test against sorting every member after many random increments"""
+        rng = random.Random(7)
+        top = TopK(5)
+        counts = {}
+        for _ in range(2000):
+            member = f"user{rng.randrange(40)}"
+            counts[member] = counts.get(member, 0) + 1
+            top.update(member, counts[member])
+
+        expected = sorted(counts.values(), reverse=True)[:5]
+        assert [count for _, count in top.top()] == expected
+        assert all(counts[member] == count for member, count in top.top())
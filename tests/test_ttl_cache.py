@@ -0,0 +1,41 @@
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.ttl_cache import TTLCache, MISSING
+
+
+class TestTTLCache:
+    """Tests for the LRU cache with expiring entries"""
+
+    def test_entries_expire(self):
+        """Test that entries are served until their ttl runs out"""
+        cache = TTLCache(ttl=10)
+        cache.set("a", 1, now=100)
+
+        assert cache.get("a", now=109) == 1
+        assert cache.get("a", now=110) is MISSING
+        assert len(cache) == 0
+
+    def test_cached_none_is_a_hit(self):
+        """Test that None can be cached with its own shorter ttl"""
+        cache = TTLCache(ttl=100)
+        cache.set("unknown", None, ttl=5, now=0)
+
+        assert cache.get("unknown", now=4) is None
+        assert cache.get("unknown", now=6) is MISSING
+        assert cache.stats == {'hits': 1, 'misses': 1}
+
+    def test_evicts_least_recently_used(self):
+        """Test that a read keeps an entry from being evicted"""
+        cache = TTLCache(ttl=100, max_size=2)
+        cache.set("a", 1, now=0)
+        cache.set("b", 2, now=0)
+        cache.get("a", now=1)
+        cache.set("c", 3, now=2)
+
+        assert cache.get("b", now=3) is MISSING
+        assert cache.get("a", now=3) == 1
+        assert cache.get("c", now=3) == 3
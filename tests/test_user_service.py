@@ -0,0 +1,56 @@
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from unittest.mock import MagicMock, patch
+
+
+class TestUserService:
+    """Tests for user lookups by username"""
+
+    def make_service(self):
+        from services.user_service import UserService
+
+        with patch.object(UserService, "_load_users", lambda self: {}):
+            return UserService()
+
+    def make_user(self, user_id, first_name, username):
+        return MagicMock(id=user_id, first_name=first_name, last_name=None, username=username,
+                         is_bot=False, language_code="sv")
+
+    def test_username_lookup_is_case_insensitive(self):
+        """Test @name and plain name lookups in any case"""
+        service = self.make_service()
+        service.update_user(self.make_user(1, "Anna", "Anna_S"))
+
+        assert service.get_user_id_by_username("@anna_s") == "1"
+        assert service.get_user_id_by_username("ANNA_S") == "1"
+        assert service.get_user_id_by_username("@nobody") is None
+
+    def test_username_change(self):
+        """Test that a renamed user is only found by the new username"""
+        service = self.make_service()
+        service.update_user(self.make_user(1, "Anna", "old_name"))
+        service.update_user(self.make_user(1, "Anna", "new_name"))
+
+        assert service.get_user_id_by_username("old_name") is None
+        assert service.get_user_id_by_username("new_name") == "1"
+
+    def test_username_moved_to_another_account(self):
+        """Test that the most recently seen holder of a username wins"""
+        service = self.make_service()
+        service.update_user(self.make_user(1, "Anna", "shared"))
+        service.update_user(self.make_user(2, "Bo", "shared"))
+
+        assert service.get_user_id_by_username("shared") == "2"
+
+    def test_find_users(self):
+        """Test that @username resolves directly and names fall back to search"""
+        service = self.make_service()
+        service.update_user(self.make_user(1, "Anna", "anna_s"))
+        service.update_user(self.make_user(2, "Johanna", "jo"))
+
+        assert [user["user_id"] for user in service.find_users("@jo")] == ["2"]
+        assert [user["user_id"] for user in service.find_users("anna")] == ["1", "2"]
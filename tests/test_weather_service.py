@@ -0,0 +1,69 @@
+import asyncio
+import pytest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from unittest.mock import patch, AsyncMock
+
+from services import weather_service
+
+
+def fake_api(known_cities):
+    """AsyncMock standing in for http_client.get against OpenWeatherMap"""
+    async def get(url, params=None, **kwargs):
+        if url == weather_service.GEOCODE_URL:
+            name = params['q'].strip().title()
+            body = [{'name': name, 'lat': 57.7, 'lon': 11.9, 'country': 'SE'}] if name in known_cities else []
+            return httpx.Response(200, json=body)
+        return httpx.Response(200, json={
+            'weather': [{'main': 'Clouds', 'description': 'overcast clouds'}],
+            'main': {'temp': 12.5, 'humidity': 80}
+        })
+    return AsyncMock(side_effect=get)
+
+
+class TestWeatherService:
+    """Tests for the cached weather lookups"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, monkeypatch):
+        monkeypatch.setenv('OPENWEATHERMAP_API_KEY', 'test_key')
+        weather_service._geocode_cache.clear()
+        weather_service._weather_cache.clear()
+
+    def test_report_is_cached_per_normalized_city(self):
+        """Test that repeated lookups of the same city reuse the first fetch"""
+        api = fake_api({'Gothenburg'})
+        with patch.object(weather_service.http_client, 'get', api):
+            first = asyncio.run(weather_service.get_weather_report('Gothenburg'))
+            second = asyncio.run(weather_service.get_weather_report('  gothenburg '))
+
+        assert first is second
+        assert first.temperature == 12.5
+        assert api.call_count == 2  # one geocode, one weather
+        assert 'Temperature: 12.50 °C' in first.format()
+
+    def test_unknown_city_is_negatively_cached(self):
+        """Test that an unknown city is not geocoded again"""
+        api = fake_api(set())
+        with patch.object(weather_service.http_client, 'get', api):
+            assert asyncio.run(weather_service.get_weather('Atlantis')) == \
+                "Failed to retrieve weather information for Atlantis."
+            assert asyncio.run(weather_service.get_weather_report('atlantis')) is None
+
+        assert api.call_count == 1
+
+    def test_batch_fetches_each_city_once(self):
+        """Test that a batch dedupes cities and keeps the caller's order"""
+        api = fake_api({'Gothenburg', 'Stockholm'})
+        with patch.object(weather_service.http_client, 'get', api):
+            reports = asyncio.run(weather_service.get_weather_reports(['Stockholm', 'Gothenburg', 'stockholm', 'Nowhere']))
+
+        assert list(reports) == ['Stockholm', 'Gothenburg', 'stockholm', 'Nowhere']
+        assert reports['Stockholm'] is reports['stockholm']
+        assert reports['Nowhere'] is None
+        assert api.call_count == 5
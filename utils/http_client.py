@@ -0,0 +1,155 @@
+import asyncio
+import random
+import time
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from config.constants import (
+    HTTP_TIMEOUT, HTTP_MAX_CONNECTIONS, HTTP_PER_HOST_LIMIT,
+    HTTP_MAX_RETRIES, HTTP_RETRY_BASE_DELAY, HTTP_MAX_RETRY_AFTER
+)
+
+# Responses worth another try; anything else is returned to the caller as is
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class HTTPClient:
+    """
+    Shared async HTTP client for the bot's outbound integrations.
+
+    All requests go through one pooled httpx.AsyncClient so connections are
+    kept alive between calls. Each host gets a semaphore so one slow API
+    can't hold every connection, and idempotent requests are retried on
+    timeouts, connection errors and 429/5xx with jittered exponential backoff.
+    Hosts with a published rate limit can also be given a request rate, which
+    spaces their requests out evenly.
+    """
+
+    def __init__(self, timeout: float = HTTP_TIMEOUT, max_connections: int = HTTP_MAX_CONNECTIONS,
+                 per_host_limit: int = HTTP_PER_HOST_LIMIT, max_retries: int = HTTP_MAX_RETRIES,
+                 base_delay: float = HTTP_RETRY_BASE_DELAY, transport: httpx.AsyncBaseTransport = None):
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.per_host_limit = per_host_limit
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+        self._host_concurrency: Dict[str, int] = {}
+        self._host_rates: Dict[str, float] = {}
+        self._next_slot: Dict[str, float] = {}
+        self.stats = {'requests': 0, 'retries': 0, 'failures': 0}
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Create the pooled client on first use, inside the running event loop"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                ),
+                follow_redirects=True,
+                transport=self._transport
+            )
+        return self._client
+
+    def configure_host(self, host: str, concurrency: int = None, rate: float = None) -> None:
+        """
+        Override the limits for one host.
+
+        Args:
+            host (str): Host name as it appears in URLs, e.g. api.soundcloud.com
+            concurrency (int): Requests allowed in flight at once
+            rate (float): Requests allowed per second
+        """
+        if concurrency is not None:
+            self._host_concurrency[host] = concurrency
+            self._host_limits.pop(host, None)
+        if rate is not None:
+            self._host_rates[host] = rate
+
+    def _host_limit(self, host: str) -> asyncio.Semaphore:
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self._host_concurrency.get(host, self.per_host_limit))
+        return self._host_limits[host]
+
+    async def _wait_for_slot(self, host: str) -> None:
+        """Space requests to a rate-limited host 1/rate seconds apart"""
+        rate = self._host_rates.get(host)
+        if not rate:
+            return
+        now = time.monotonic()
+        slot = max(now, self._next_slot.get(host, now))
+        self._next_slot[host] = slot + 1 / rate
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    def _backoff(self, attempt: int, response: httpx.Response = None) -> Optional[float]:
+        """
+        Seconds to wait before the next attempt, honouring Retry-After when given.
+
+        Returns None when the server asks for a longer wait than
+        HTTP_MAX_RETRY_AFTER, so the caller gives up instead of holding a handler.
+        """
+        if response is not None:
+            retry_after = response.headers.get('Retry-After')
+            if retry_after and retry_after.isdigit():
+                delay = float(retry_after)
+                return delay if delay <= HTTP_MAX_RETRY_AFTER else None
+        # Full jitter keeps clients that failed together from retrying together
+        return random.uniform(0, self.base_delay * (2 ** attempt))
+
+    async def request(self, method: str, url: str, retries: int = None, **kwargs) -> httpx.Response:
+        """
+        Send a request through the shared pool.
+
+        Only GET is retried unless retries is given explicitly. Raises the
+        last httpx error if every attempt failed without a response.
+        """
+        if retries is None:
+            retries = self.max_retries if method.upper() == 'GET' else 0
+
+        client = self._get_client()
+        host = urlsplit(url).netloc
+        limit = self._host_limit(host)
+
+        attempt = 0
+        while True:
+            self.stats['requests'] += 1
+            try:
+                async with limit:
+                    await self._wait_for_slot(host)
+                    response = await client.request(method, url, **kwargs)
+            except (httpx.TimeoutException, httpx.TransportError):
+                if attempt >= retries:
+                    self.stats['failures'] += 1
+                    raise
+                delay = self._backoff(attempt)
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt >= retries:
+                    return response
+                delay = self._backoff(attempt, response)
+                if delay is None:
+                    return response
+
+            attempt += 1
+            self.stats['retries'] += 1
+            await asyncio.sleep(delay)
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request('GET', url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request('POST', url, **kwargs)
+
+    async def aclose(self) -> None:
+        """Close pooled connections; the client reopens on the next request"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+# Singleton instance
+http_client = HTTPClient()
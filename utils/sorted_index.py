@@ -0,0 +1,63 @@
+from bisect import bisect_left, insort
+from typing import Dict, Hashable, Iterator, List, Optional, Tuple
+
+class SortedIndex:
+    """
+    Keeps members ordered by a numeric key.
+
+    Entries live in a sorted list of (key, member) tuples, so lookups, ranks and
+    range counts are binary searches and updates are a binary search plus a
+    list insert/delete.
+    """
+
+    def __init__(self):
+        self._entries: List[Tuple[float, Hashable]] = []
+        self._keys: Dict[Hashable, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, member: Hashable) -> bool:
+        return member in self._keys
+
+    def get(self, member: Hashable) -> Optional[float]:
+        """Get the key currently stored for a member"""
+        return self._keys.get(member)
+
+    def update(self, member: Hashable, key: float) -> None:
+        """Insert a member or move it to a new key"""
+        old_key = self._keys.get(member)
+        if old_key is not None:
+            if old_key == key:
+                return
+            del self._entries[bisect_left(self._entries, (old_key, member))]
+        self._keys[member] = key
+        insort(self._entries, (key, member))
+
+    def remove(self, member: Hashable) -> None:
+        """Remove a member if present"""
+        old_key = self._keys.pop(member, None)
+        if old_key is not None:
+            del self._entries[bisect_left(self._entries, (old_key, member))]
+
+    def rank(self, member: Hashable) -> Optional[int]:
+        """1-based position of a member when ordered by descending key"""
+        key = self._keys.get(member)
+        if key is None:
+            return None
+        return len(self._entries) - bisect_left(self._entries, (key, member))
+
+    def top(self, k: int) -> List[Tuple[Hashable, float]]:
+        """The k members with the highest keys, highest first"""
+        if k <= 0:
+            return []
+        return [(member, key) for key, member in reversed(self._entries[-k:])]
+
+    def count_at_least(self, key: float) -> int:
+        """Number of members whose key is >= the given key"""
+        return len(self._entries) - bisect_left(self._entries, (key,))
+
+    def members_at_least(self, key: float) -> Iterator[Hashable]:
+        """Members whose key is >= the given key, lowest key first"""
+        for _, member in self._entries[bisect_left(self._entries, (key,)):]:
+            yield member
@@ -0,0 +1,110 @@
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Set, Tuple
+
+# Match quality, lower is better
+EXACT_MATCH = 0
+PREFIX_MATCH = 1
+SUBSTRING_MATCH = 2
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+class TextIndex:
+    """
+    Substring search over a few short text fields per member (e.g. names).
+
+    Fields are lowercased once when a member is indexed. A sorted list of
+    (term, member) pairs answers prefix queries with a binary search, and a
+    trigram map narrows substring queries down to a handful of candidates.
+    """
+
+    def __init__(self):
+        self._fields: Dict[str, Tuple[str, ...]] = {}
+        self._terms: List[Tuple[str, str]] = []
+        self._trigrams: Dict[str, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._fields)
+
+    @staticmethod
+    def _terms_for(fields: Tuple[str, ...]) -> Set[str]:
+        # Whole fields plus each word, so "anna maria" is found by "maria" as a prefix too
+        terms = set(fields)
+        for field in fields:
+            terms.update(field.split())
+        return terms
+
+    def update(self, member: str, values: Iterable[str]) -> None:
+        """Index a member's text fields, replacing any previous values"""
+        fields = tuple(value.lower() for value in values if value)
+        if self._fields.get(member) == fields:
+            return
+        self.remove(member)
+        self._fields[member] = fields
+
+        for term in self._terms_for(fields):
+            insort(self._terms, (term, member))
+        for field in fields:
+            for trigram in _trigrams(field):
+                self._trigrams.setdefault(trigram, set()).add(member)
+
+    def remove(self, member: str) -> None:
+        """Remove a member if present"""
+        fields = self._fields.pop(member, None)
+        if fields is None:
+            return
+
+        for term in self._terms_for(fields):
+            position = bisect_left(self._terms, (term, member))
+            if position < len(self._terms) and self._terms[position] == (term, member):
+                del self._terms[position]
+        for field in fields:
+            for trigram in _trigrams(field):
+                members = self._trigrams.get(trigram)
+                if members:
+                    members.discard(member)
+                    if not members:
+                        del self._trigrams[trigram]
+
+    def _prefix_matches(self, query: str) -> Dict[str, int]:
+        matches = {}
+        position = bisect_left(self._terms, (query, ''))
+        while position < len(self._terms) and self._terms[position][0].startswith(query):
+            term, member = self._terms[position]
+            quality = EXACT_MATCH if term == query else PREFIX_MATCH
+            matches[member] = min(quality, matches.get(member, quality))
+            position += 1
+        return matches
+
+    def _substring_candidates(self, query: str) -> Iterable[str]:
+        if len(query) < 3:
+            # Too short for trigrams, scan the already lowercased fields
+            return self._fields.keys()
+
+        candidates = None
+        for trigram in sorted(_trigrams(query), key=lambda t: len(self._trigrams.get(t, ()))):
+            members = self._trigrams.get(trigram)
+            if not members:
+                return ()
+            candidates = set(members) if candidates is None else candidates & members
+            if not candidates:
+                return ()
+        return candidates
+
+    def search(self, query: str) -> List[Tuple[int, str]]:
+        """
+        Find members with a field containing the query
+
+        Returns:
+            List[Tuple[int, str]]: (match quality, member), best matches first
+        """
+        query = query.lower().strip()
+        if not query:
+            return []
+
+        matches = self._prefix_matches(query)
+        for member in self._substring_candidates(query):
+            if member not in matches and any(query in field for field in self._fields[member]):
+                matches[member] = SUBSTRING_MATCH
+
+        return sorted((quality, member) for member, quality in matches.items())
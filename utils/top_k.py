@@ -0,0 +1,56 @@
+import heapq
+from typing import Dict, Hashable, List, Tuple
+
+class TopK:
+    """
+    The k members with the highest counts, for counts that only ever grow
+    (e.g. message counts).
+
+    A member outside the top k can only enter by passing the current minimum,
+    so a min-heap of the top k is enough. Entries for members whose count
+    changed are left in the heap and skipped lazily when they reach the top.
+    """
+
+    def __init__(self, k: int):
+        self.k = k
+        self._counts: Dict[Hashable, float] = {}
+        self._heap: List[Tuple[float, Hashable]] = []
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def _min(self) -> Tuple[float, Hashable]:
+        """Smallest live entry, dropping stale ones on the way"""
+        while self._heap:
+            count, member = self._heap[0]
+            if self._counts.get(member) == count:
+                return count, member
+            heapq.heappop(self._heap)
+        raise IndexError('empty')
+
+    def _push(self, member: Hashable, count: float) -> None:
+        self._counts[member] = count
+        heapq.heappush(self._heap, (count, member))
+        # Keep stale entries from piling up under members that post a lot
+        if len(self._heap) > 4 * self.k + 16:
+            self._heap = [(c, m) for m, c in self._counts.items()]
+            heapq.heapify(self._heap)
+
+    def update(self, member: Hashable, count: float) -> None:
+        """Record a member's new count"""
+        if member in self._counts:
+            if self._counts[member] != count:
+                self._push(member, count)
+        elif len(self._counts) < self.k:
+            self._push(member, count)
+        else:
+            min_count, min_member = self._min()
+            if count > min_count:
+                heapq.heappop(self._heap)
+                del self._counts[min_member]
+                self._push(member, count)
+
+    def top(self, n: int = None) -> List[Tuple[Hashable, float]]:
+        """Members and counts, highest first"""
+        ranked = sorted(self._counts.items(), key=lambda item: item[1], reverse=True)
+        return ranked if n is None else ranked[:n]
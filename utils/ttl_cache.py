@@ -0,0 +1,53 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+# Returned by get() for absent or expired keys, so None can be cached as a value
+MISSING = object()
+
+class TTLCache:
+    """
+    Size-bounded cache whose entries expire after a time-to-live.
+
+    Entries are kept in least-recently-used order, so once max_size is reached
+    each insert evicts the entry that was read or written longest ago. Expired
+    entries are dropped when they are read. Individual entries may use their
+    own ttl, e.g. a short one for negative results.
+    """
+
+    def __init__(self, ttl: float, max_size: int = 256):
+        self.ttl = ttl
+        self.max_size = max_size
+        # key -> (expires_at, value), least recently used first
+        self._entries: OrderedDict = OrderedDict()
+        self.stats = {'hits': 0, 'misses': 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = MISSING, now: float = None) -> Any:
+        """Get a live entry, or default if it is absent or expired"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > (time.time() if now is None else now):
+                self._entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return value
+            del self._entries[key]
+        self.stats['misses'] += 1
+        return default
+
+    def set(self, key: Hashable, value: Any, ttl: float = None, now: float = None) -> None:
+        """Store a value, evicting the least recently used entry when full"""
+        now = time.time() if now is None else now
+        self._entries[key] = (now + (self.ttl if ttl is None else ttl), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()